@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class KanbanConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kanban'
+
+    def ready(self):
+        from . import metrics, response_cache, routers, signals  # noqa: F401
+        metrics.install()
@@ -0,0 +1,213 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import JsonResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.views import View
+from rest_framework import exceptions
+
+from users.authentication import StatelessJWTAuthentication
+from .events import get_broker
+from .fieldsets import parse_fieldset, values_representation
+from .metrics import timed_serialization
+from .models import Project, Contributor, Issue, Comment
+from .pagination import AsyncKeysetPagination
+from .serializers import ProjectSerializer, IssueSerializer, CommentSerializer
+
+
+# Row renderers by (serializer class, fieldset), shared by all the async views.
+_representations = {}
+
+
+class AsyncReadView(View):
+    """
+    Base class of the native async read endpoints.
+
+    Authentication and queries all run on the event loop through the async
+    ORM, instead of taking a thread per request like the DRF viewsets do
+    under ASGI. Responses use the same representation and page envelope
+    (`next`, `previous`, `results`) as the viewsets, including `?fields=`
+    and `?omit=`.
+    """
+    http_method_names = ['get']
+    serializer_class = None
+    authentication = StatelessJWTAuthentication()
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            data = await self.read(request, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+        except models.ObjectDoesNotExist:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        if isinstance(data, HttpResponseBase):
+            return data
+        with timed_serialization():
+            return JsonResponse(data, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+    async def authenticate(self, request):
+        credentials = await self.authentication.aauthenticate(request)
+        if credentials is None:
+            raise exceptions.NotAuthenticated()
+        user, request.auth = credentials
+        return user
+
+    def get_queryset(self, request, **kwargs):
+        raise NotImplementedError
+
+    def get_representation(self, request):
+        """
+        Return the row renderer and columns of the requested fieldset.
+        Building a ModelSerializer's fields costs more than rendering a page,
+        so renderers are built once per fieldset and reused by later requests.
+        """
+        fields = parse_fieldset(request, self.serializer_class)
+        key = (self.serializer_class, None if fields is None else tuple(fields))
+        representation = _representations.get(key)
+        if representation is None:
+            representation = _representations[key] = values_representation(self.serializer_class(), fields)
+        return representation
+
+    async def read(self, request, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    paginator_class = AsyncKeysetPagination
+
+    async def read(self, request, **kwargs):
+        render, columns = self.get_representation(request)
+        queryset = self.get_queryset(request, **kwargs)
+        rows, next_link, previous_link = await self.paginator_class().apaginate(
+            queryset.values(*dict.fromkeys(['id', 'created_time', *columns])), request
+        )
+        with timed_serialization():
+            results = [render(row) for row in rows]
+        return {'next': next_link, 'previous': previous_link, 'results': results}
+
+
+class AsyncDetailView(AsyncReadView):
+
+    async def read(self, request, pk, **kwargs):
+        render, columns = self.get_representation(request)
+        # Reads need no object permission beyond the visibility given by the queryset.
+        instance = await self.get_queryset(request, **kwargs).only(*dict.fromkeys(['id', *columns])).aget(pk=pk)
+        with timed_serialization():
+            return render({column: getattr(instance, column) for column in columns})
+
+
+class ProjectQuerysetMixin:
+    serializer_class = ProjectSerializer
+
+    def get_queryset(self, request, **kwargs):
+        """
+        Projects where the user is either the author or a contributor, as in ProjectViewSet.
+        """
+        user_id = request.user.id
+        return Project.objects.filter(
+            models.Q(author_id=user_id)
+            | models.Q(id__in=Contributor.objects.filter(user_id=user_id).values('project_id')),
+            deleting=False,
+        )
+
+
+class IssueQuerysetMixin:
+    serializer_class = IssueSerializer
+
+    def get_queryset(self, request, project_pk, **kwargs):
+        return Issue.objects.filter(project_id=project_pk, project__deleting=False)
+
+
+class CommentQuerysetMixin:
+    serializer_class = CommentSerializer
+
+    def get_queryset(self, request, project_pk, issue_pk, **kwargs):
+        return Comment.objects.filter(issue_id=issue_pk, issue__project__deleting=False)
+
+
+class ProjectListView(ProjectQuerysetMixin, AsyncListView):
+    pass
+
+
+class ProjectDetailView(ProjectQuerysetMixin, AsyncDetailView):
+    pass
+
+
+class IssueListView(IssueQuerysetMixin, AsyncListView):
+    pass
+
+
+class IssueDetailView(IssueQuerysetMixin, AsyncDetailView):
+    pass
+
+
+class CommentListView(CommentQuerysetMixin, AsyncListView):
+    pass
+
+
+class CommentDetailView(CommentQuerysetMixin, AsyncDetailView):
+    pass
+
+
+class ProjectEventStreamView(ProjectQuerysetMixin, AsyncReadView):
+    """
+    Server-sent events of a project: issue created, updated and status
+    changed, and comment added (see kanban.events).
+
+    A client resuming with Last-Event-ID first receives the events it missed,
+    or a `reset` event when they are no longer buffered, after which it
+    should reload the project. Browsers cannot set headers on an
+    EventSource, so the access token may also be passed as `?access_token=`.
+
+    Access is checked again every KANBAN_EVENT_KEEPALIVE_SECONDS, and the
+    stream ends with a `close` event once the user can no longer see the
+    project or the access token expires, since a long lived stream would
+    otherwise outlive both.
+
+    Waiting clients hold no thread, which requires an ASGI server: under
+    WSGI the stream would tie up a worker per client and is refused.
+    """
+
+    async def authenticate(self, request):
+        token = request.GET.get('access_token')
+        if token is None or self.authentication.get_header(request) is not None:
+            return await super().authenticate(request)
+        request.auth = self.authentication.get_validated_token(token.encode())
+        return self.authentication.get_user(request.auth)
+
+    async def read(self, request, project_pk):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'The event stream is only served through softdesk.asgi.'}, status=501
+            )
+        if not await self.get_queryset(request).filter(pk=project_pk).aexists():
+            raise models.ObjectDoesNotExist
+        response = StreamingHttpResponse(
+            self.stream(request, project_pk, request.headers.get('Last-Event-ID')), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keeps nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, request, project_id, last_event_id):
+        keepalive = getattr(settings, 'KANBAN_EVENT_KEEPALIVE_SECONDS', 15)
+        expires = request.auth['exp']
+        checked = time.monotonic()
+        # Reconnection delay (milliseconds) of the client after a dropped connection.
+        yield 'retry: 3000\n\n'
+        async for event in get_broker().listen(project_id, last_event_id, keepalive):
+            if time.time() >= expires:
+                yield 'event: close\ndata: {"reason": "token_expired"}\n\n'
+                return
+            if time.monotonic() - checked >= keepalive:
+                if not await self.get_queryset(request).filter(pk=project_id).aexists():
+                    yield 'event: close\ndata: {"reason": "not_found"}\n\n'
+                    return
+                checked = time.monotonic()
+            yield ': keepalive\n\n' if event is None else event.encode()
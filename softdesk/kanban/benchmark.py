@@ -0,0 +1,305 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.serializer import ClaimsTokenObtainPairSerializer
+from . import jobs
+from .membership import membership_cache
+from .models import Project, Contributor, Issue, Comment, Change, Job
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Endpoint:
+    """
+    One timed request: the URL name and method it reports under, the path
+    (formatted with the benchmark ids) and the body.
+
+    `data` may be a function of the benchmark, called before each request.
+    `prepare(benchmark)` creates what a request consumes, such as the row a
+    DELETE removes, and returns extra path values; it is not timed.
+    """
+
+    def __init__(self, name, method, path, data=None, prepare=None, staff=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.prepare = prepare
+        self.staff = staff
+
+    @property
+    def key(self):
+        return f'{self.method} {self.name}'
+
+
+def _issue_data(benchmark):
+    return {
+        'title': f'Issue {benchmark.unique()}', 'description': 'Description ' * 30,
+        'priority': 'HIGH', 'tag': 'BUG', 'status': 'TODO',
+    }
+
+
+def _user_data(benchmark):
+    username = f'benchmark-{benchmark.unique()}'
+    return {'username': username, 'email': f'{username}@example.com', 'password': 'benchmark-password', 'age': 30}
+
+
+def _new_user(benchmark):
+    return {'target': User.objects.create_user(username=f'benchmark-{benchmark.unique()}').pk}
+
+
+def _new_project(benchmark):
+    project = Project.objects.create(
+        title='Deleted', description='Description', type='BACKEND', author=benchmark.user
+    )
+    Contributor.objects.create(user=benchmark.user, project=project)
+    return {'target': project.pk}
+
+
+def _new_contributor(benchmark):
+    user = User.objects.create_user(username=f'benchmark-{benchmark.unique()}')
+    return {'target': Contributor.objects.create(user=user, project_id=benchmark.ids['project']).pk}
+
+
+def _new_issue(benchmark):
+    return {'target': Issue.objects.create(
+        title='Deleted', description='Description', project_id=benchmark.ids['project'], author=benchmark.user
+    ).pk}
+
+
+def _new_comment(benchmark):
+    return {'target': Comment.objects.create(
+        description='Deleted', issue_id=benchmark.ids['issue'], author_id=benchmark.ids['contributor']
+    ).pk}
+
+
+def _recent_changes(benchmark):
+    """
+    Sync token of a client missing the last 100 changes of the project.
+    """
+    last = Change.objects.filter(project_id=benchmark.ids['project']).order_by('-id').values_list('id', flat=True)
+    return {'since': max(last.first() - 100, 0)}
+
+
+def _export_job(benchmark):
+    """
+    Finished export job of the benchmark project, created and run once.
+    """
+    if 'job' not in benchmark.ids:
+        job = jobs.enqueue(
+            Job.EXPORT_PROJECT, {'output': 'ndjson', 'comments': True},
+            user_id=benchmark.user.pk, project_id=benchmark.ids['project']
+        )
+        jobs.run_pending()
+        benchmark.ids['job'] = job.pk
+    return {'job': benchmark.ids['job']}
+
+
+PROJECT = '/api/projects/{project}/'
+ISSUES = PROJECT + 'issues/'
+COMMENTS = ISSUES + '{issue}/comments/'
+ASYNC_PROJECT = '/api/async/projects/{project}/'
+
+# URL names left out of ENDPOINTS: an event stream never completes, so it has no latency.
+UNTIMED_ENDPOINTS = {'project-events'}
+
+# Every other endpoint of users/urls.py and kanban/urls.py, with each method the API uses.
+ENDPOINTS = [
+    Endpoint('api-root', 'GET', '/api/'),
+    Endpoint('user-list', 'GET', '/api/users/'),
+    Endpoint('user-list', 'POST', '/api/users/', data=_user_data),
+    Endpoint('user-detail', 'GET', '/api/users/{user}/'),
+    Endpoint('user-detail', 'PATCH', '/api/users/{user}/', data={'email': 'benchmark@example.com'}),
+    Endpoint('user-detail', 'DELETE', '/api/users/{target}/', prepare=_new_user),
+    Endpoint('register_user', 'POST', '/api/register/', data=_user_data),
+    Endpoint(
+        'user-bulk', 'POST', '/api/users/bulk/',
+        data=lambda benchmark: [_user_data(benchmark) for _ in range(10)], staff=True
+    ),
+    Endpoint('project-list', 'GET', '/api/projects/'),
+    Endpoint('project-list', 'POST', '/api/projects/', data={
+        'title': 'Benchmark', 'description': 'Description', 'type': 'BACKEND',
+    }),
+    Endpoint('project-detail', 'GET', PROJECT),
+    Endpoint('project-detail', 'PATCH', PROJECT, data={'description': 'Updated description'}),
+    Endpoint('project-detail', 'DELETE', '/api/projects/{target}/', prepare=_new_project),
+    Endpoint('project-board', 'GET', PROJECT + 'board/'),
+    Endpoint('project-export', 'GET', PROJECT + 'export/?comments=true'),
+    Endpoint('project-export', 'POST', PROJECT + 'export/?comments=true'),
+    Endpoint('project-rebuild-counters', 'POST', PROJECT + 'rebuild-counters/'),
+    Endpoint('project-changes', 'GET', PROJECT + 'changes/?since={since}', prepare=_recent_changes),
+    Endpoint('project-contributors-list', 'GET', PROJECT + 'contributors/'),
+    Endpoint(
+        'project-contributors-list', 'POST', PROJECT + 'contributors/',
+        data=lambda benchmark: {'user': _new_user(benchmark)['target']},
+    ),
+    Endpoint('project-contributors-detail', 'GET', PROJECT + 'contributors/{contributor}/'),
+    Endpoint('project-contributors-detail', 'DELETE', PROJECT + 'contributors/{target}/', prepare=_new_contributor),
+    Endpoint('project-issues-list', 'GET', ISSUES),
+    Endpoint('project-issues-list', 'POST', ISSUES, data=_issue_data),
+    Endpoint(
+        'project-issues-bulk', 'POST', ISSUES + 'bulk/',
+        data=lambda benchmark: [_issue_data(benchmark) for _ in range(20)],
+    ),
+    Endpoint('project-issues-detail', 'GET', ISSUES + '{issue}/'),
+    Endpoint('project-issues-detail', 'PATCH', ISSUES + '{issue}/', data={'status': 'IN_PROGRESS'}),
+    Endpoint('project-issues-detail', 'DELETE', ISSUES + '{target}/', prepare=_new_issue),
+    Endpoint('issue-comments-list', 'GET', COMMENTS),
+    Endpoint('issue-comments-list', 'POST', COMMENTS, data={'description': 'Comment ' * 20}),
+    Endpoint('issue-comments-detail', 'GET', COMMENTS + '{comment}/'),
+    Endpoint('issue-comments-detail', 'PATCH', COMMENTS + '{comment}/', data={'description': 'Updated comment'}),
+    Endpoint('issue-comments-detail', 'DELETE', COMMENTS + '{target}/', prepare=_new_comment),
+    Endpoint('job-list', 'GET', '/api/jobs/'),
+    Endpoint('job-detail', 'GET', '/api/jobs/{job}/', prepare=_export_job),
+    Endpoint('job-download', 'GET', '/api/jobs/{job}/download/', prepare=_export_job),
+    Endpoint('search', 'GET', '/api/search/?q=erreur%20serveur'),
+    Endpoint('me-issues', 'GET', '/api/me/issues/'),
+    Endpoint('me-activity', 'GET', '/api/me/activity/'),
+    Endpoint('metrics', 'GET', '/api/metrics/', staff=True),
+    Endpoint('async-project-list', 'GET', '/api/async/projects/'),
+    Endpoint('async-project-detail', 'GET', ASYNC_PROJECT),
+    Endpoint('async-project-issues-list', 'GET', ASYNC_PROJECT + 'issues/'),
+    Endpoint('async-project-issues-detail', 'GET', ASYNC_PROJECT + 'issues/{issue}/'),
+    Endpoint('async-issue-comments-list', 'GET', ASYNC_PROJECT + 'issues/{issue}/comments/'),
+    Endpoint('async-issue-comments-detail', 'GET', ASYNC_PROJECT + 'issues/{issue}/comments/{comment}/'),
+]
+
+
+class _QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ApiBenchmark:
+    """
+    Time the ENDPOINTS through the test client against a synthetic dataset,
+    as its first user (who sees every project), with real JWTs.
+
+    Each endpoint is requested `warmup` times untimed, then `requests` times
+    for the latencies and query counts, then `memory_requests` times under
+    tracemalloc, whose overhead would distort the latencies. Caches are
+    cleared before each request unless `warm_cache` is set, so the numbers
+    reflect the work of the code rather than cache hits.
+    """
+
+    def __init__(self, dataset, requests=30, warmup=3, memory_requests=3, warm_cache=False):
+        self.dataset = dataset
+        self.requests = requests
+        self.warmup = warmup
+        self.memory_requests = memory_requests
+        self.warm_cache = warm_cache
+        self.counter = 0
+
+        self.user = dataset.users[0]
+        project = dataset.projects[0]
+        contributor = Contributor.objects.get(user=self.user, project=project)
+        # Rows the PATCH requests modify, owned by the benchmark user.
+        issue = Issue.objects.create(
+            title='Benchmark issue', description='Description ' * 30, project=project, author=self.user
+        )
+        comment = Comment.objects.create(description='Benchmark comment', issue=issue, author=contributor)
+        for number in range(20):
+            Comment.objects.create(description=f'Comment {number}', issue=issue, author=contributor)
+        self.ids = {
+            'user': self.user.pk, 'project': project.pk, 'contributor': contributor.pk,
+            'issue': issue.pk, 'comment': comment.pk,
+        }
+        staff = User.objects.create_user(username='benchmark-staff', is_staff=True)
+        self.authorization = {
+            False: self._authorization(self.user),
+            True: self._authorization(staff),
+        }
+        self.client = APIClient()
+
+    @staticmethod
+    def _authorization(user):
+        return f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+    def request(self, endpoint):
+        """
+        Send one request and return its latency and number of queries.
+        """
+        values = dict(self.ids)
+        if endpoint.prepare:
+            values.update(endpoint.prepare(self))
+        data = endpoint.data(self) if callable(endpoint.data) else endpoint.data
+        path = endpoint.path.format(**values)
+        if not self.warm_cache:
+            cache.clear()
+            membership_cache.clear()
+
+        counter = _QueryCounter()
+        send = getattr(self.client, endpoint.method.lower())
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = send(
+                path, data, format='json', HTTP_AUTHORIZATION=self.authorization[endpoint.staff]
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        if not 200 <= response.status_code < 300:
+            raise BenchmarkError(f"{endpoint.key} {path}: {response.status_code} {response.content[:200]!r}")
+        return elapsed, counter.count
+
+    def measure(self, endpoint):
+        for _ in range(self.warmup):
+            self.request(endpoint)
+        latencies, queries = [], []
+        for _ in range(self.requests):
+            elapsed, count = self.request(endpoint)
+            latencies.append(elapsed)
+            queries.append(count)
+
+        peak = 0
+        if self.memory_requests:
+            tracemalloc.start()
+            try:
+                for _ in range(self.memory_requests):
+                    tracemalloc.reset_peak()
+                    current = tracemalloc.get_traced_memory()[0]
+                    self.request(endpoint)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'queries': statistics.median(queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def run(self, endpoints=ENDPOINTS, on_result=None):
+        results = {}
+        for endpoint in endpoints:
+            results[endpoint.key] = self.measure(endpoint)
+            if on_result:
+                on_result(endpoint, results[endpoint.key])
+        return results
+
+
+def percentile(values, percent):
+    """
+    Return the `percent`th percentile of `values` (nearest rank).
+    """
+    values = sorted(values)
+    rank = max(int(round(percent / 100 * len(values))), 1)
+    return values[rank - 1]
@@ -0,0 +1,73 @@
+from .models import Change, Contributor, Issue, Comment
+
+
+def record_changes(saved=(), deleted=()):
+    """
+    Log issues, comments or contributors as saved or deleted, given as
+    (project id, kind, object id) tuples, with one query.
+    """
+    entries = [
+        Change(project_id=project_id, kind=kind, object_id=str(object_id), deleted=is_deleted)
+        for is_deleted, rows in ((False, saved), (True, deleted))
+        for project_id, kind, object_id in rows
+    ]
+    if entries:
+        Change.objects.bulk_create(entries)
+
+
+def parse_token(value):
+    """
+    Return the change id held by a sync token, 0 for no token, or None if
+    the token is invalid.
+    """
+    if value in (None, ''):
+        return 0
+    return int(value) if value.isdigit() else None
+
+
+def changes_since(project_id, since, limit):
+    """
+    Return the state of what changed in a project after the change `since`:
+    the last change of each object decides whether it is sent as a row or
+    as a tombstone, and rows are read with one query per kind. At most
+    `limit` changes are read; `has_more` tells the client to call again
+    with the returned token.
+
+    Changes are ordered by id, which follows the commit order as long as
+    writes are serialized, as they are on SQLite.
+    """
+    rows = list(
+        Change.objects.filter(project_id=project_id, id__gt=since)
+        .order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for _, kind, object_id, deleted in rows:
+        latest[kind, object_id] = deleted
+    saved = {Change.ISSUE: [], Change.COMMENT: [], Change.CONTRIBUTOR: []}
+    tombstones = {Change.ISSUE: [], Change.COMMENT: [], Change.CONTRIBUTOR: []}
+    for (kind, object_id), deleted in latest.items():
+        (tombstones if deleted else saved)[kind].append(object_id)
+
+    # The ids come from the log of this project, the project filters guard against a mismatch.
+    # An object missing here was deleted after the last change read, its tombstone comes later.
+    querysets = {
+        Change.ISSUE: Issue.objects.filter(project_id=project_id),
+        Change.COMMENT: Comment.objects.filter(issue__project_id=project_id),
+        Change.CONTRIBUTOR: Contributor.objects.filter(project_id=project_id),
+    }
+    objects = {
+        kind: list(querysets[kind].filter(pk__in=ids).order_by('pk')) if ids else []
+        for kind, ids in saved.items()
+    }
+    return {
+        'token': str(rows[-1][0] if rows else since),
+        'has_more': has_more,
+        'objects': objects,
+        'deleted': {
+            kind: ids if kind == Change.COMMENT else [int(pk) for pk in ids] for kind, ids in tombstones.items()
+        },
+    }
@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Project, Contributor, Issue, Comment
+
+
+# Counters are part of the serialized resources, so every adjustment also
+# bumps updated_time to keep ETags and Last-Modified headers accurate.
+def adjust_issue_counts(project_id, deltas):
+    """
+    Apply `deltas`, a mapping of issue status to count change, to the project counters.
+    """
+    changes = {
+        Project.ISSUE_COUNT_FIELDS[status]: F(Project.ISSUE_COUNT_FIELDS[status]) + delta
+        for status, delta in deltas.items()
+        if delta
+    }
+    if changes:
+        Project.objects.filter(pk=project_id).update(updated_time=timezone.now(), **changes)
+
+
+def adjust_contributor_count(project_id, delta):
+    Project.objects.filter(pk=project_id).update(
+        contributor_count=F('contributor_count') + delta, updated_time=timezone.now()
+    )
+
+
+def adjust_comment_count(issue_id, delta):
+    Issue.objects.filter(pk=issue_id).update(comment_count=F('comment_count') + delta, updated_time=timezone.now())
+
+
+def status_transition_deltas(issues):
+    """
+    Return the status deltas of saved issues, from the status each one
+    replaced in the database (`_replaced_status`, read under a row lock).
+    """
+    deltas = Counter()
+    for issue in issues:
+        previous = getattr(issue, '_replaced_status', None)
+        if previous is not None and previous != issue.status:
+            deltas[previous] -= 1
+            deltas[issue.status] += 1
+    return deltas
+
+
+def _count(model, parent_field, **filters):
+    """
+    Correlated subquery counting the `model` rows pointing at the outer row.
+    """
+    subquery = (
+        model.objects.filter(**{parent_field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(parent_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subquery), Value(0))
+
+
+def rebuild_project_counters(project_ids):
+    """
+    Recompute the counters of the given projects from the issue and contributor rows.
+    """
+    counters = {
+        field: _count(Issue, 'project', status=status)
+        for status, field in Project.ISSUE_COUNT_FIELDS.items()
+    }
+    counters['contributor_count'] = _count(Contributor, 'project')
+    with transaction.atomic():
+        return Project.objects.filter(pk__in=project_ids).update(updated_time=timezone.now(), **counters)
+
+
+def rebuild_issue_counters(issue_ids):
+    """
+    Recompute the comment counters of the given issues from the comment rows.
+    """
+    with transaction.atomic():
+        return Issue.objects.filter(pk__in=issue_ids).update(
+            comment_count=_count(Comment, 'issue'), updated_time=timezone.now()
+        )
+
+
+def rebuild_counters(project_ids=None, batch_size=500, on_batch=None):
+    """
+    Recompute the counters of the given projects and their issues, or of all
+    of them, walking the primary keys in keyset batches each rebuilt in its
+    own transaction. Return the number of projects and issues rebuilt;
+    `on_batch(totals)` is called after each batch.
+    """
+    steps = [
+        ('projects', Project.objects.all(), rebuild_project_counters),
+        ('issues', Issue.objects.all(), rebuild_issue_counters),
+    ]
+    totals = {}
+    for name, queryset, rebuild_batch in steps:
+        if project_ids is not None:
+            queryset = queryset.filter(**{'pk__in' if name == 'projects' else 'project_id__in': project_ids})
+        totals[name], last_pk = 0, 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            totals[name] += rebuild_batch(pks)
+            last_pk = pks[-1]
+            if on_batch:
+                on_batch(dict(totals))
+    return totals
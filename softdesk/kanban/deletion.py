@@ -0,0 +1,131 @@
+from django.db import connections, transaction
+
+from . import counters, search
+from .changes import record_changes
+from .models import Project, Contributor, Issue, Comment, Change
+
+
+def _delete_in_batches(queryset, batch_size):
+    """
+    Delete the rows of `queryset` `batch_size` at a time, each batch in its
+    own transaction, yielding the number of rows deleted so far after each
+    batch. No signal is sent.
+
+    Each batch is a single `DELETE ... WHERE id IN (SELECT id ... LIMIT n)`
+    statement, so no row is read into Python and memory does not grow with
+    the number of rows. The subquery reads the table being deleted from,
+    which SQLite and PostgreSQL allow but MySQL does not.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    subquery, params = queryset.order_by().values('pk')[:batch_size].query.sql_with_params()
+    sql = (
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {quote(model._meta.pk.column)} IN ({subquery})'
+    )
+    total = 0
+    while True:
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            deleted = cursor.rowcount
+        total += deleted
+        if deleted:
+            yield total
+        if deleted < batch_size:
+            return
+
+
+def delete_project(project_id, batch_size=1000, on_batch=None):
+    """
+    Delete a project with its comments, issues, contributors and change log
+    in batches, so the database write lock is released between batches
+    instead of being held for the whole cascade. Return the number of rows
+    deleted per model.
+
+    Rows written after their batches ran, by a request that still saw the
+    project, are swept in the transaction deleting the project row, so they
+    cannot make it fail on a foreign key.
+
+    Deletion signals are not sent: the counters, change log and search index
+    entries they maintain belong to the project and go with it.
+    `on_batch(deleted)` is called after each batch with the running totals.
+    """
+    deleted = {}
+    steps = [
+        ('comments', Comment.objects.filter(issue__project_id=project_id)),
+        ('issues', Issue.objects.filter(project_id=project_id)),
+        ('contributors', Contributor.objects.filter(project_id=project_id)),
+        ('changes', Change.objects.filter(project_id=project_id)),
+    ]
+    for name, queryset in steps:
+        deleted[name] = 0
+        for total in _delete_in_batches(queryset, batch_size):
+            deleted[name] = total
+            if on_batch:
+                on_batch(dict(deleted))
+    with transaction.atomic():
+        for name, queryset in steps:
+            deleted[name] += queryset._raw_delete(queryset.db)
+        projects = Project.objects.filter(pk=project_id)
+        deleted['projects'] = projects._raw_delete(projects.db)
+        search.get_backend().remove_project(project_id)
+    if on_batch:
+        on_batch(dict(deleted))
+    return deleted
+
+
+def delete_issue(issue, batch_size=1000):
+    """
+    Delete an issue, its comments first in batches so the deletion collector
+    does not load them all. Return the number of comments deleted.
+
+    The comments go without signals, as they would with the issue: the
+    signals of the issue itself update the counters, change log and search
+    index.
+
+    Each batch commits on its own, so until the issue row is deleted readers
+    see it with part of its comments gone and its comment_count unchanged.
+    If deleting the issue fails, its comment_count is recomputed and the
+    comments the change log still holds as saved are logged as deleted and
+    removed from the search index, before the error is raised again.
+    """
+    comments = 0
+    for comments in _delete_in_batches(Comment.objects.filter(issue_id=issue.pk), batch_size):
+        pass
+    try:
+        issue.delete()
+    except Exception:
+        if comments:
+            _log_vanished_comments(issue, batch_size)
+        raise
+    return comments
+
+
+def _log_vanished_comments(issue, batch_size):
+    """
+    Recompute the comment_count of a remaining issue, and log as deleted the
+    comments of its project that the change log holds as saved but that no
+    longer exist, walking the log `batch_size` entries at a time.
+    """
+    counters.rebuild_issue_counters([issue.pk])
+    logged = Change.objects.filter(project_id=issue.project_id, kind=Change.COMMENT)
+    backend = search.get_backend()
+    last_id = 0
+    while True:
+        rows = list(
+            logged.filter(id__gt=last_id, deleted=False).order_by('id').values_list('id', 'object_id')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        object_ids = {object_id for _, object_id in rows}
+        existing = {str(pk) for pk in Comment.objects.filter(pk__in=object_ids).values_list('pk', flat=True)}
+        tombstoned = set(logged.filter(deleted=True, object_id__in=object_ids).values_list('object_id', flat=True))
+        vanished = sorted(object_ids - existing - tombstoned)
+        record_changes(deleted=[(issue.project_id, Change.COMMENT, object_id) for object_id in vanished])
+        for object_id in vanished:
+            backend.remove_comment(object_id)
+        if len(rows) < batch_size:
+            break
+    record_changes(saved=[(issue.project_id, Change.ISSUE, issue.pk)])
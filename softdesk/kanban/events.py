@@ -0,0 +1,255 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .serializers import IssueSerializer, CommentSerializer
+
+
+class Event:
+    """
+    One event of a project stream. `id` is what clients send back in
+    Last-Event-ID; `sequence` orders the events of the project.
+    The SSE encoding is computed once and shared by every subscriber.
+    """
+    __slots__ = ('id', 'sequence', 'type', 'data', '_encoded')
+
+    def __init__(self, id, sequence, type, data):
+        self.id = id
+        self.sequence = sequence
+        self.type = type
+        self.data = data
+        self._encoded = None
+
+    def encode(self):
+        if self._encoded is None:
+            data = json.dumps(self.data, cls=DjangoJSONEncoder, ensure_ascii=False)
+            self._encoded = f'id: {self.id}\nevent: {self.type}\ndata: {data}\n\n'
+        return self._encoded
+
+
+class EventBroker:
+    """
+    Interface of the project event brokers, selected by KANBAN_EVENT_BROKER.
+
+    publish() is called from any thread once a write has committed.
+    listen() is consumed on the ASGI event loop by the event stream view.
+    A broker shared between processes (Redis pub/sub, PostgreSQL
+    LISTEN/NOTIFY...) implements the same two methods.
+    """
+
+    def publish(self, project_id, event_type, data):
+        raise NotImplementedError
+
+    def listen(self, project_id, last_event_id=None, keepalive=None):
+        """
+        Async iterator of the events of a project published after
+        `last_event_id`, or from now on without one. Yields a `reset` event
+        when the events after `last_event_id` are no longer available, and
+        None after `keepalive` seconds without events.
+        """
+        raise NotImplementedError
+
+
+class _Channel:
+    __slots__ = ('epoch', 'events', 'sequence', 'waiters', 'listeners', 'published')
+
+    def __init__(self, replay_size):
+        # Prefix of the event ids, new for every channel.
+        self.epoch = uuid.uuid4().hex[:8]
+        self.events = deque(maxlen=replay_size)
+        self.sequence = 0
+        # One asyncio.Event per event loop with listeners, set by the next publish.
+        self.waiters = {}
+        self.listeners = 0
+        # time.monotonic() of the last publish.
+        self.published = time.monotonic()
+
+
+class InProcessBroker(EventBroker):
+    """
+    Broker keeping the last KANBAN_EVENT_REPLAY_SIZE events of each project
+    in memory. It only reaches the clients connected to the same process.
+
+    Idle listeners are coroutines parked on one asyncio.Event per project
+    and event loop, so a publish wakes all of them with a single callback
+    whatever their number.
+
+    The channel of a project without listeners is dropped once its last
+    event is older than KANBAN_EVENT_REPLAY_SECONDS, so deleted and idle
+    projects do not keep their events forever. Event ids start with a token
+    of their channel, so ids from a dropped channel or from before a
+    restart are recognized and answered with a reset instead of being
+    mistaken for current ones.
+    """
+
+    def __init__(self, replay_size=None, replay_seconds=None):
+        self.replay_size = replay_size or getattr(settings, 'KANBAN_EVENT_REPLAY_SIZE', 500)
+        self.replay_seconds = replay_seconds or getattr(settings, 'KANBAN_EVENT_REPLAY_SECONDS', 900)
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic() + self.replay_seconds
+
+    def _channel(self, project_id):
+        channel = self._channels.get(project_id)
+        if channel is None:
+            channel = self._channels[project_id] = _Channel(self.replay_size)
+        return channel
+
+    def _prune(self, now):
+        """
+        Drop the channels without listeners whose last event is older than
+        the replay window. Runs under the lock, at most once per window.
+        """
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.replay_seconds
+        expired = [
+            project_id for project_id, channel in self._channels.items()
+            if not channel.listeners and now - channel.published > self.replay_seconds
+        ]
+        for project_id in expired:
+            del self._channels[project_id]
+
+    def publish(self, project_id, event_type, data):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            channel = self._channel(project_id)
+            channel.sequence += 1
+            channel.published = now
+            event = Event(f'{channel.epoch}-{channel.sequence}', channel.sequence, event_type, data)
+            channel.events.append(event)
+            waiters, channel.waiters = channel.waiters, {}
+        for loop, waiter in waiters.items():
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # The loop was closed since its listeners registered.
+                pass
+        return event
+
+    def _position(self, channel, last_event_id):
+        """
+        Return the sequence `last_event_id` points to, or None if it does
+        not come from `channel`.
+        """
+        epoch, _, sequence = (last_event_id or '').partition('-')
+        if epoch != channel.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def _since(self, channel, position):
+        """
+        Return the buffered events after `position`, or None if some of them
+        were already dropped from the buffer.
+        """
+        if position > channel.sequence:
+            return None
+        oldest = channel.events[0].sequence if channel.events else channel.sequence + 1
+        if position < oldest - 1:
+            return None
+        return list(itertools.islice(channel.events, position - oldest + 1, None))
+
+    async def listen(self, project_id, last_event_id=None, keepalive=None):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._prune(time.monotonic())
+            channel = self._channel(project_id)
+            channel.listeners += 1
+            position = self._position(channel, last_event_id)
+        reset = last_event_id is not None and position is None
+        try:
+            while True:
+                with self._lock:
+                    if position is None:
+                        position = channel.sequence
+                    pending = None if reset else self._since(channel, position)
+                    if pending is None:
+                        position = channel.sequence
+                        event = Event(f'{channel.epoch}-{position}', position, 'reset', {'project': project_id})
+                    elif not pending:
+                        waiter = channel.waiters.get(loop)
+                        if waiter is None:
+                            waiter = channel.waiters[loop] = asyncio.Event()
+                if pending is None:
+                    reset = False
+                    yield event
+                elif pending:
+                    for event in pending:
+                        yield event
+                    position = pending[-1].sequence
+                else:
+                    try:
+                        await asyncio.wait_for(waiter.wait(), keepalive)
+                    except TimeoutError:
+                        yield None
+        finally:
+            with self._lock:
+                channel.listeners -= 1
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Return the process-wide broker configured by KANBAN_EVENT_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'KANBAN_EVENT_BROKER', 'kanban.events.InProcessBroker'))()
+    return _broker
+
+
+def publish_on_commit(project_id, event_type, data):
+    """
+    Publish an event once the current transaction commits, so rolled back
+    writes send nothing. A failing broker does not fail the request.
+    """
+    # Issues built by the bulk views hold the project id of the URL, a string.
+    project_id = int(project_id)
+    transaction.on_commit(lambda: get_broker().publish(project_id, event_type, data), robust=True)
+
+
+# Serializers rendering the event payloads, built once per process.
+_serializers = {}
+
+
+def _representation(serializer_class, instance):
+    serializer = _serializers.get(serializer_class)
+    if serializer is None:
+        serializer = _serializers[serializer_class] = serializer_class()
+    return serializer.to_representation(instance)
+
+
+def publish_issue_saved(issue, created=False):
+    """
+    Publish `issue.created`, `issue.status_changed` or `issue.updated` for a
+    saved issue, the previous status being the one its save replaced.
+    """
+    data = _representation(IssueSerializer, issue)
+    previous_status = getattr(issue, '_replaced_status', None)
+    if created:
+        event_type = 'issue.created'
+    elif previous_status is not None and previous_status != issue.status:
+        event_type = 'issue.status_changed'
+        data['previous_status'] = previous_status
+    else:
+        event_type = 'issue.updated'
+    publish_on_commit(issue.project_id, event_type, data)
+
+
+def publish_comment_added(comment, project_id):
+    publish_on_commit(project_id, 'comment.added', _representation(CommentSerializer, comment))
@@ -0,0 +1,91 @@
+import csv
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .fieldsets import values_representation
+from .models import Issue, Comment
+from .serializers import IssueSerializer, CommentSerializer
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_issues(project_id, with_comments=False, chunk_size=500):
+    """
+    Yield the issues of a project as dicts rendered like the API does, with
+    their comments under `comments` if asked.
+
+    Issues are read from a server-side iterator `chunk_size` rows at a time and
+    the comments of each chunk with one query, so memory use depends on the
+    chunk size and not on the size of the project.
+    """
+    render_issue, issue_columns = values_representation(IssueSerializer())
+    render_comment, comment_columns = values_representation(CommentSerializer())
+    rows = (
+        Issue.objects.filter(project_id=project_id).order_by('pk')
+        .values(*issue_columns).iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunks(rows, chunk_size):
+        comments = defaultdict(list)
+        if with_comments:
+            comment_rows = (
+                Comment.objects.filter(issue_id__in=[row['id'] for row in chunk])
+                .order_by('created_time', 'id').values(*comment_columns)
+            )
+            for row in comment_rows:
+                comments[row['issue_id']].append(render_comment(row))
+        for row in chunk:
+            issue = render_issue(row)
+            if with_comments:
+                issue['comments'] = comments[row['id']]
+            yield issue
+
+
+def ndjson_lines(issues):
+    """
+    Render issues as newline-delimited JSON, one issue per line.
+    """
+    for issue in issues:
+        yield json.dumps(issue, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """
+    File-like object handing back what csv.writer writes to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(issues):
+    """
+    Render issues as CSV rows. Comments follow their issue as rows of type
+    `comment`, filling the columns they share with issues plus `issue`.
+    """
+    issue_fields = list(IssueSerializer.Meta.fields)
+    columns = ['type', *issue_fields, 'issue']
+    writer = csv.DictWriter(_Echo(), fieldnames=columns, extrasaction='ignore')
+    yield writer.writeheader()
+    for issue in issues:
+        comments = issue.pop('comments', ())
+        yield writer.writerow({'type': 'issue', **issue})
+        for comment in comments:
+            yield writer.writerow({'type': 'comment', **comment})
+
+
+# Line renderer and content type of each export format.
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+}
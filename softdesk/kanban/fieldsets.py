@@ -0,0 +1,158 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .metrics import timed_serialization
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(request, serializer_class):
+    """
+    Return the field names selected with `?fields=` and `?omit=`, in the
+    serializer's order, or None when the request selects nothing.
+    Raises a ValidationError (400) for names the serializer does not have.
+    `request` is a DRF or a plain Django request.
+    """
+    params = getattr(request, 'query_params', request.GET)
+    fields_param = params.get('fields')
+    omit_param = params.get('omit')
+    if fields_param is None and omit_param is None:
+        return None
+
+    available = list(serializer_class.Meta.fields)
+    errors = {}
+    selected = set(available)
+    for param, value in (('fields', fields_param), ('omit', omit_param)):
+        if value is None:
+            continue
+        names = _split(value)
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = [f"Unknown field(s): {', '.join(unknown)}."]
+        elif param == 'fields':
+            selected &= set(names)
+        else:
+            selected -= set(names)
+    if errors:
+        raise serializers.ValidationError(errors)
+    return [name for name in available if name in selected]
+
+
+def _column(model, field):
+    """
+    Return the model column backing a serializer field, or None if the field
+    is not read straight from a column (method fields, dotted sources...).
+    """
+    try:
+        return model._meta.get_field(field.source).attname
+    except FieldDoesNotExist:
+        return None
+
+
+def field_columns(serializer, field_names=None):
+    """
+    Map the selected fields of a model serializer to their model columns.
+    Returns None if one of them has no column of its own.
+    """
+    model = serializer.Meta.model
+    columns = {}
+    for name, field in serializer.fields.items():
+        if field_names is not None and name not in field_names:
+            continue
+        column = _column(model, field)
+        if column is None:
+            return None
+        columns[name] = column
+    return columns
+
+
+def values_representation(serializer, field_names=None):
+    """
+    Return a function rendering a `.values()` row the way `serializer` renders
+    the matching instance, and the columns the rows must hold, or (None, None)
+    if the serializer has fields that cannot be read from columns.
+
+    Each field's to_representation() is reused so dates, UUIDs and choices
+    render identically; related fields already hold the primary key.
+    """
+    columns = field_columns(serializer, field_names)
+    if columns is None:
+        return None, None
+
+    converters = []
+    for name, column in columns.items():
+        field = serializer.fields[name]
+        if isinstance(field, serializers.RelatedField):
+            converters.append((name, column, None))
+        else:
+            converters.append((name, column, field.to_representation))
+
+    def render(row):
+        data = {}
+        for name, column, convert in converters:
+            value = row[column]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    return render, list(columns.values())
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin for sparse fieldsets and lean list rendering.
+
+    On list and retrieve, `?fields=a,b` keeps only the listed fields and
+    `?omit=c` drops fields. The unused columns are deferred with `.only()`, so
+    long descriptions are neither read nor rendered when they are not asked for.
+
+    With `values_list = True`, list pages are read with `.values()` and
+    rendered from the rows directly, skipping model instances and the
+    ModelSerializer machinery while producing the same output.
+    """
+    values_list = True
+    # Columns every read needs: the cursor ordering and the conditional GET version.
+    required_columns = ('id', 'created_time', 'updated_time')
+
+    def _with_required_columns(self, columns):
+        return list(dict.fromkeys([*self.required_columns, *columns]))
+
+    def get_fieldset(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = parse_fieldset(self.request, self.get_serializer_class())
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        field_names = self.get_fieldset()
+        if field_names is None:
+            return queryset
+        columns = field_columns(self.get_serializer(), field_names)
+        if columns is None:
+            return queryset
+        return queryset.only(*self._with_required_columns(columns.values()))
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_list:
+            return super().list(request, *args, **kwargs)
+        render, columns = values_representation(self.get_serializer(), self.get_fieldset())
+        if render is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*self._with_required_columns(columns))
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        with timed_serialization():
+            data = [render(row) for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,312 @@
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import changes, counters, search
+from .models import Project, Contributor, Issue, Comment, Change
+
+
+# Models are inserted in this order within a batch so references to rows of
+# the same batch are resolved.
+MODEL_ORDER = ['users.user', 'kanban.project', 'kanban.contributor', 'kanban.issue', 'kanban.comment']
+
+# Models other rows refer to, whose source pks are mapped to the new ones.
+REFERENCED_MODELS = ['users.user', 'kanban.project', 'kanban.contributor', 'kanban.issue']
+
+USER_FIELDS = {
+    'username', 'email', 'first_name', 'last_name', 'password', 'age',
+    'can_be_contacted', 'can_data_be_shared', 'is_active', 'date_joined',
+}
+
+# Recomputed from the imported rows once each batch is written.
+COUNTER_FIELDS = {'comment_count', 'contributor_count', *Project.ISSUE_COUNT_FIELDS.values()}
+
+
+class ImportRowError(Exception):
+    pass
+
+
+@contextmanager
+def keep_created_time():
+    """
+    Let bulk_create write the created_time of the dump instead of the current
+    time set by auto_now_add.
+    """
+    fields = [model._meta.get_field('created_time') for model in (Project, Contributor, Issue, Comment)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Checkpoint:
+    """
+    Append-only log of the imported batches: the last line of each batch and
+    the source to new pk mappings it created.
+
+    An entry is written just before its batch commits. On load, the last
+    entry is dropped if the last row it records is missing from the database,
+    so a crash between the two writes neither skips nor duplicates rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.line = 0
+        self.ids = {label: {} for label in REFERENCED_MODELS}
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path) as file:
+            entries = [json.loads(line) for line in file if line.strip()]
+        if entries and not self._committed(entries[-1]):
+            entries.pop()
+            with open(self.path, 'w') as file:
+                file.writelines(json.dumps(entry) + '\n' for entry in entries)
+        for entry in entries:
+            self.line = entry['line']
+            for label, ids in entry['ids'].items():
+                self.ids[label].update(ids)
+
+    @staticmethod
+    def _committed(entry):
+        if entry['last'] is None:
+            return True
+        label, pk = entry['last']
+        return apps.get_model(label).objects.filter(pk=pk).exists()
+
+    def save(self, line, new_ids, last):
+        self.line = line
+        if not self.path:
+            return
+        with open(self.path, 'a') as file:
+            file.write(json.dumps({'line': line, 'ids': new_ids, 'last': last}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class SoftdeskImporter:
+    """
+    Import users, projects, contributors, issues and comments from an NDJSON
+    dump in the format of `dumpdata --format jsonl`:
+
+        {"model": "kanban.issue", "pk": 12, "fields": {"project": 3, "author": 7, ...}}
+
+    Foreign keys hold source pks, resolved through in-memory maps of the rows
+    imported so far. Rows are read `batch_size` at a time and each batch is
+    written with one bulk_create per model in its own transaction, followed
+    by the counters and search index of the rows it touched. Users whose
+    username already exists are mapped to the existing account.
+
+    Invalid rows and rows referring to skipped rows are skipped and reported
+    through `on_error(line, message)`.
+    """
+
+    def __init__(self, checkpoint, batch_size=1000, on_error=None):
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.on_error = on_error or (lambda line, message: None)
+        self.imported = 0
+        self.skipped = 0
+
+    def run(self, lines, on_batch=None):
+        """
+        Import the lines of an NDJSON file, resuming after the checkpoint.
+        """
+        self.checkpoint.load()
+        batch = []
+        for number, line in enumerate(lines, start=1):
+            if number <= self.checkpoint.line or not line.strip():
+                continue
+            batch.append((number, line))
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                batch = []
+                if on_batch:
+                    on_batch(self)
+        if batch:
+            self.import_batch(batch)
+            if on_batch:
+                on_batch(self)
+
+    def import_batch(self, lines):
+        groups = defaultdict(list)
+        for number, line in lines:
+            try:
+                record = json.loads(line)
+                label = record['model']
+                if label not in MODEL_ORDER:
+                    raise ImportRowError(f"unknown model {label!r}")
+                groups[label].append((number, record['pk'], record.get('fields', {})))
+            except (ValueError, KeyError, TypeError, ImportRowError) as exc:
+                self._skip(number, exc)
+
+        new_ids = {label: {} for label in REFERENCED_MODELS}
+        last = None
+        with transaction.atomic(), keep_created_time():
+            created = {}
+            for label in MODEL_ORDER:
+                if groups[label]:
+                    created[label] = getattr(self, f"_import_{label.split('.')[1]}")(groups[label], new_ids)
+                    if created[label]:
+                        last = [label, str(created[label][-1].pk)]
+            self._update_derived_data(created)
+            self.checkpoint.save(lines[-1][0], new_ids, last)
+
+    def _skip(self, number, error):
+        self.skipped += 1
+        self.on_error(number, str(error))
+
+    def _resolve(self, label, source_pk, field_name):
+        pk = self.checkpoint.ids[label].get(str(source_pk))
+        if pk is None:
+            raise ImportRowError(f"{field_name} refers to unknown {label} {source_pk!r}")
+        return pk
+
+    def _build(self, model, rows, allowed=None):
+        """
+        Build and validate model instances from the rows of one model, with
+        their foreign keys resolved. Invalid rows are skipped.
+        """
+        foreign_keys = {
+            field.name: field.related_model._meta.label_lower
+            for field in model._meta.concrete_fields if isinstance(field, models.ForeignKey)
+        }
+        columns = {field.attname for field in model._meta.concrete_fields} - {'id'}
+        now = timezone.now()
+        built = []
+        for number, source_pk, fields in rows:
+            try:
+                values = {}
+                for name, value in fields.items():
+                    if name in foreign_keys:
+                        if value is not None:
+                            values[f'{name}_id'] = self._resolve(foreign_keys[name], value, name)
+                    elif (allowed is None or name in allowed) and name not in COUNTER_FIELDS:
+                        values[name] = value
+                instance = model(**{key: value for key, value in values.items() if key in columns})
+                if hasattr(instance, 'created_time') and instance.created_time is None:
+                    instance.created_time = now
+                instance.full_clean(
+                    exclude=list(foreign_keys), validate_unique=False, validate_constraints=False
+                )
+                missing = [name for name in foreign_keys
+                           if not model._meta.get_field(name).null and getattr(instance, f'{name}_id') is None]
+                if missing:
+                    raise ImportRowError(f"missing {', '.join(missing)}")
+            except (ValidationError, ImportRowError, TypeError, ValueError) as exc:
+                self._skip(number, exc)
+                continue
+            built.append((number, source_pk, instance))
+        return self._skip_duplicates(model, built)
+
+    def _skip_duplicates(self, model, built):
+        """
+        Skip the rows whose unique_together values are already taken, by a
+        row in the database or an earlier row of the batch, which
+        full_clean() does not check.
+        """
+        for names in model._meta.unique_together:
+            columns = [model._meta.get_field(name).attname for name in names]
+            keys = [tuple(getattr(instance, column) for column in columns) for _, _, instance in built]
+            lookups = {f'{column}__in': {key[i] for key in keys} for i, column in enumerate(columns)}
+            taken = set(model.objects.filter(**lookups).values_list(*columns)) if keys else set()
+            kept = []
+            for row, key in zip(built, keys):
+                if key in taken:
+                    self._skip(row[0], f"{model._meta.label_lower} with this {', '.join(names)} already exists")
+                    continue
+                taken.add(key)
+                kept.append(row)
+            built = kept
+        return built
+
+    def _insert(self, label, model, built, new_ids):
+        instances = model.objects.bulk_create([instance for _, _, instance in built])
+        if label in new_ids:
+            for (_, source_pk, _), instance in zip(built, instances):
+                new_ids[label][str(source_pk)] = instance.pk
+                self.checkpoint.ids[label][str(source_pk)] = instance.pk
+        self.imported += len(instances)
+        return instances
+
+    def _import_user(self, rows, new_ids):
+        User = apps.get_model('users', 'User')
+        for _, _, fields in rows:
+            if not fields.get('password'):
+                # Accounts without a password hash must reset their password.
+                fields['password'] = make_password(None)
+        built = []
+        for number, source_pk, user in self._build(User, rows, allowed=USER_FIELDS):
+            if user.age is not None and user.age < 15:
+                self._skip(number, "Users less than 15 years old can't subscribe.")
+                continue
+            built.append((number, source_pk, user))
+
+        existing = dict(
+            User.objects.filter(username__in=[user.username for _, _, user in built]).values_list('username', 'pk')
+        )
+        for _, source_pk, user in built:
+            if user.username in existing:
+                new_ids['users.user'][str(source_pk)] = existing[user.username]
+                self.checkpoint.ids['users.user'][str(source_pk)] = existing[user.username]
+        return self._insert(
+            'users.user', User, [row for row in built if row[2].username not in existing], new_ids
+        )
+
+    def _import_project(self, rows, new_ids):
+        return self._insert('kanban.project', Project, self._build(Project, rows), new_ids)
+
+    def _import_contributor(self, rows, new_ids):
+        return self._insert('kanban.contributor', Contributor, self._build(Contributor, rows), new_ids)
+
+    def _import_issue(self, rows, new_ids):
+        return self._insert('kanban.issue', Issue, self._build(Issue, rows), new_ids)
+
+    def _import_comment(self, rows, new_ids):
+        return self._insert('kanban.comment', Comment, self._build(Comment, rows), new_ids)
+
+    def _update_derived_data(self, created):
+        """
+        bulk_create sends no signal: rebuild the counters of the touched
+        projects and issues, index the new issues and comments and log the
+        new rows for the sync clients.
+        """
+        issues = created.get('kanban.issue', [])
+        comments = created.get('kanban.comment', [])
+        project_ids = {project.pk for project in created.get('kanban.project', [])}
+        project_ids |= {row.project_id for row in [*created.get('kanban.contributor', []), *issues]}
+        if project_ids:
+            counters.rebuild_project_counters(project_ids)
+        if comments:
+            counters.rebuild_issue_counters({comment.issue_id for comment in comments})
+
+        backend = search.get_backend()
+        if issues:
+            backend.index_issues(issues)
+        if comments:
+            issue_projects = dict(
+                Issue.objects.filter(pk__in={comment.issue_id for comment in comments})
+                .values_list('pk', 'project_id')
+            )
+            for comment in comments:
+                comment.project_id = issue_projects[comment.issue_id]
+            backend.index_comments(comments)
+
+        # The comment_count of the issues of new comments changed too.
+        changes.record_changes(saved=dict.fromkeys([
+            *((row.project_id, Change.CONTRIBUTOR, row.pk) for row in created.get('kanban.contributor', [])),
+            *((issue.project_id, Change.ISSUE, issue.pk) for issue in issues),
+            *((comment.project_id, Change.ISSUE, comment.issue_id) for comment in comments),
+            *((comment.project_id, Change.COMMENT, comment.pk) for comment in comments),
+        ]))
@@ -0,0 +1,181 @@
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import counters, deletion, export
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job functions by kind, called as function(job, checkpoint) and returning the job result.
+_handlers = {}
+
+
+class LeaseLost(Exception):
+    """
+    The lease of the job expired and another worker took it over.
+    """
+
+
+def handler(kind):
+    def register(function):
+        _handlers[kind] = function
+        return function
+    return register
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'KANBAN_JOB_LEASE_SECONDS', 300))
+
+
+def _batch_size(job):
+    return job.params.get('batch_size') or getattr(settings, 'KANBAN_JOB_BATCH_SIZE', 1000)
+
+
+def enqueue(kind, params=None, user_id=None, project_id=None):
+    return Job.objects.create(kind=kind, params=params or {}, user_id=user_id, project_id=project_id)
+
+
+def pending(kind, project_id):
+    """
+    Return the queued or running `kind` job of a project, if any.
+    """
+    return Job.objects.filter(kind=kind, project_id=project_id, status__in=[Job.QUEUED, Job.RUNNING]).first()
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker):
+    """
+    Take the oldest job ready to run, or a running one whose lease expired,
+    and return it, or None. The claim is a conditional UPDATE, so two
+    workers never get the same job even without row locks, as on SQLite.
+    Each claim gets its own token in `job.worker`, which fences the updates
+    of a worker that lost its lease.
+    """
+    now = timezone.now()
+    ready = (
+        Job.objects.filter(Q(status=Job.QUEUED, run_after__lte=now) | Q(status=Job.RUNNING, lease_expires__lt=now))
+        .order_by('run_after', 'created_time')
+        .values_list('pk', 'status', 'lease_expires')[:10]
+    )
+    for pk, status, lease_expires in ready:
+        token = f'{worker}/{uuid.uuid4().hex[:8]}'
+        claimed = Job.objects.filter(pk=pk, status=status, lease_expires=lease_expires).update(
+            status=Job.RUNNING, worker=token, attempts=F('attempts') + 1,
+            lease_expires=now + _lease(), started_time=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _update(job, **fields):
+    """
+    Update a claimed job, unless another worker took it over.
+    """
+    if not Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(**fields):
+        raise LeaseLost(f"Job {job.pk} was taken over by another worker.")
+
+
+def checkpoint(job, progress):
+    """
+    Record the progress of a job and renew its lease; handlers call it after
+    each batch. Raises LeaseLost if the job was taken over.
+    """
+    _update(job, progress=progress, lease_expires=timezone.now() + _lease())
+
+
+def _finish(job, **fields):
+    try:
+        _update(job, lease_expires=None, **fields)
+    except LeaseLost as exc:
+        logger.warning("%s", exc)
+
+
+def run(pk):
+    """
+    Run a claimed job and record its result. A failed job is queued again
+    after a delay doubling with each attempt, up to KANBAN_JOB_MAX_ATTEMPTS.
+    """
+    job = Job.objects.get(pk=pk)
+    try:
+        result = _handlers[job.kind](job, lambda progress: checkpoint(job, progress))
+    except LeaseLost as exc:
+        logger.warning("%s", exc)
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        error = f'{type(exc).__name__}: {exc}'
+        now = timezone.now()
+        if job.attempts < getattr(settings, 'KANBAN_JOB_MAX_ATTEMPTS', 3):
+            delay = getattr(settings, 'KANBAN_JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+            _finish(job, status=Job.QUEUED, error=error, run_after=now + timedelta(seconds=delay))
+        else:
+            _finish(job, status=Job.FAILED, error=error, finished_time=now)
+    else:
+        _finish(job, status=Job.SUCCEEDED, result=result, finished_time=timezone.now())
+
+
+def run_pending(worker=None):
+    """
+    Run the jobs ready to run in this process until none is left, and return
+    their number. Used by `run_jobs --processes 0` and the tests.
+    """
+    worker = worker or worker_name()
+    count = 0
+    while (job := claim(worker)) is not None:
+        run(job.pk)
+        count += 1
+    return count
+
+
+def export_path(job):
+    return os.path.join(settings.KANBAN_JOB_EXPORT_DIR, f"{job.pk}.{job.params.get('output', 'ndjson')}")
+
+
+@handler(Job.DELETE_PROJECT)
+def _delete_project(job, checkpoint):
+    return deletion.delete_project(job.project_id, _batch_size(job), on_batch=checkpoint)
+
+
+@handler(Job.REBUILD_COUNTERS)
+def _rebuild_counters(job, checkpoint):
+    return counters.rebuild_counters(job.params.get('project_ids'), _batch_size(job), on_batch=checkpoint)
+
+
+@handler(Job.EXPORT_PROJECT)
+def _export_project(job, checkpoint):
+    """
+    Write the export to KANBAN_JOB_EXPORT_DIR, renamed into place once complete.
+    """
+    output = job.params.get('output', 'ndjson')
+    render_lines, content_type = export.FORMATS[output]
+    batch_size = _batch_size(job)
+    exported = 0
+
+    def counted(issues):
+        nonlocal exported
+        for issue in issues:
+            yield issue
+            exported += 1
+            if exported % batch_size == 0:
+                checkpoint({'issues': exported})
+
+    path = export_path(job)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    issues = export.iter_issues(job.project_id, job.params.get('comments', False), chunk_size=batch_size)
+    with open(f'{path}.partial', 'w', encoding='utf-8', newline='') as file:
+        file.writelines(render_lines(counted(issues)))
+    os.replace(f'{path}.partial', path)
+    return {
+        'issues': exported, 'content_type': content_type,
+        'filename': f'project-{job.project_id}-issues.{output}',
+    }
@@ -0,0 +1,112 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment
+
+from kanban.benchmark import ENDPOINTS, ApiBenchmark, BenchmarkError
+from kanban.synthetic import generate_dataset
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset and time every endpoint of users/urls.py and "
+        "kanban/urls.py through the test client. Writes p50/p95 latency, queries per "
+        "request and peak memory as JSON with sorted keys, so the files of two commits "
+        "can be diffed or compared with --compare. Benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--contributors', type=int, default=10, help="Contributors per project.")
+        parser.add_argument('--issues', type=int, default=100, help="Issues per project.")
+        parser.add_argument('--comments', type=int, default=5, help="Average comments per issue.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=30, help="Timed requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--memory-requests', type=int, default=3)
+        parser.add_argument('--warm-cache', action='store_true', help="Keep the caches between requests.")
+        parser.add_argument('--only', help="Comma-separated URL names to run.")
+        parser.add_argument('--output', help="JSON file to write (default: standard output).")
+        parser.add_argument('--compare', help="JSON file of a previous run to compare with.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        endpoints = ENDPOINTS
+        if options['only']:
+            names = set(options['only'].split(','))
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.name in names]
+        scale = {name: options[name] for name in ('users', 'projects', 'contributors', 'issues', 'comments', 'seed')}
+
+        with transaction.atomic():
+            dataset = generate_dataset(**scale)
+            benchmark = ApiBenchmark(
+                dataset, requests=options['requests'], warmup=options['warmup'],
+                memory_requests=options['memory_requests'], warm_cache=options['warm_cache'],
+            )
+            try:
+                results = benchmark.run(endpoints, on_result=self.progress)
+            except BenchmarkError as exc:
+                raise CommandError(str(exc))
+            finally:
+                transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'scale': scale,
+                'dataset': dataset.counts(),
+                'requests': options['requests'],
+                'warm_cache': options['warm_cache'],
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True) + '\n'
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output, ending='')
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file), report)
+
+    def progress(self, endpoint, result):
+        self.stderr.write(
+            f"{endpoint.key:<36} p50 {result['p50_ms']:8.2f} ms   p95 {result['p95_ms']:8.2f} ms   "
+            f"{result['queries']:5g} queries   {result['peak_memory_kib']:8.1f} KiB"
+        )
+
+    def compare(self, baseline, report):
+        """
+        Print the change of each metric from `baseline` to `report`.
+        """
+        self.stderr.write(f"\nCompared with {baseline['meta'].get('commit')}:")
+        for key, result in sorted(report['endpoints'].items()):
+            before = baseline['endpoints'].get(key)
+            if before is None:
+                self.stderr.write(f"{key:<36} new")
+                continue
+            changes = []
+            for metric in ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kib'):
+                old, new = before[metric], result[metric]
+                change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+                changes.append(f"{metric} {old:g} -> {new:g} ({change})")
+            self.stderr.write(f"{key:<36} " + '   '.join(changes))
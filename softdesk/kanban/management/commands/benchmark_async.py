@@ -0,0 +1,141 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from kanban.models import Comment, Contributor, Issue, Project
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the issue list and detail endpoints with concurrent in-process "
+        "requests: DRF through softdesk.wsgi, DRF through softdesk.asgi and the "
+        "native async views through softdesk.asgi. Benchmark data is committed "
+        "(other threads must see it) and deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        from softdesk.asgi import application as asgi_application
+        from softdesk.wsgi import application as wsgi_application
+
+        user = User.objects.create_user(username='benchmark-async')
+        try:
+            project = Project.objects.create(title='Benchmark', description='Benchmark', type='BACKEND', author=user)
+            contributor = Contributor.objects.create(user=user, project=project)
+            issues = Issue.objects.bulk_create(
+                Issue(title=f'Issue {i}', description='Description ' * 20, project=project, author=user)
+                for i in range(options['issues'])
+            )
+            Comment.objects.bulk_create(
+                Comment(description='Comment', issue=issue, author=contributor) for issue in issues[:50]
+            )
+            authorization = f'Bearer {AccessToken.for_user(user)}'
+            issues_path = f'projects/{project.id}/issues/'
+            detail_path = f'{issues_path}{issues[0].id}/'
+
+            scenarios = [
+                ('list', 'WSGI  DRF viewset', wsgi_application, f'/api/{issues_path}'),
+                ('list', 'ASGI  DRF viewset', asgi_application, f'/api/{issues_path}'),
+                ('list', 'ASGI  async view', asgi_application, f'/api/async/{issues_path}'),
+                ('detail', 'WSGI  DRF viewset', wsgi_application, f'/api/{detail_path}'),
+                ('detail', 'ASGI  DRF viewset', asgi_application, f'/api/{detail_path}'),
+                ('detail', 'ASGI  async view', asgi_application, f'/api/async/{detail_path}'),
+            ]
+            for self.run_id, (endpoint, name, application, path) in enumerate(scenarios):
+                args = (application, path, authorization, options['requests'], options['concurrency'])
+                if application is wsgi_application:
+                    elapsed, latencies = self.run_wsgi(*args)
+                else:
+                    elapsed, latencies = asyncio.run(self.run_asgi(*args))
+                self.report(endpoint, name, options['requests'], elapsed, latencies)
+        finally:
+            user.delete()
+
+    def report(self, endpoint, name, requests, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{endpoint:<7} {name:<18} {requests / elapsed:8.1f} req/s   "
+            f"p50 {statistics.median(latencies) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms"
+        )
+
+    def query_string(self, number):
+        # Query strings unique across scenarios keep the response cache from serving the lists.
+        return f'page_size=50&n={self.run_id}-{number}'
+
+    def run_wsgi(self, application, path, authorization, requests, concurrency):
+        def call(number):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': self.query_string(number),
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+                'HTTP_AUTHORIZATION': authorization, 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            start = time.perf_counter()
+            response = application(environ, lambda status_line, headers: status.append(status_line))
+            b''.join(response)
+            response.close()
+            assert status[0].startswith('200'), status[0]
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(call, range(requests)))
+        return time.perf_counter() - start, latencies
+
+    async def run_asgi(self, application, path, authorization, requests, concurrency):
+        async def call(number):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'root_path': '', 'raw_path': path.encode(),
+                'query_string': self.query_string(number).encode(),
+                'headers': [(b'host', b'testserver'), (b'authorization', authorization.encode())],
+                'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+            }
+            received, disconnect = False, asyncio.Event()
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            status = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            disconnect.set()
+            assert status[0] == 200, status[0]
+            return time.perf_counter() - start
+
+        pending = iter(range(requests))
+        latencies = []
+
+        async def worker():
+            for number in pending:
+                latencies.append(await call(number))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from kanban.models import Contributor, Issue, Project
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bytes and CPU time per poll of the issue list with and without "
+        "If-None-Match. Benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100)
+        parser.add_argument('--polls', type=int, default=500)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-conditional')
+            project = Project.objects.create(
+                title='Benchmark', description='Benchmark', type='BACKEND', author=user
+            )
+            Contributor.objects.create(user=user, project=project)
+            Issue.objects.bulk_create(
+                Issue(title=f'Issue {i}', description='Description ' * 20, project=project, author=user)
+                for i in range(options['issues'])
+            )
+
+            client = APIClient()
+            client.force_authenticate(user)
+            url = f"/api/projects/{project.id}/issues/?page_size={options['issues']}"
+            etag = client.get(url)['ETag']
+
+            full = self.measure(client, url, options['polls'], 200)
+            conditional = self.measure(client, url, options['polls'], 304, HTTP_IF_NONE_MATCH=etag)
+            transaction.set_rollback(True)
+
+        for name, (size, cpu) in (('Full GET', full), ('Conditional GET', conditional)):
+            self.stdout.write(f"{name}: {size} bytes, {cpu * 1000:.2f} ms CPU per poll")
+        self.stdout.write(
+            f"Saved per poll: {full[0] - conditional[0]} bytes, {(full[1] - conditional[1]) * 1000:.2f} ms CPU"
+        )
+
+    def measure(self, client, url, polls, expected_status, **headers):
+        """
+        Return the body size and the average CPU time of `polls` requests.
+        """
+        start = time.process_time()
+        for _ in range(polls):
+            response = client.get(url, **headers)
+        cpu = (time.process_time() - start) / polls
+        assert response.status_code == expected_status, response.status_code
+        return len(response.content), cpu
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from kanban.models import Contributor, Issue, Project
+from kanban.views import IssueViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time per request of the issue list rendered through the "
+        "ModelSerializer and from .values() rows, with all fields and with a "
+        "board fieldset. Benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-serialization')
+            project = Project.objects.create(
+                title='Benchmark', description='Benchmark', type='BACKEND', author=user
+            )
+            Contributor.objects.create(user=user, project=project)
+            Issue.objects.bulk_create(
+                Issue(title=f'Issue {i}', description='Description ' * 100, project=project, author=user,
+                      assignee=user)
+                for i in range(options['issues'])
+            )
+
+            client = APIClient()
+            client.force_authenticate(user)
+            url = f"/api/projects/{project.id}/issues/?page_size={options['issues']}"
+            results = {}
+            for label, query in (('all fields', ''), ('board fields', '&fields=id,title,status,assignee')):
+                for path, values_list in (('ModelSerializer', False), ('values()', True)):
+                    IssueViewSet.values_list = values_list
+                    try:
+                        results[label, path] = self.measure(client, url + query, options['requests'])
+                    finally:
+                        del IssueViewSet.values_list
+            transaction.set_rollback(True)
+
+        for (label, path), (size, elapsed) in results.items():
+            self.stdout.write(f"{label:<13} {path:<16} {size:>8} bytes {elapsed * 1000:8.2f} ms per request")
+        for label in ('all fields', 'board fields'):
+            speedup = results[label, 'ModelSerializer'][1] / results[label, 'values()'][1]
+            self.stdout.write(f"{label}: values() path is {speedup:.1f}x faster")
+
+    def measure(self, client, url, requests):
+        """
+        Return the body size and the average wall time of `requests` requests.
+        The response cache is bypassed by making every URL unique.
+        """
+        start = time.perf_counter()
+        for i in range(requests):
+            response = client.get(f'{url}&_={i}-{time.perf_counter_ns()}')
+        elapsed = (time.perf_counter() - start) / requests
+        assert response.status_code == 200, response.status_code
+        return len(response.content), elapsed
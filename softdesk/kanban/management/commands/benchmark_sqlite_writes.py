@@ -0,0 +1,127 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import F
+
+from kanban.models import Comment, Contributor, Issue, Project
+from softdesk.database import database_settings
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent writers (issue and comment creation with their counter "
+        "updates) and readers against a fresh SQLite file, with the default "
+        "settings and with the tuned SQLite mode (DB_SQLITE_TUNED). Reports "
+        "committed writes per second, lock errors and read latencies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5, help="Seconds per mode.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, environ in (('default', {}), ('tuned', {'DB_SQLITE_TUNED': 'true'})):
+                path = os.path.join(directory, f'{name}.sqlite3')
+                alias = f'benchmark_sqlite_{name}'
+                config = database_settings({**environ, 'DB_NAME': path}, directory)[DEFAULT_DB_ALIAS]
+                connections.settings[alias] = connections.configure_settings(
+                    {DEFAULT_DB_ALIAS: config}
+                )[DEFAULT_DB_ALIAS]
+                try:
+                    call_command('migrate', database=alias, verbosity=0, interactive=False)
+                    self.report(name, *self.run(alias, options))
+                finally:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+
+    def run(self, alias, options):
+        # bulk_create sends no signal, so nothing is written to the default database.
+        user = User.objects.using(alias).bulk_create(
+            [User(username='benchmark-sqlite', password=make_password(None))]
+        )[0]
+        project = Project.objects.using(alias).bulk_create(
+            [Project(title='Benchmark', description='Benchmark', type='BACKEND', author=user)]
+        )[0]
+        contributor = Contributor.objects.using(alias).bulk_create([Contributor(user=user, project=project)])[0]
+        issue = Issue.objects.using(alias).bulk_create(
+            [Issue(title='Issue', description='Description', project=project, author=user)]
+        )[0]
+        connections[alias].close()
+
+        writes, errors, latencies = [], [], []
+        deadline = time.perf_counter() + options['duration']
+
+        def write(number):
+            # Same shape as the issue and comment endpoints: read, insert, then
+            # update the denormalized counters in one transaction.
+            with transaction.atomic(using=alias):
+                Project.objects.using(alias).get(pk=project.pk)
+                if number % 2:
+                    Issue.objects.using(alias).bulk_create([Issue(
+                        title=f'Issue {number}', description='Description ' * 20, project=project, author=user
+                    )])
+                    Project.objects.using(alias).filter(pk=project.pk).update(
+                        todo_issue_count=F('todo_issue_count') + 1
+                    )
+                else:
+                    Comment.objects.using(alias).bulk_create(
+                        [Comment(description='Comment ' * 20, issue=issue, author=contributor)]
+                    )
+                    Issue.objects.using(alias).filter(pk=issue.pk).update(comment_count=F('comment_count') + 1)
+
+        def writer():
+            number = 0
+            try:
+                while time.perf_counter() < deadline:
+                    number += 1
+                    try:
+                        write(number)
+                    except OperationalError as exc:
+                        errors.append(str(exc))
+                    else:
+                        writes.append(number)
+            finally:
+                connections[alias].close()
+
+        def reader():
+            try:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        list(Issue.objects.using(alias).filter(project=project).order_by('-id')[:50])
+                    except OperationalError as exc:
+                        errors.append(str(exc))
+                    else:
+                        latencies.append(time.perf_counter() - start)
+            finally:
+                connections[alias].close()
+
+        threads = [threading.Thread(target=writer) for _ in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(writes) / (time.perf_counter() - start), errors, latencies
+
+    def report(self, name, throughput, errors, latencies):
+        latencies = sorted(latencies) or [0]
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{name:<8} {throughput:8.1f} writes/s   {len(errors):5d} lock errors   "
+            f"reads p50 {statistics.median(latencies) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms"
+        )
+        for message in sorted(set(errors)):
+            self.stdout.write(f"         {errors.count(message)} x {message}")
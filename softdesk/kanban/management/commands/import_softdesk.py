@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban.importer import Checkpoint, SoftdeskImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users, projects, contributors, issues and comments from an NDJSON dump "
+        "(dumpdata --format jsonl) in batches. With --checkpoint, an interrupted import "
+        "resumes after the last committed batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to import.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint', help="File recording the committed batches, to resume from.")
+        parser.add_argument('--max-errors', type=int, default=20, help="Skipped rows to report in detail.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.reported = 0
+        self.max_errors = options['max_errors']
+        importer = SoftdeskImporter(
+            Checkpoint(options['checkpoint']), batch_size=options['batch_size'], on_error=self.report_error
+        )
+        self.start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8') as file:
+                importer.run(file, on_batch=self.report_progress)
+        except OSError as exc:
+            raise CommandError(exc)
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.imported} rows in {elapsed:.1f}s "
+            f"({importer.imported / elapsed if elapsed else 0:.0f} rows/s), skipped {importer.skipped}."
+        ))
+
+    def report_error(self, line, message):
+        self.reported += 1
+        if self.reported <= self.max_errors:
+            self.stderr.write(f"Line {line} skipped: {message}")
+
+    def report_progress(self, importer):
+        if self.verbosity < 1:
+            return
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            f"Line {importer.checkpoint.line}: {importer.imported} rows imported, "
+            f"{importer.imported / elapsed if elapsed else 0:.0f} rows/s"
+        )
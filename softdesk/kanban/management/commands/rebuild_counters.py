@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from kanban import jobs
+from kanban.counters import rebuild_counters
+from kanban.models import Job
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized issue, comment and contributor counters in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--project', type=int, action='append', dest='projects', help="Only this project.")
+        parser.add_argument('--queue', action='store_true', help="Queue a job for the run_jobs worker instead.")
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            job = jobs.enqueue(
+                Job.REBUILD_COUNTERS, {'project_ids': options['projects'], 'batch_size': options['batch_size']}
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        totals = rebuild_counters(options['projects'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt counters of {totals['projects']} projects and {totals['issues']} issues."
+        ))
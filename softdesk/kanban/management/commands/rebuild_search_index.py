@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kanban.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reindex every issue and comment in batches and drop the entries of deleted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = get_backend().rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} issues and comments in {elapsed:.1f}s."))
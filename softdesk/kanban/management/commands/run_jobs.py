@@ -0,0 +1,83 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from kanban import jobs
+from kanban.workers import setup_process
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the queued background jobs (project deletions, exports, counter rebuilds) "
+        "in a pool of processes. SIGINT or SIGTERM stops claiming jobs and waits for the "
+        "running ones; jobs of a worker that died are resumed by another one once their "
+        "lease expires."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help="Jobs run at once, each in its own process; 0 runs them one by one in this process.",
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between queue checks.")
+        parser.add_argument('--once', action='store_true', help="Exit when no job is ready instead of polling.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        worker = jobs.worker_name()
+        self.stderr.write(f"Worker {worker} started.")
+        if options['processes'] > 0:
+            self.run_pool(worker, options['processes'], options['poll_interval'], options['once'])
+        else:
+            self.run_inline(worker, options['poll_interval'], options['once'])
+        self.stderr.write(f"Worker {worker} stopped.")
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def run_inline(self, worker, poll_interval, once):
+        while not self.stopping:
+            if not jobs.run_pending(worker):
+                if once:
+                    return
+                time.sleep(poll_interval)
+
+    def run_pool(self, worker, processes, poll_interval, once):
+        # The pool processes open their own connections.
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        while not self.stopping:
+            with ProcessPoolExecutor(processes, mp_context=context, initializer=setup_process) as pool:
+                try:
+                    self.poll(pool, worker, processes, poll_interval, once)
+                    return
+                except BrokenProcessPool:
+                    # A process was killed (by the OOM killer...) and the executor stopped the others.
+                    # Their jobs keep their lease and are resumed once it expires.
+                    logger.exception("A job process died, the process pool is restarted.")
+
+    def poll(self, pool, worker, processes, poll_interval, once):
+        running = set()
+        while not self.stopping:
+            while len(running) < processes and (job := jobs.claim(worker)) is not None:
+                running.add(pool.submit(jobs.run, job.pk))
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                # jobs.run() records the failures of the jobs, this only raises when a process died.
+                future.result()
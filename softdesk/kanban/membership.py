@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Contributor
+
+_MISSING = object()
+
+
+class MembershipCache:
+    """
+    Process-level LRU cache of contributor ids keyed by (user_id, project_id).
+
+    A value of None records that the user is not a contributor of the project.
+    Entries expire after `ttl` seconds so other processes' writes are picked up,
+    and the Contributor signals invalidate entries written by this process.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the cached contributor id for `key`, or `_MISSING` if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_project(self, project_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == project_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+membership_cache = MembershipCache(
+    max_size=getattr(settings, 'KANBAN_MEMBERSHIP_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'KANBAN_MEMBERSHIP_CACHE_TTL', 30),
+)
+
+
+def _project_key(project_id):
+    try:
+        return int(project_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_memo(request):
+    memo = getattr(request, '_kanban_memberships', None)
+    if memo is None:
+        memo = request._kanban_memberships = {}
+    return memo
+
+
+def _remember(request, key, contributor_id):
+    user_id, project_id = key
+    contributor = None
+    if contributor_id is not None:
+        contributor = Contributor(id=contributor_id, user_id=user_id, project_id=project_id)
+        contributor._state.adding = False
+    _request_memo(request)[key] = contributor
+    return contributor
+
+
+def get_contributor(request, project_id, user_id=None):
+    """
+    Return the Contributor linking a user (the request user by default) to a project,
+    or None if they are not a contributor or the project is being deleted.
+
+    Lookups are memoized on the request, then in the process-level cache, so the
+    views, serializers and permissions handling one request share one query.
+    The returned instance only carries its id, user_id and project_id.
+    """
+    if user_id is None:
+        user_id = request.user.id
+    project_id = _project_key(project_id)
+    if project_id is None:
+        return None
+    key = (user_id, project_id)
+
+    memo = _request_memo(request)
+    if key in memo:
+        return memo[key]
+
+    contributor_id = membership_cache.get(key)
+    if contributor_id is _MISSING:
+        contributor_id = (
+            Contributor.objects.filter(user_id=user_id, project_id=project_id, project__deleting=False)
+            .values_list('id', flat=True)
+            .first()
+        )
+        membership_cache.set(key, contributor_id)
+    return _remember(request, key, contributor_id)
+
+
+def is_contributor(request, project_id, user_id=None):
+    """
+    Return True if a user (the request user by default) contributes to the project.
+    """
+    return get_contributor(request, project_id, user_id) is not None
+
+
+def prefetch_contributors(request, project_id, user_ids):
+    """
+    Resolve the membership of several users in one query, so the following
+    get_contributor() calls for them are served from the request memo.
+    """
+    project_id = _project_key(project_id)
+    if project_id is None:
+        return
+    memo = _request_memo(request)
+    missing = set()
+    for user_id in set(user_ids):
+        key = (user_id, project_id)
+        if key in memo:
+            continue
+        contributor_id = membership_cache.get(key)
+        if contributor_id is _MISSING:
+            missing.add(user_id)
+        else:
+            _remember(request, key, contributor_id)
+    if not missing:
+        return
+
+    found = dict(
+        Contributor.objects.filter(project_id=project_id, project__deleting=False, user_id__in=missing)
+        .values_list('user_id', 'id')
+    )
+    for user_id in missing:
+        key = (user_id, project_id)
+        membership_cache.set(key, found.get(user_id))
+        _remember(request, key, found.get(user_id))
@@ -0,0 +1,307 @@
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+logger = logging.getLogger('kanban.metrics')
+
+# Upper bounds (seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Metrics of the request being handled, set by MetricsMiddleware.
+_current = ContextVar('kanban_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Query and serialization time of one request, filled in by the database
+    execute wrapper and the serialization timers while it is handled.
+    """
+    __slots__ = ('queries', 'query_seconds', 'serialization_seconds', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.serializing = False
+
+
+class EndpointMetrics:
+    """
+    Totals of one (URL name, method) pair. Bucket counts are per bucket and
+    accumulated when rendered.
+    """
+    __slots__ = ('buckets', 'count', 'seconds', 'queries', 'query_seconds', 'serialization_seconds', 'slow')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.slow = 0
+
+
+class MetricsRegistry:
+    """
+    Per-process request metrics.
+
+    Each thread aggregates into its own shard, so recording a request takes
+    no lock; the shards are only summed when the metrics are rendered. The
+    event loop of an ASGI server is a single thread and recording does not
+    await, so async requests share its shard safely.
+
+    The shard of a thread that exited is folded into `_base` and dropped
+    whenever a shard is added or the metrics are collected, so thread churn
+    (thread-per-request servers, sync_to_async) does not grow the registry.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._base = {}
+        # (thread, shard) pairs of the threads that recorded metrics.
+        self._shards = []
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self):
+        """
+        Fold the shards of the exited threads into the base totals; called with the lock held.
+        """
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._add(self._base, shard)
+        self._shards = alive
+
+    @staticmethod
+    def _add(totals, shard):
+        for key, metrics in list(shard.items()):
+            total = totals.get(key)
+            if total is None:
+                total = totals[key] = EndpointMetrics()
+            for index, count in enumerate(metrics.buckets):
+                total.buckets[index] += count
+            for name in ('count', 'seconds', 'queries', 'query_seconds', 'serialization_seconds', 'slow'):
+                setattr(total, name, getattr(total, name) + getattr(metrics, name))
+
+    def record(self, endpoint, method, seconds, request_metrics, slow=False):
+        shard = self._shard()
+        metrics = shard.get((endpoint, method))
+        if metrics is None:
+            metrics = shard[endpoint, method] = EndpointMetrics()
+        metrics.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        metrics.count += 1
+        metrics.seconds += seconds
+        metrics.queries += request_metrics.queries
+        metrics.query_seconds += request_metrics.query_seconds
+        metrics.serialization_seconds += request_metrics.serialization_seconds
+        metrics.slow += slow
+
+    def collect(self):
+        """
+        Return the EndpointMetrics of all the threads summed per key.
+        """
+        totals = {}
+        with self._lock:
+            self._prune()
+            self._add(totals, self._base)
+            for _, shard in self._shards:
+                self._add(totals, shard)
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._base.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        totals = sorted(self.collect().items())
+        lines = [
+            '# HELP softdesk_request_duration_seconds Request latency by URL name and method.',
+            '# TYPE softdesk_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), metrics in totals:
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), metrics.buckets):
+                cumulative += count
+                lines.append(f'softdesk_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'softdesk_request_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}')
+            lines.append(f'softdesk_request_duration_seconds_count{{{labels}}} {metrics.count}')
+
+        counters = (
+            ('softdesk_db_queries_total', 'Database queries run by the requests.', 'queries', '{}'),
+            ('softdesk_db_query_seconds_total', 'Time spent running database queries.', 'query_seconds', '{:.6f}'),
+            (
+                'softdesk_serialization_seconds_total', 'Time spent representing and rendering response data.',
+                'serialization_seconds', '{:.6f}',
+            ),
+            ('softdesk_slow_requests_total', 'Requests slower than KANBAN_SLOW_REQUEST_SECONDS.', 'slow', '{}'),
+        )
+        for name, help_text, attribute, value_format in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (endpoint, method), metrics in totals:
+                value = value_format.format(getattr(metrics, attribute))
+                lines.append(f'{name}{{endpoint="{endpoint}",method="{method}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request.
+    Installed on every connection, see install().
+    """
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.queries += 1
+        current.query_seconds += perf_counter() - start
+
+
+def _install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install():
+    """
+    Record the queries of every database connection. Called from
+    KanbanConfig.ready(), before any connection is opened.
+    """
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_install_query_recorder, dispatch_uid='kanban.metrics')
+
+
+class timed_serialization:
+    """
+    Context manager adding the time spent in its block to the serialization
+    time of the current request. Nested blocks are counted once.
+    """
+    __slots__ = ('current', 'start')
+
+    def __enter__(self):
+        current = _current.get()
+        if current is None or current.serializing:
+            self.current = None
+            return
+        self.current = current
+        current.serializing = True
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.current is not None:
+            self.current.serialization_seconds += perf_counter() - self.start
+            self.current.serializing = False
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, database queries and serialization time of each
+    request under its URL name (e.g. `project-issues-list`) and method, and
+    log the requests slower than KANBAN_SLOW_REQUEST_SECONDS.
+
+    Rendering of DRF responses is timed from process_template_response();
+    the time spent representing objects is added by timed_serialization().
+    Must come first in MIDDLEWARE so the latency covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, 'KANBAN_SLOW_REQUEST_SECONDS', 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        current = RequestMetrics()
+        token = _current.set(current)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, perf_counter() - start, current)
+        return response
+
+    async def __acall__(self, request):
+        current = RequestMetrics()
+        token = _current.set(current)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, perf_counter() - start, current)
+        return response
+
+    def process_template_response(self, request, response):
+        current = _current.get()
+        if current is not None:
+            start = perf_counter()
+
+            def rendered(response):
+                current.serialization_seconds += perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, seconds, current):
+        match = request.resolver_match
+        endpoint = (match.url_name or match.view_name) if match is not None else 'unresolved'
+        slow = seconds >= self.slow_seconds
+        registry.record(endpoint, request.method, seconds, current, slow)
+        if slow:
+            logger.warning(
+                "Slow request %s %s (%s): %d in %.3fs, %d queries in %.3fs, serialization %.3fs",
+                request.method, request.get_full_path(), endpoint, response.status_code, seconds,
+                current.queries, current.query_seconds, current.serialization_seconds,
+            )
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of this process in the Prometheus text format.
+    Restricted to staff users, authenticated by JWT or by an admin session.
+    """
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
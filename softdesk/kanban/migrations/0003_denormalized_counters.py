@@ -0,0 +1,67 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count(model, parent_field, **filters):
+    subquery = (
+        model.objects.filter(**{parent_field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(parent_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(subquery), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Project = apps.get_model('kanban', 'Project')
+    Contributor = apps.get_model('kanban', 'Contributor')
+    Issue = apps.get_model('kanban', 'Issue')
+    Comment = apps.get_model('kanban', 'Comment')
+    db_alias = schema_editor.connection.alias
+    Project.objects.using(db_alias).update(
+        todo_issue_count=count(Issue, 'project', status='TODO'),
+        in_progress_issue_count=count(Issue, 'project', status='IN_PROGRESS'),
+        finished_issue_count=count(Issue, 'project', status='FINISHED'),
+        contributor_count=count(Contributor, 'project'),
+    )
+    Issue.objects.using(db_alias).update(comment_count=count(Comment, 'issue'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0002_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='contributor_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='finished_issue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_issue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_issue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:23
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_time(apps, schema_editor):
+    for name in ('Project', 'Contributor', 'Issue', 'Comment'):
+        apps.get_model('kanban', name).objects.using(schema_editor.connection.alias).update(
+            updated_time=F('created_time')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0003_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_time',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='contributor',
+            name='updated_time',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='updated_time',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='updated_time',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_time, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:30
+
+from django.db import migrations
+
+
+def create_search_tables(apps, schema_editor):
+    # The FTS5 index is specific to SQLite; other backends use the portable search.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE TABLE kanban_search_entry ("
+        "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, object_id TEXT NOT NULL, "
+        "project_id INTEGER NOT NULL, issue_id INTEGER NOT NULL, UNIQUE (kind, object_id))"
+    )
+    schema_editor.execute("CREATE INDEX kanban_search_entry_project ON kanban_search_entry (project_id)")
+    schema_editor.execute("CREATE INDEX kanban_search_entry_issue ON kanban_search_entry (issue_id)")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE kanban_search_fts USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE kanban_search_fts")
+    schema_editor.execute("DROP TABLE kanban_search_entry")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0004_updated_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
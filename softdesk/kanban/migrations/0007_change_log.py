@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def log_existing_rows(apps, schema_editor):
+    """
+    Log every existing contributor, issue and comment as saved, so a client
+    syncing from the start receives the whole project.
+    """
+    Change = apps.get_model('kanban', 'Change')
+    db_alias = schema_editor.connection.alias
+    sources = [
+        ('contributor', apps.get_model('kanban', 'Contributor').objects.values_list('project_id', 'pk')),
+        ('issue', apps.get_model('kanban', 'Issue').objects.values_list('project_id', 'pk')),
+        ('comment', apps.get_model('kanban', 'Comment').objects.values_list('issue__project_id', 'pk')),
+    ]
+    for kind, rows in sources:
+        batch = []
+        for project_id, pk in rows.using(db_alias).order_by('updated_time', 'pk').iterator(chunk_size=2000):
+            batch.append(Change(project_id=project_id, kind=kind, object_id=str(pk)))
+            if len(batch) == 2000:
+                Change.objects.using(db_alias).bulk_create(batch)
+                batch = []
+        Change.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0006_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('issue', 'Issue'), ('comment', 'Comment'), ('contributor', 'Contributor')], max_length=12)),
+                ('object_id', models.CharField(max_length=36)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='kanban.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='change_project_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_rows, migrations.RunPython.noop),
+    ]
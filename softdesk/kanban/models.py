@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from users.models import User
 import uuid
 
@@ -12,10 +13,16 @@ class Contributor(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="contributions")
     project = models.ForeignKey('Project', on_delete=models.CASCADE, related_name="contributors")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'project')
         # Ensures that a user cannot be linked to the same project multiple times.
+        # The unique index on (user, project) also serves the membership checks
+        # and the contributors side of the project list query.
+        indexes = [
+            models.Index(fields=['project', 'created_time', 'id'], name='contributor_project_list_idx'),
+        ]
 
 
 class Project(models.Model):
@@ -36,6 +43,23 @@ class Project(models.Model):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_projects")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    # Denormalized counters, kept up to date by kanban.counters.
+    todo_issue_count = models.IntegerField(default=0)
+    in_progress_issue_count = models.IntegerField(default=0)
+    finished_issue_count = models.IntegerField(default=0)
+    contributor_count = models.IntegerField(default=0)
+
+    # Set when the deletion of the project is queued; the project is hidden from then on.
+    deleting = models.BooleanField(default=False)
+
+    # Counter field holding the number of issues in each status.
+    ISSUE_COUNT_FIELDS = {
+        'TODO': 'todo_issue_count',
+        'IN_PROGRESS': 'in_progress_issue_count',
+        'FINISHED': 'finished_issue_count',
+    }
 
 
 class Issue(models.Model):
@@ -70,6 +94,42 @@ class Issue(models.Model):
     tag = models.CharField(max_length=10, choices=TAG_CHOICES, default='TASK')
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='TODO')
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    # Denormalized counter, kept up to date by kanban.counters.
+    comment_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Paginated issue list of a project.
+            models.Index(fields=['project', 'created_time', 'id'], name='issue_project_list_idx'),
+            # Issues of a project filtered by status (board columns).
+            models.Index(fields=['project', 'status', 'created_time'], name='issue_project_status_idx'),
+            # Issues assigned to a user, newest first (/api/me/issues/).
+            models.Index(fields=['assignee', 'created_time', 'id'], name='issue_assignee_feed_idx'),
+            # Latest changes of each project of a user (/api/me/activity/).
+            models.Index(fields=['project', 'updated_time', 'id'], name='issue_project_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Save the issue, reading the stored status under a row lock in the
+        same transaction when the status is written. The counters then move
+        from the status actually replaced, in `_replaced_status`, rather than
+        from the one this instance was loaded with, which a concurrent save
+        may have changed since.
+        """
+        update_fields = kwargs.get('update_fields')
+        self._replaced_status = None
+        if self._state.adding or (update_fields is not None and 'status' not in update_fields):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(Issue, instance=self)
+        with transaction.atomic(using=using):
+            self._replaced_status = (
+                Issue.objects.using(using).select_for_update()
+                .filter(pk=self.pk).values_list('status', flat=True).first()
+            )
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -82,3 +142,91 @@ class Comment(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(Contributor, on_delete=models.CASCADE, related_name="created_comments")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Paginated comment list of an issue.
+            models.Index(fields=['issue', 'created_time', 'id'], name='comment_issue_list_idx'),
+        ]
+
+
+class Change(models.Model):
+    """
+    Entry of the change log read by the incremental sync endpoint
+    (/api/projects/<id>/changes/): an issue, comment or contributor of a
+    project was saved, or deleted. The id orders the log and is the sync token.
+    """
+    ISSUE = 'issue'
+    COMMENT = 'comment'
+    CONTRIBUTOR = 'contributor'
+    KIND_CHOICES = [
+        (ISSUE, 'Issue'),
+        (COMMENT, 'Comment'),
+        (CONTRIBUTOR, 'Contributor'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # Indexed by change_project_idx; the log of a project goes with it.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="changes", db_index=False)
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    deleted = models.BooleanField(default=False)
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Changes of a project after a token.
+            models.Index(fields=['project', 'id'], name='change_project_idx'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Background job run by the `run_jobs` worker, see kanban.jobs.
+    A running job holds a lease that its worker renews after each batch;
+    when the worker dies, the lease expires and another worker resumes it.
+    """
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    DELETE_PROJECT = 'project.delete'
+    EXPORT_PROJECT = 'project.export'
+    REBUILD_COUNTERS = 'counters.rebuild'
+    KIND_CHOICES = [
+        (DELETE_PROJECT, 'Project deletion'),
+        (EXPORT_PROJECT, 'Project export'),
+        (REBUILD_COUNTERS, 'Counter rebuild'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    # Not a foreign key: a project delete job outlives its project.
+    project_id = models.IntegerField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    progress = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_time = models.DateTimeField(auto_now_add=True)
+    started_time = models.DateTimeField(null=True, blank=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Jobs waiting for a worker, oldest first.
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
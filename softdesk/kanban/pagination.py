@@ -0,0 +1,210 @@
+import base64
+import heapq
+import itertools
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CreatedTimeCursorPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination shared by the kanban list endpoints.
+
+    Rows are ordered on (created_time, id): the cursor seeks on created_time
+    and id keeps the order stable when two rows share the same timestamp.
+    Because the id is never compared directly, it works for both integer
+    keys and the UUID keys used by Comment.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('created_time', 'id')
+
+
+class FeedCursorPagination(CreatedTimeCursorPagination):
+    """
+    Newest first cursor pagination of the issues assigned to the user.
+    """
+    ordering = ('-created_time', '-id')
+
+
+class KeysetPagination:
+    """
+    Base of the keyset paginations, seeking on (field, id) where `ordering`
+    gives the field and the direction of the pages.
+
+    The cursor holds a direction and the field value and id of the row the
+    page starts after (or, going back, ends before), so every page is a
+    plain seek with no offset. Its cursors are not interchangeable with the
+    CursorPagination ones.
+    """
+    page_size = CreatedTimeCursorPagination.page_size
+    page_size_query_param = CreatedTimeCursorPagination.page_size_query_param
+    max_page_size = CreatedTimeCursorPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('created_time', 'id')
+
+    @property
+    def field(self):
+        return self.ordering[0].lstrip('-')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        """
+        Return (reverse, field value, id) from the request cursor, or None without one.
+        """
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            direction, value, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split('|', 2)
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return direction == 'p', datetime.fromisoformat(value), pk
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        value = f"{'p' if reverse else 'n'}|{row[self.field].isoformat()}|{row['id']}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def page_ordering(self, position):
+        """
+        Return the ordering rows are read in: `ordering`, flipped going back.
+        """
+        if position is None or not position[0]:
+            return self.ordering
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def seek(self, queryset, position):
+        """
+        Return `queryset` limited to the rows after `position`, in reading order.
+        """
+        ordering = self.page_ordering(position)
+        if position is not None:
+            _, value, pk = position
+            lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': pk})
+                )
+            except (ValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset.order_by(*ordering)
+
+    def paginate_rows(self, rows, page_size, position, request):
+        """
+        Return the page from the first `page_size` + 1 rows read after
+        `position`, and the links to the next and previous pages.
+        """
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        url = request.build_absolute_uri()
+        if position is not None and position[0]:
+            rows.reverse()
+            # No row before the cursor: the first page starts where it pointed.
+            next_link = self._link(url, rows[-1]) if rows else remove_query_param(url, self.cursor_query_param)
+            previous_link = self._link(url, rows[0], reverse=True) if has_more else None
+        else:
+            next_link = self._link(url, rows[-1]) if has_more else None
+            previous_link = self._link(url, rows[0], reverse=True) if position is not None and rows else None
+        return rows, next_link, previous_link
+
+    def _link(self, url, row, reverse=False):
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+
+class ActivityKeysetPagination(KeysetPagination):
+    """
+    Latest change first pagination of the activity feed, merging one
+    partition (project) at a time read in keyset order.
+
+    Each page reads at most a page from each partition, through an index
+    starting with the partition column, and merges them: the cost grows with
+    the number of partitions but not with the rows outside them.
+
+    updated_time changes with the issue, so a walk through the pages is not
+    a snapshot: an issue changed after the walk started moves ahead of the
+    cursor and is left out of the remaining pages, whether they already
+    returned it or not, and comes first on the next walk from the first
+    page. Each walk returns an issue at most once. Clients that need every
+    change of a project follow its change log instead (`changes/`).
+    """
+    ordering = ('-updated_time', '-id')
+    # Partitions per compound SELECT, well under SQLite's limit of 500 terms.
+    union_size = 100
+
+    def paginate_partitions(self, querysets, request):
+        """
+        Return the (updated_time, id) rows of the requested page from the
+        rows of all `querysets`, and the links to the next and previous pages.
+        """
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        ordering = self.page_ordering(position)
+        branches = [
+            self.seek(queryset, position).values(self.field, 'id')[:page_size + 1] for queryset in querysets
+        ]
+        chunks = [
+            self._union(branches[start:start + self.union_size], ordering, page_size + 1)
+            for start in range(0, len(branches), self.union_size)
+        ]
+        merged = heapq.merge(
+            *chunks, key=lambda row: (row[self.field], row['id']), reverse=ordering[0].startswith('-')
+        )
+        return self.paginate_rows(list(itertools.islice(merged, page_size + 1)), page_size, position, request)
+
+    def _union(self, branches, ordering, limit):
+        """
+        Return the first `limit` rows of the sliced `branches` in `ordering`,
+        read with one compound SELECT. The ORM refuses LIMIT in the members
+        of a compound statement on SQLite, which allows it in subqueries.
+        """
+        if len(branches) == 1:
+            return list(branches[0])
+        parts, params = [], []
+        for branch in branches:
+            sql, branch_params = branch.query.sql_with_params()
+            parts.append(f'SELECT * FROM ({sql})')
+            params.extend(branch_params)
+        quote = connections[branches[0].db].ops.quote_name
+        order = ', '.join(
+            f"{quote(name.lstrip('-'))} {'DESC' if name.startswith('-') else 'ASC'}" for name in ordering
+        )
+        # raw() applies the field converters, which parse updated_time on SQLite.
+        rows = branches[0].model._default_manager.db_manager(branches[0].db).raw(
+            f"{' UNION ALL '.join(parts)} ORDER BY {order} LIMIT %s", [*params, limit]
+        )
+        return [{self.field: getattr(row, self.field), 'id': row.id} for row in rows]
+
+
+class AsyncKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for the native async views, on the same
+    (created_time, id) ordering as CreatedTimeCursorPagination, read with
+    aiterator().
+    """
+
+    async def apaginate(self, queryset, request):
+        """
+        Return the rows of the requested page and the links to the next and
+        previous ones. `queryset` must be a values() queryset including
+        created_time and id.
+        """
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        queryset = self.seek(queryset, position)[:page_size + 1]
+        rows = [row async for row in queryset.aiterator(chunk_size=page_size + 1)]
+        return self.paginate_rows(rows, page_size, position, request)
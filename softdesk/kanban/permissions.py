@@ -1,4 +1,5 @@
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .models import Comment
 
 
 class IsAuthorOrReadOnly(BasePermission):
@@ -25,19 +26,27 @@ class IsAuthorOrReadOnly(BasePermission):
             bool: True if the user has permission, False otherwise.
         """
         # Allow read-only permissions for safe methods
-        if request.method in ['GET', 'HEAD', 'OPTIONS']:
+        if request.method in SAFE_METHODS:
             return True
 
+        # Foreign keys are compared through their `*_id` values so no related
+        # row has to be loaded; the viewsets select_related() what is left.
+        user_id = request.user.id
+
         # Check if the user is the author of the object (e.g., Project, Issue, or Comment)
-        if hasattr(obj, 'author') and obj.author == request.user:
+        # Comment authors are contributors, so the user is one step further.
+        if isinstance(obj, Comment):
+            if obj.author.user_id == user_id:
+                return True
+        elif hasattr(obj, 'author_id') and obj.author_id == user_id:
             return True
 
         # Check if the user is the author of the project linked to the issue
-        if hasattr(obj, 'issue') and obj.issue.project.author == request.user:
+        if hasattr(obj, 'issue_id') and obj.issue.project.author_id == user_id:
             return True
 
         # Check if the user is the author of the project itself
-        if hasattr(obj, 'project') and obj.project.author == request.user:
+        if hasattr(obj, 'project_id') and obj.project.author_id == user_id:
             return True
 
         # Deny access otherwise
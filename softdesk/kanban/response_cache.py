@@ -0,0 +1,114 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Tags, Warning, register
+from rest_framework.response import Response
+
+# Backends whose entries are not shared between the processes of a deployment.
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def get_cache():
+    """
+    Return the cache of list responses, or None when KANBAN_RESPONSE_CACHE_ALIAS
+    is not set.
+    """
+    alias = getattr(settings, 'KANBAN_RESPONSE_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+@register(Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    alias = getattr(settings, 'KANBAN_RESPONSE_CACHE_ALIAS', None)
+    if alias and alias not in settings.CACHES:
+        return [Error(f"KANBAN_RESPONSE_CACHE_ALIAS '{alias}' is not in CACHES.", id='kanban.E001')]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_response_cache(app_configs, **kwargs):
+    """
+    A process-local response cache never serves stale lists, since entries
+    are keyed on the list version, but each process warms and keeps its own
+    copy of every list, which lowers the hit rate and multiplies the memory.
+    """
+    alias = getattr(settings, 'KANBAN_RESPONSE_CACHE_ALIAS', None)
+    if not alias or alias not in settings.CACHES:
+        return []
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Warning(
+            f"KANBAN_RESPONSE_CACHE_ALIAS '{alias}' uses {backend}, which is not shared between processes.",
+            hint="With several processes, use a shared backend such as Redis or Memcached.",
+            id='kanban.W001',
+        )]
+    return []
+
+
+class CacheStats:
+    """
+    Per-process hit and miss counters of the response cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+class CachedListMixin:
+    """
+    ViewSet mixin caching the rendered list of project-scoped resources,
+    placed before ConditionalGetMixin.
+
+    Entries are keyed on the version of the list read by ConditionalGetMixin
+    (max updated_time and row count of the filtered queryset), the user and
+    the full path. Any write to a listed row, from any process and with or
+    without a signal, changes the version, so stale entries are never read
+    again and just expire. A hit costs the version query only.
+
+    Lists read from a replica are not stored: a lagging replica could store
+    old rows under a version the primary has already moved past.
+    """
+
+    def render_list(self, request, queryset, version, *args, **kwargs):
+        cache = get_cache()
+        if cache is None:
+            return super().render_list(request, queryset, version, *args, **kwargs)
+
+        path = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+        last_modified = version['last_modified'].isoformat() if version['last_modified'] else ''
+        key = f"kanban:response:{request.user.id}:{last_modified}:{version['count']}:{path}"
+
+        data = cache.get(key)
+        stats.record(hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().render_list(request, queryset, version, *args, **kwargs)
+        replica = queryset.db in getattr(settings, 'DATABASE_REPLICAS', [])
+        if response.status_code == 200 and hasattr(response, 'data') and not replica:
+            cache.set(key, response.data, getattr(settings, 'KANBAN_RESPONSE_CACHE_TIMEOUT', 300))
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,172 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from .response_cache import PROCESS_LOCAL_BACKENDS
+
+# Routing state of the request being handled, set by ReplicaRoutingMiddleware.
+_request_state = ContextVar('kanban_replica_routing', default=None)
+
+
+def _pin_key(user_id):
+    return f'kanban:replica-pin:{user_id}'
+
+
+def get_pin_cache():
+    """
+    Return the cache holding the users pinned to the primary, named by
+    REPLICA_PIN_CACHE_ALIAS.
+    """
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')]
+
+
+@register(Tags.caches)
+def check_pin_cache(app_configs, **kwargs):
+    """
+    With replicas, the pins must be shared by every process serving the API:
+    a request handled by another process than the write would not see the
+    pin and could read a replica that lacks the user's own write.
+    """
+    if not getattr(settings, 'DATABASE_REPLICAS', []):
+        return []
+    alias = getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')
+    if alias not in settings.CACHES:
+        return [Error(f"REPLICA_PIN_CACHE_ALIAS '{alias}' is not in CACHES.", id='kanban.E003')]
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Warning(
+            f"REPLICA_PIN_CACHE_ALIAS '{alias}' uses {backend}, which is not shared between processes.",
+            hint="With several processes, use a shared backend such as Redis or Memcached, or users "
+                 "may not read their own writes.",
+            id='kanban.W002',
+        )]
+    return []
+
+
+class RoutingState:
+    """
+    What the router knows about the current request: whether it may read from
+    a replica, the replica picked for it, and whether it has written.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self.replica = None
+        self._pinned = None
+
+    def user_id(self):
+        user = getattr(self.request, 'user', None)
+        return getattr(user, 'id', None) if user is not None and user.is_authenticated else None
+
+    def pinned(self):
+        """
+        Return True if the user wrote recently, so their reads must see the
+        primary. Looked up at most once per request.
+        """
+        if self._pinned is None:
+            user_id = self.user_id()
+            self._pinned = user_id is not None and get_pin_cache().get(_pin_key(user_id)) is not None
+        return self._pinned
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Expose the current request to ReplicaRouter, and after a request that
+    wrote, pin its user to the primary for REPLICA_STICKY_SECONDS so their
+    next reads cannot miss their own writes through replication lag. Pins
+    are kept in the REPLICA_PIN_CACHE_ALIAS cache, which must be shared by
+    all processes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.pin(state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        user_id = state.user_id() if state.wrote else None
+        if user_id is not None:
+            await get_pin_cache().aset(_pin_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+        return response
+
+    @staticmethod
+    def pin(state):
+        user_id = state.user_id() if state.wrote else None
+        if user_id is not None:
+            get_pin_cache().set(_pin_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+
+
+class ReplicaRouter:
+    """
+    Send the kanban reads of safe-method requests to a replica and everything
+    else to the primary.
+
+    Reads stay on the primary outside requests (management commands, tests),
+    inside transactions, once the request has written and while its user is
+    pinned after a recent write. One replica is picked per request so all its
+    reads see the same snapshot.
+    """
+    replica_apps = {'kanban'}
+
+    def replicas(self):
+        return getattr(settings, 'DATABASE_REPLICAS', [])
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        replicas = self.replicas()
+        if state is None or not replicas or model._meta.app_label not in self.replica_apps:
+            return None
+        if (
+            not state.safe or state.wrote or state.pinned()
+            or transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas():
+            return False
+        return None
@@ -0,0 +1,272 @@
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Project, Contributor, Issue, Comment
+
+
+def visible_project_ids(user_id):
+    """
+    Subquery of the ids of the projects a user authored or contributes to,
+    leaving out the projects being deleted.
+    """
+    return Project.objects.filter(
+        Q(author_id=user_id) | Q(id__in=Contributor.objects.filter(user_id=user_id).values('project_id')),
+        deleting=False,
+    ).values('id')
+
+
+class SearchBackend:
+    """
+    Interface of the issue and comment search backends.
+
+    Results are dicts with the `type` ('issue' or 'comment'), `id`, `issue`,
+    `project`, `snippet` and `rank` (lower ranks first) of each match.
+    """
+
+    def index_issues(self, issues):
+        pass
+
+    def index_comments(self, comments):
+        pass
+
+    def remove_issue(self, issue_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def remove_project(self, project_id):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        return 0
+
+    def search(self, user_id, query, limit):
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Portable fallback scanning issues and comments with case-insensitive
+    containment. It needs no index but its cost grows with the data size.
+    """
+
+    def search(self, user_id, query, limit):
+        terms = query.split()
+        if not terms:
+            return []
+        projects = visible_project_ids(user_id)
+
+        issue_filter, comment_filter = Q(), Q()
+        for term in terms:
+            issue_filter &= Q(title__icontains=term) | Q(description__icontains=term)
+            comment_filter &= Q(description__icontains=term)
+        issues = (
+            Issue.objects.filter(issue_filter, project_id__in=projects)
+            .order_by('-created_time').values('id', 'project_id', 'title')[:limit]
+        )
+        comments = (
+            Comment.objects.filter(comment_filter, issue__project_id__in=projects)
+            .order_by('-created_time').values('id', 'issue_id', 'issue__project_id', 'description')[:limit]
+        )
+        results = [
+            {'type': 'issue', 'id': row['id'], 'issue': row['id'], 'project': row['project_id'],
+             'snippet': row['title'], 'rank': 0}
+            for row in issues
+        ] + [
+            {'type': 'comment', 'id': str(row['id']), 'issue': row['issue_id'],
+             'project': row['issue__project_id'], 'snippet': row['description'][:200], 'rank': 1}
+            for row in comments
+        ]
+        return results[:limit]
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Search backend using an SQLite FTS5 virtual table, ranked with bm25.
+
+    `kanban_search_fts` holds the indexed text and `kanban_search_entry` maps
+    each of its rowids to the issue or comment it comes from, with indexes on
+    the project and issue so entries can be removed without scanning.
+    Both tables are created by migration 0005 on SQLite only.
+    """
+
+    # Column weights passed to bm25(): title matches outrank body matches.
+    TITLE_WEIGHT = 4.0
+    BODY_WEIGHT = 1.0
+    # Keeps the IN () lists of _upsert() well under SQLite's variable limit.
+    UPSERT_BATCH_SIZE = 500
+
+    def _upsert(self, cursor, kind, rows):
+        """
+        Insert or replace the index rows of (object_id, project_id, issue_id,
+        title, body) tuples with a fixed number of statements per batch.
+        """
+        for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+            batch = rows[start:start + self.UPSERT_BATCH_SIZE]
+            object_ids = [str(row[0]) for row in batch]
+            cursor.executemany(
+                "INSERT INTO kanban_search_entry (kind, object_id, project_id, issue_id) VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (kind, object_id) DO UPDATE SET project_id = excluded.project_id",
+                [(kind, object_id, row[1], row[2]) for object_id, row in zip(object_ids, batch)]
+            )
+            placeholders = ', '.join(['%s'] * len(object_ids))
+            cursor.execute(
+                f"SELECT object_id, id FROM kanban_search_entry WHERE kind = %s AND object_id IN ({placeholders})",
+                [kind, *object_ids]
+            )
+            rowids = dict(cursor.fetchall())
+            cursor.execute(
+                f"DELETE FROM kanban_search_fts WHERE rowid IN ({placeholders})",
+                [rowids[object_id] for object_id in object_ids]
+            )
+            cursor.executemany(
+                "INSERT INTO kanban_search_fts (rowid, title, body) VALUES (%s, %s, %s)",
+                [(rowids[object_id], row[3], row[4]) for object_id, row in zip(object_ids, batch)]
+            )
+
+    def _remove(self, cursor, where, params):
+        cursor.execute(
+            f"DELETE FROM kanban_search_fts WHERE rowid IN (SELECT id FROM kanban_search_entry WHERE {where})",
+            params
+        )
+        cursor.execute(f"DELETE FROM kanban_search_entry WHERE {where}", params)
+
+    def index_issues(self, issues):
+        rows = [(issue.pk, issue.project_id, issue.pk, issue.title, issue.description) for issue in issues]
+        with connection.cursor() as cursor:
+            self._upsert(cursor, 'issue', rows)
+
+    def index_comments(self, comments):
+        """
+        Index comments; each one needs its project id in `project_id`.
+        """
+        rows = [
+            (comment.pk, comment.project_id, comment.issue_id, '', comment.description) for comment in comments
+        ]
+        with connection.cursor() as cursor:
+            self._upsert(cursor, 'comment', rows)
+
+    def remove_issue(self, issue_id):
+        # Removes the issue and the comments indexed under it.
+        with connection.cursor() as cursor:
+            self._remove(cursor, "issue_id = %s", [issue_id])
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            self._remove(cursor, "kind = 'comment' AND object_id = %s", [str(comment_id)])
+
+    def remove_project(self, project_id):
+        with connection.cursor() as cursor:
+            self._remove(cursor, "project_id = %s", [project_id])
+
+    def rebuild(self, batch_size=1000):
+        """
+        Reindex every issue and comment, then remove the entries of rows
+        that no longer exist, one transaction per batch. Returns the number
+        of indexed rows.
+
+        Entries are replaced in place, keyed by their object, so searches
+        keep finding every row while the rebuild runs. Each batch reads its
+        rows inside its write transaction, so it cannot overwrite a newer
+        entry written by a signal or bring back a row deleted since.
+        """
+        total = 0
+        batches = (
+            (Issue.objects.order_by('pk').values_list('pk', 'project_id', 'pk', 'title', 'description'), 'issue'),
+            (Comment.objects.order_by('pk').values_list('pk', 'issue__project_id', 'issue_id', 'description'),
+             'comment'),
+        )
+        for queryset, kind in batches:
+            last_pk = None
+            while True:
+                page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                with transaction.atomic(), connection.cursor() as cursor:
+                    rows = list(page[:batch_size])
+                    if kind == 'comment':
+                        rows = [(pk, project_id, issue_id, '', body) for pk, project_id, issue_id, body in rows]
+                    self._upsert(cursor, kind, rows)
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                total += len(rows)
+        self._remove_orphans(batch_size)
+        return total
+
+    def _remove_orphans(self, batch_size):
+        """
+        Remove the entries whose issue or comment no longer exists, walking
+        the entry table in keyset batches.
+        """
+        models = {'issue': (Issue, int), 'comment': (Comment, uuid.UUID)}
+        batch_size = min(batch_size, self.UPSERT_BATCH_SIZE)
+        last_id = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, kind, object_id FROM kanban_search_entry WHERE id > %s ORDER BY id LIMIT %s",
+                    [last_id, batch_size]
+                )
+                entries = cursor.fetchall()
+                orphans = []
+                for kind, (model, to_pk) in models.items():
+                    pks = {to_pk(object_id): entry_id for entry_id, entry_kind, object_id in entries
+                           if entry_kind == kind}
+                    existing = set(model.objects.filter(pk__in=pks).values_list('pk', flat=True))
+                    orphans += [entry_id for pk, entry_id in pks.items() if pk not in existing]
+                if orphans:
+                    placeholders = ', '.join(['%s'] * len(orphans))
+                    self._remove(cursor, f"id IN ({placeholders})", orphans)
+            if len(entries) < batch_size:
+                return
+            last_id = entries[-1][0]
+
+    @staticmethod
+    def match_expression(query):
+        """
+        Turn free text into an FTS5 query matching every word, the last one as a prefix.
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+    def search(self, user_id, query, limit):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        projects_sql, projects_params = visible_project_ids(user_id).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT e.kind, e.object_id, e.issue_id, e.project_id, "
+                "snippet(kanban_search_fts, -1, '[', ']', '…', 12), "
+                "bm25(kanban_search_fts, %s, %s) AS rank "
+                "FROM kanban_search_fts JOIN kanban_search_entry e ON e.id = kanban_search_fts.rowid "
+                f"WHERE kanban_search_fts MATCH %s AND e.project_id IN ({projects_sql}) "
+                "ORDER BY rank LIMIT %s",
+                [self.TITLE_WEIGHT, self.BODY_WEIGHT, expression, *projects_params, limit]
+            )
+            rows = cursor.fetchall()
+        return [
+            {'type': kind, 'id': int(object_id) if kind == 'issue' else object_id, 'issue': issue_id,
+             'project': project_id, 'snippet': snippet, 'rank': rank}
+            for kind, object_id, issue_id, project_id, snippet, rank in rows
+        ]
+
+
+def get_backend():
+    """
+    Return the configured search backend: KANBAN_SEARCH_BACKEND if set,
+    otherwise FTS5 on SQLite and the portable fallback elsewhere.
+    """
+    path = getattr(settings, 'KANBAN_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return DatabaseSearchBackend()
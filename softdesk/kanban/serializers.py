@@ -1,26 +1,53 @@
 from rest_framework import serializers
-from .models import Contributor, Project, Issue, Comment
+from rest_framework.reverse import reverse
+from users.models import User
+from .models import Contributor, Project, Issue, Comment, Job
+from .membership import is_contributor
+from .metrics import timed_serialization
 
-class ProjectSerializer(serializers.ModelSerializer):
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Base serializer rendering only the fields listed in the `fields` context
+    entry, when the view sets one (see fieldsets.SparseFieldsetMixin).
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is not None:
+            fields = {name: field for name, field in fields.items() if name in selected}
+        return fields
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+class ProjectSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Project model.
     Handles serialization and deserialization of project-related data.
     """
 
-    author = serializers.ReadOnlyField(source='author.id')
+    author = serializers.ReadOnlyField(source='author_id')
 
     class Meta:
         model = Project
-        fields = ['id', 'title', 'description', 'type', 'author', 'created_time']
-        read_only_fields = ['created_time']
+        fields = [
+            'id', 'title', 'description', 'type', 'author', 'created_time',
+            'todo_issue_count', 'in_progress_issue_count', 'finished_issue_count', 'contributor_count'
+        ]
+        read_only_fields = [
+            'created_time',
+            'todo_issue_count', 'in_progress_issue_count', 'finished_issue_count', 'contributor_count'
+        ]
 
-class ContributorSerializer(serializers.ModelSerializer):
+class ContributorSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Contributor model.
     Manages data for contributors associated with a specific project.
     """
 
-    project = serializers.ReadOnlyField(source='project.id')
+    project = serializers.ReadOnlyField(source='project_id')
 
     class Meta:
         model = Contributor
@@ -30,41 +57,118 @@ class ContributorSerializer(serializers.ModelSerializer):
             'user': {'required': True},
         }
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Issue model.
     Handles issue-related data for a specific project.
     Validates that the assigned user is a contributor of the project.
     """
 
-    project = serializers.ReadOnlyField(source='project.id')
+    project = serializers.ReadOnlyField(source='project_id')
 
     class Meta:
         model = Issue
         fields = [
             'id', 'title', 'description', 'author', 'assignee',
-            'priority', 'tag', 'status', 'project', 'created_time'
+            'priority', 'tag', 'status', 'project', 'created_time', 'comment_count'
         ]
-        read_only_fields = ['author', 'created_time']
+        read_only_fields = ['author', 'created_time', 'comment_count']
     
     def validate_assignee(self, value):
         """
         Validates that the assignee is a contributor to the project.
         """
         project_id = self.context['view'].kwargs['project_pk']
-        if not Contributor.objects.filter(user=value, project_id=project_id).exists():
+        if value is None or not is_contributor(self.context['request'], project_id, user_id=value.id):
             raise serializers.ValidationError("The assigned user must be a contributor of the project.")
         return value
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Comment model.
     Manages comment-related data for issues in a project.
     """
 
-    issue = serializers.ReadOnlyField(source='issue.id')
+    issue = serializers.ReadOnlyField(source='issue_id')
 
     class Meta:
         model = Comment
         fields = ['id', 'description', 'issue', 'author', 'created_time']
         read_only_fields = ['author', 'created_time']
+
+class BulkIssueSerializer(IssueSerializer):
+    """
+    Serializer for one item of a bulk issue request.
+    The assignee is given as a user id and only checked against the project
+    memberships resolved for the whole batch, so items cost no query each.
+    """
+
+    assignee = serializers.IntegerField(source='assignee_id', required=False, allow_null=True)
+
+    def validate_assignee(self, value):
+        """
+        Validates that the assignee is a contributor to the project.
+        """
+        project_id = self.context['view'].kwargs['project_pk']
+        if value is None or not is_contributor(self.context['request'], project_id, user_id=value):
+            raise serializers.ValidationError("The assigned user must be a contributor of the project.")
+        return value
+
+class FeedProjectSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Project
+        fields = ['id', 'title']
+
+class FeedAuthorSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+class FeedIssueSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer of the issues of the "me" feeds, which span several
+    projects: the project and author are rendered from the joined rows.
+    """
+
+    project = FeedProjectSerializer(read_only=True)
+    author = FeedAuthorSerializer(read_only=True)
+    assignee = serializers.ReadOnlyField(source='assignee_id')
+
+    # Columns the feed queries load, see FeedMixin.
+    columns = [
+        'id', 'title', 'status', 'priority', 'tag', 'assignee_id', 'comment_count', 'created_time', 'updated_time',
+        'project__id', 'project__title', 'author__id', 'author__username',
+    ]
+
+    class Meta:
+        model = Issue
+        fields = [
+            'id', 'title', 'status', 'priority', 'tag', 'project', 'author', 'assignee',
+            'comment_count', 'created_time', 'updated_time',
+        ]
+        read_only_fields = fields
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the status of a background job.
+    `download` links to the file of a finished export.
+    """
+
+    url = serializers.HyperlinkedIdentityField(view_name='job-detail')
+    project = serializers.ReadOnlyField(source='project_id')
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'url', 'kind', 'status', 'project', 'attempts', 'progress', 'result', 'error',
+            'created_time', 'started_time', 'finished_time', 'download'
+        ]
+        read_only_fields = fields
+
+    def get_download(self, job):
+        if job.kind != Job.EXPORT_PROJECT or job.status != Job.SUCCEEDED:
+            return None
+        return reverse('job-download', args=[job.pk], request=self.context.get('request'))
@@ -0,0 +1,199 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import User
+from . import counters, events, search
+from .changes import record_changes
+from .membership import membership_cache
+from .models import Project, Contributor, Issue, Comment, Change
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_membership(sender, instance, **kwargs):
+    """
+    Drop the cached membership of a contributor when it is added or removed.
+    """
+    membership_cache.invalidate((instance.user_id, instance.project_id))
+
+
+def _deleted_with(origin, model, pk):
+    """
+    Return True if the deletion started from the `model` row `pk`, or from the
+    project owning everything, in which case its counters need no update.
+    A project is also deleted with the user who authored it.
+    """
+    if isinstance(origin, Project) or (isinstance(origin, model) and origin.pk == pk):
+        return True
+    return model is Project and pk in getattr(origin, '_authored_project_ids', ())
+
+
+@receiver(pre_delete, sender=User)
+def note_authored_projects(sender, instance, **kwargs):
+    """
+    Remember the projects a deleted user authored, which the deletion
+    cascades into: the rows deleted with them need no counter update or
+    change log entry, and a Change pointing at them would fail the foreign
+    key check at commit.
+    """
+    instance._authored_project_ids = set(Project.objects.filter(author=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Contributor)
+def count_added_contributor(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_contributor_count(instance.project_id, 1)
+
+
+@receiver(post_delete, sender=Contributor)
+def count_removed_contributor(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Project, instance.project_id):
+        counters.adjust_contributor_count(instance.project_id, -1)
+
+
+@receiver(post_save, sender=Issue)
+def publish_saved_issue(sender, instance, created, **kwargs):
+    events.publish_issue_saved(instance, created)
+
+
+@receiver(post_save, sender=Issue)
+def count_saved_issue(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_issue_counts(instance.project_id, {instance.status: 1})
+    else:
+        counters.adjust_issue_counts(instance.project_id, counters.status_transition_deltas([instance]))
+
+
+@receiver(post_delete, sender=Issue)
+def count_removed_issue(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Project, instance.project_id):
+        counters.adjust_issue_counts(instance.project_id, {instance.status: -1})
+
+
+@receiver(post_save, sender=Comment)
+def count_added_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_comment_count(instance.issue_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_removed_comment(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Issue, instance.issue_id):
+        counters.adjust_comment_count(instance.issue_id, -1)
+
+
+def _comment_project_id(comment, origin=None):
+    """
+    Return the project id of a comment, resolved at most once per instance and
+    without a query when its issue is loaded or the deletion cascades from its
+    issue or project.
+    """
+    project_id = getattr(comment, 'project_id', None)
+    if project_id is None:
+        if Comment.issue.is_cached(comment):
+            project_id = comment.issue.project_id
+        elif isinstance(origin, Project):
+            project_id = origin.pk
+        elif isinstance(origin, Issue) and origin.pk == comment.issue_id:
+            project_id = origin.project_id
+        else:
+            project_id = Issue.objects.filter(pk=comment.issue_id).values_list('project_id', flat=True).first()
+        comment.project_id = project_id
+    return project_id
+
+
+@receiver(post_save, sender=Comment)
+def publish_added_comment(sender, instance, created, **kwargs):
+    if created:
+        project_id = _comment_project_id(instance)
+        if project_id is not None:
+            events.publish_comment_added(instance, project_id)
+
+
+@receiver(post_save, sender=Issue)
+def index_issue(sender, instance, **kwargs):
+    search.get_backend().index_issues([instance])
+
+
+@receiver(post_delete, sender=Issue)
+def unindex_issue(sender, instance, origin=None, **kwargs):
+    # The project handler removes everything at once on a project delete.
+    if not isinstance(origin, Project):
+        search.get_backend().remove_issue(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    if _comment_project_id(instance) is not None:
+        search.get_backend().index_comments([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Issue, instance.issue_id):
+        search.get_backend().remove_comment(instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.get_backend().remove_project(instance.pk)
+
+
+@receiver(post_save, sender=Contributor)
+def log_saved_contributor(sender, instance, **kwargs):
+    record_changes(saved=[(instance.project_id, Change.CONTRIBUTOR, instance.pk)])
+
+
+@receiver(post_delete, sender=Contributor)
+def log_deleted_contributor(sender, instance, origin=None, **kwargs):
+    # The log of a deleted project goes with it.
+    if not _deleted_with(origin, Project, instance.project_id):
+        record_changes(deleted=[(instance.project_id, Change.CONTRIBUTOR, instance.pk)])
+
+
+@receiver(post_save, sender=Issue)
+def log_saved_issue(sender, instance, **kwargs):
+    record_changes(saved=[(instance.project_id, Change.ISSUE, instance.pk)])
+
+
+@receiver(post_delete, sender=Issue)
+def log_deleted_issue(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, Project, instance.project_id):
+        record_changes(deleted=[(instance.project_id, Change.ISSUE, instance.pk)])
+
+
+@receiver(post_save, sender=Comment)
+def log_saved_comment(sender, instance, created, **kwargs):
+    project_id = _comment_project_id(instance)
+    if project_id is not None:
+        # A new comment also changes the comment_count of its issue.
+        issue = [(project_id, Change.ISSUE, instance.issue_id)] if created else []
+        record_changes(saved=[(project_id, Change.COMMENT, instance.pk), *issue])
+
+
+@receiver(post_delete, sender=Comment)
+def log_deleted_comment(sender, instance, origin=None, **kwargs):
+    # Clients drop the comments of a deleted issue along with it.
+    if not _deleted_with(origin, Issue, instance.issue_id):
+        project_id = _comment_project_id(instance, origin)
+        if project_id is not None and not _deleted_with(origin, Project, project_id):
+            record_changes(
+                saved=[(project_id, Change.ISSUE, instance.issue_id)],
+                deleted=[(project_id, Change.COMMENT, instance.pk)],
+            )
+
+
+@receiver(pre_delete, sender=User)
+def touch_assigned_issues(sender, instance, **kwargs):
+    """
+    Deleting a user sets the assignee of their issues to NULL with an UPDATE
+    that sends no signal: bump updated_time so list versions and ETags change,
+    and log the issues for the sync endpoint. Issues deleted along with the
+    user are left to their own signals.
+    """
+    issues = Issue.objects.filter(assignee=instance).exclude(author=instance).exclude(project__author=instance)
+    rows = list(issues.values_list('project_id', 'pk'))
+    if rows:
+        Issue.objects.filter(pk__in=[pk for _, pk in rows]).update(updated_time=timezone.now())
+        record_changes(saved=[(project_id, Change.ISSUE, pk) for project_id, pk in rows])
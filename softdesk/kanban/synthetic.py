@@ -0,0 +1,160 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User
+from . import changes, counters, search
+from .importer import keep_created_time
+from .models import Project, Contributor, Issue, Comment, Change
+
+WORDS = (
+    'api', 'authentification', 'base', 'bouton', 'cache', 'client', 'commande', 'connexion', 'crash',
+    'déploiement', 'écran', 'erreur', 'export', 'filtre', 'formulaire', 'image', 'import', 'journal',
+    'lenteur', 'liste', 'mise', 'mobile', 'notification', 'page', 'paiement', 'performance', 'profil',
+    'recherche', 'requête', 'serveur', 'session', 'synchronisation', 'tableau', 'test', 'ticket', 'token',
+    'traduction', 'utilisateur', 'validation', 'version',
+)
+
+# Relative weights of the issue choices, closer to a real backlog than a uniform draw.
+STATUS_WEIGHTS = {'TODO': 5, 'IN_PROGRESS': 2, 'FINISHED': 3}
+PRIORITY_WEIGHTS = {'LOW': 5, 'MEDIUM': 3, 'HIGH': 1}
+TAG_WEIGHTS = {'BUG': 3, 'FEATURE': 2, 'TASK': 5}
+
+# Every synthetic account shares this password.
+PASSWORD = 'synthetic-password'
+
+
+class Dataset:
+    """
+    Rows created by generate_dataset(). `users[0]` authors `projects[0]`
+    and contributes to every project, so it sees the whole dataset.
+    """
+
+    def __init__(self, users, projects, contributors, issues, comments):
+        self.users = users
+        self.projects = projects
+        self.contributors = contributors
+        self.issues = issues
+        self.comments = comments
+
+    def counts(self):
+        return {
+            name: len(getattr(self, name)) for name in ('users', 'projects', 'contributors', 'issues', 'comments')
+        }
+
+
+class DatasetGenerator:
+    """
+    Build a reproducible dataset: the same seed and scale always produce the
+    same rows (apart from primary keys, dates relative to now and password
+    salts). Rows are written with bulk_create, then the counters, the
+    search index and the change log are updated as the import does.
+    """
+
+    def __init__(self, users=50, projects=10, contributors=5, issues=50, comments=3, seed=0, prefix='synthetic'):
+        self.scale = {
+            'users': max(users, 1), 'projects': projects, 'contributors': contributors,
+            'issues': issues, 'comments': comments,
+        }
+        self.random = random.Random(seed)
+        self.prefix = prefix
+        self.now = timezone.now()
+
+    def words(self, low, high):
+        return ' '.join(self.random.choice(WORDS) for _ in range(self.random.randint(low, high)))
+
+    def choice(self, weights):
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def created_time(self, after, days=365):
+        """
+        Return a creation date between `after` and now, in the last `days` days.
+        """
+        start = max(after, self.now - timedelta(days=days))
+        return start + (self.now - start) * self.random.random()
+
+    @transaction.atomic
+    def generate(self):
+        scale = self.scale
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            User(
+                username=f'{self.prefix}-{number}', email=f'{self.prefix}-{number}@example.com',
+                password=password, age=self.random.randint(18, 65),
+                can_be_contacted=self.random.random() < 0.5, can_data_be_shared=self.random.random() < 0.3,
+            )
+            for number in range(scale['users'])
+        )
+
+        with keep_created_time():
+            projects = Project.objects.bulk_create(
+                Project(
+                    title=self.words(2, 4).capitalize(), description=self.words(10, 60),
+                    type=self.random.choice(Project.TYPE_CHOICES)[0],
+                    author=users[0] if number == 0 else self.random.choice(users),
+                    created_time=self.created_time(self.now - timedelta(days=365)),
+                )
+                for number in range(scale['projects'])
+            )
+
+            members = {}
+            contributors = []
+            for project in projects:
+                required = list(dict.fromkeys([project.author, users[0]]))
+                others = [user for user in users if user not in required]
+                chosen = self.random.sample(others, min(len(others), max(scale['contributors'] - len(required), 0)))
+                members[project.pk] = required + chosen
+                contributors.extend(
+                    Contributor(user=user, project=project, created_time=self.created_time(project.created_time))
+                    for user in members[project.pk]
+                )
+            contributors = Contributor.objects.bulk_create(contributors)
+            contributor_of = {(row.project_id, row.user_id): row for row in contributors}
+
+            issues = Issue.objects.bulk_create(
+                Issue(
+                    title=self.words(3, 8).capitalize(), description=self.words(20, 200),
+                    project=project, author=self.random.choice(members[project.pk]),
+                    assignee=self.random.choice(members[project.pk]) if self.random.random() < 0.7 else None,
+                    status=self.choice(STATUS_WEIGHTS), priority=self.choice(PRIORITY_WEIGHTS),
+                    tag=self.choice(TAG_WEIGHTS), created_time=self.created_time(project.created_time),
+                )
+                for project in projects
+                for _ in range(scale['issues'])
+            )
+
+            comments = []
+            for issue in issues:
+                for _ in range(self.random.randint(0, 2 * scale['comments'])):
+                    author = self.random.choice(members[issue.project_id])
+                    comment = Comment(
+                        description=self.words(5, 80), issue=issue,
+                        author=contributor_of[issue.project_id, author.pk],
+                        created_time=self.created_time(issue.created_time),
+                    )
+                    comment.project_id = issue.project_id
+                    comments.append(comment)
+            Comment.objects.bulk_create(comments)
+
+        # bulk_create sends no signal: derived data is rebuilt as after an import.
+        counters.rebuild_project_counters([project.pk for project in projects])
+        counters.rebuild_issue_counters([issue.pk for issue in issues])
+        backend = search.get_backend()
+        backend.index_issues(issues)
+        backend.index_comments(comments)
+        changes.record_changes(saved=[
+            *((row.project_id, Change.CONTRIBUTOR, row.pk) for row in contributors),
+            *((issue.project_id, Change.ISSUE, issue.pk) for issue in issues),
+            *((comment.project_id, Change.COMMENT, comment.pk) for comment in comments),
+        ])
+        return Dataset(users, projects, contributors, issues, comments)
+
+
+def generate_dataset(**scale):
+    """
+    Create a synthetic dataset, see DatasetGenerator for the parameters.
+    """
+    return DatasetGenerator(**scale).generate()
@@ -1,3 +1,1677 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.db import DatabaseError, connection, connections, models, router
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from softdesk.database import database_settings, replica_aliases
+from users.models import User
+from users import urls as users_urls
+from users.serializer import ClaimsTokenObtainPairSerializer
+from .models import Project, Contributor, Issue, Comment, Change, Job
+from .pagination import ActivityKeysetPagination, CreatedTimeCursorPagination
+from .routers import ReplicaRoutingMiddleware
+from . import deletion, events, jobs, membership, metrics, response_cache, routers, search, urls as kanban_urls
+from .benchmark import ENDPOINTS, UNTIMED_ENDPOINTS, ApiBenchmark
+from .synthetic import generate_dataset
+from .membership import membership_cache, MembershipCache, get_contributor
+from .views import ProjectViewSet, IssueViewSet, CommentViewSet, MyActivityView
+
+
+class KanbanTestCase(TestCase):
+    """
+    Base test case creating an author with one project they contribute to.
+    """
+
+    def setUp(self):
+        membership_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.project = Project.objects.create(
+            title='Projet', description='Description', type='BACKEND', author=self.user
+        )
+        self.contributor = Contributor.objects.create(user=self.user, project=self.project)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_issues(self, count, **kwargs):
+        return [
+            Issue.objects.create(
+                title=f'Issue {i}', description='Description', project=self.project,
+                author=self.user, **kwargs
+            )
+            for i in range(count)
+        ]
+
+
+class CursorPaginationTests(KanbanTestCase):
+
+    def walk(self, url):
+        """
+        Follow the `next` links from `url` and return every row id seen.
+        """
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_issue_list_is_paginated_in_creation_order(self):
+        issues = self.create_issues(7)
+        url = f'/api/projects/{self.project.id}/issues/?page_size=3'
+
+        response = self.client.get(url)
+
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(self.walk(url), [issue.id for issue in issues])
+
+    def test_page_size_is_capped(self):
+        self.create_issues(3)
+        with mock.patch.object(CreatedTimeCursorPagination, 'max_page_size', 2):
+            response = self.client.get(f'/api/projects/{self.project.id}/issues/?page_size=100')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_comment_list_with_uuid_keys(self):
+        issue = self.create_issues(1)[0]
+        comments = [
+            Comment.objects.create(description=f'Comment {i}', issue=issue, author=self.contributor)
+            for i in range(5)
+        ]
+        url = f'/api/projects/{self.project.id}/issues/{issue.id}/comments/?page_size=2'
+
+        self.assertEqual(self.walk(url), [str(comment.id) for comment in comments])
+
+    def test_project_and_contributor_lists_are_paginated(self):
+        for url in ('/api/projects/', f'/api/projects/{self.project.id}/contributors/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('next', response.data)
+            self.assertEqual(len(response.data['results']), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite.')
+class QueryPlanTests(KanbanTestCase):
+    """
+    Guards the indexes added for the hot kanban access paths by checking
+    that SQLite actually picks them.
+    """
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'INDEX {index_name}', plan)
+
+    def test_issue_list_by_project(self):
+        queryset = Issue.objects.filter(project_id=self.project.id).order_by('created_time', 'id')
+        self.assertUsesIndex(queryset, 'issue_project_list_idx')
+
+    def test_issue_list_by_project_and_status(self):
+        queryset = Issue.objects.filter(project_id=self.project.id, status='TODO').order_by('created_time')
+        self.assertUsesIndex(queryset, 'issue_project_status_idx')
+
+    def test_comment_list_by_issue(self):
+        queryset = Comment.objects.filter(issue_id=1).order_by('created_time', 'id')
+        self.assertUsesIndex(queryset, 'comment_issue_list_idx')
+
+    def test_contributor_list_by_project(self):
+        queryset = Contributor.objects.filter(project_id=self.project.id).order_by('created_time', 'id')
+        self.assertUsesIndex(queryset, 'contributor_project_list_idx')
+
+    def test_contributor_membership_check(self):
+        queryset = Contributor.objects.filter(user=self.user, project_id=self.project.id)
+        # Served by the unique index behind unique_together = ('user', 'project').
+        self.assertUsesIndex(queryset.values('pk'), 'kanban_contributor_user_id_project_id')
+
+    def test_assigned_issues_feed(self):
+        queryset = Issue.objects.filter(assignee=self.user).order_by('-created_time', '-id')
+        self.assertUsesIndex(queryset, 'issue_assignee_feed_idx')
+
+    def test_activity_feed_walks_the_latest_changes_of_each_project(self):
+        queryset = Issue.objects.filter(project_id=self.project.id).order_by('-updated_time', '-id')[:51]
+        plan = queryset.explain()
+        self.assertIn('INDEX issue_project_updated_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_project_list_uses_an_index_on_both_sides(self):
+        queryset = Project.objects.filter(
+            models.Q(author=self.user)
+            | models.Q(id__in=Contributor.objects.filter(user=self.user).values('project_id'))
+        )
+        plan = queryset.explain()
+        self.assertIn('MULTI-INDEX OR', plan)
+        self.assertNotIn('SCAN kanban_project', plan)
+
+
+class WriteQueryCountTests(KanbanTestCase):
+    """
+    Pins the number of queries of each write endpoint so permission checks
+    or serializers cannot silently reintroduce per-request lazy FK fetches.
+    Authentication is forced, so the counts exclude the user lookup.
+    The membership cache is cleared before each test, so the counts include
+    one contributor lookup per request where one is needed.
+    Indexing an issue or comment for search costs four more statements.
+    Logging a write for the sync endpoint costs one more INSERT.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='other')
+        self.issue = self.create_issues(1)[0]
+        self.comment = Comment.objects.create(
+            description='Comment', issue=self.issue, author=self.contributor
+        )
+        self.project_url = f'/api/projects/{self.project.id}/'
+        self.issue_url = f'{self.project_url}issues/{self.issue.id}/'
+        self.comment_url = f'{self.issue_url}comments/{self.comment.id}/'
+
+    def assertQueries(self, num, method, url, data=None, status_code=200):
+        with self.assertNumQueries(num):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, status_code, response.data)
+
+    def test_project_create(self):
+        data = {'title': 'Nouveau', 'description': 'Description', 'type': 'IOS'}
+        self.assertQueries(4, 'post', '/api/projects/', data, status_code=201)
+
+    def test_project_update(self):
+        self.assertQueries(2, 'patch', self.project_url, {'title': 'Renommé'})
+
+    def test_project_delete(self):
+        # The project, then the deleting flag, a pending delete job and the job INSERT in a
+        # savepoint: the cascade runs on the worker.
+        self.assertQueries(6, 'delete', self.project_url, status_code=202)
+
+    def test_contributor_create(self):
+        url = f'{self.project_url}contributors/'
+        self.assertQueries(5, 'post', url, {'user': self.other.id}, status_code=201)
+
+    def test_contributor_delete(self):
+        contributor = Contributor.objects.create(user=self.other, project=self.project)
+        url = f'{self.project_url}contributors/{contributor.id}/'
+        self.assertQueries(5, 'delete', url, status_code=204)
+
+    def test_issue_create(self):
+        data = {'title': 'Issue', 'description': 'Description', 'assignee': self.user.id}
+        self.assertQueries(9, 'post', f'{self.project_url}issues/', data, status_code=201)
+
+    def test_issue_update(self):
+        # The save reads the stored status under a row lock in its own savepoint.
+        self.assertQueries(12, 'patch', self.issue_url, {'title': 'Renommée', 'assignee': self.user.id})
+
+    def test_issue_delete(self):
+        self.assertQueries(10, 'delete', self.issue_url)
+
+    def test_comment_create(self):
+        url = f'{self.issue_url}comments/'
+        self.assertQueries(9, 'post', url, {'description': 'Commentaire'}, status_code=201)
+
+    def test_comment_update(self):
+        self.assertQueries(7, 'patch', self.comment_url, {'description': 'Modifié'})
+
+    def test_comment_delete(self):
+        self.assertQueries(6, 'delete', self.comment_url)
+
+
+class IsAuthorOrReadOnlyTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='other')
+        self.other_contributor = Contributor.objects.create(user=self.other, project=self.project)
+        self.issue = self.create_issues(1)[0]
+        self.client.force_authenticate(self.other)
+
+    def comment_url(self, comment):
+        return f'/api/projects/{self.project.id}/issues/{self.issue.id}/comments/{comment.id}/'
+
+    def test_comment_author_can_edit_own_comment(self):
+        comment = Comment.objects.create(
+            description='Comment', issue=self.issue, author=self.other_contributor
+        )
+        response = self.client.patch(self.comment_url(comment), {'description': 'Modifié'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_contributor_cannot_edit_comment_of_someone_else(self):
+        comment = Comment.objects.create(
+            description='Comment', issue=self.issue, author=self.contributor
+        )
+        response = self.client.patch(self.comment_url(comment), {'description': 'Modifié'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_contributor_cannot_edit_issue_of_someone_else(self):
+        response = self.client.patch(
+            f'/api/projects/{self.project.id}/issues/{self.issue.id}/', {'title': 'Renommée'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class MembershipCacheTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='other')
+        self.request = mock.Mock(user=self.user, spec=['user'])
+
+    def test_lookup_is_memoized_per_request_and_process(self):
+        with self.assertNumQueries(1):
+            contributor = get_contributor(self.request, self.project.id)
+            self.assertEqual(get_contributor(self.request, str(self.project.id)), contributor)
+        self.assertEqual(contributor.id, self.contributor.id)
+
+        with self.assertNumQueries(0):
+            get_contributor(mock.Mock(user=self.user, spec=['user']), self.project.id)
+
+    def test_non_contributors_are_cached_too(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_contributor(self.request, self.project.id, user_id=self.other.id))
+            self.assertIsNone(get_contributor(self.request, self.project.id, user_id=self.other.id))
+
+    def test_contributor_signals_invalidate_the_cache(self):
+        request = mock.Mock(user=self.other, spec=['user'])
+        self.assertIsNone(get_contributor(request, self.project.id))
+
+        contributor = Contributor.objects.create(user=self.other, project=self.project)
+        request = mock.Mock(user=self.other, spec=['user'])
+        self.assertEqual(get_contributor(request, self.project.id).id, contributor.id)
+
+        contributor.delete()
+        request = mock.Mock(user=self.other, spec=['user'])
+        self.assertIsNone(get_contributor(request, self.project.id))
+
+    def test_entries_expire_and_are_evicted(self):
+        cache = MembershipCache(max_size=2, ttl=30)
+        cache.set((1, 1), 10)
+        cache.set((1, 2), 20)
+        cache.get((1, 1))
+        cache.set((1, 3), 30)
+        self.assertEqual(cache.get((1, 1)), 10)
+        self.assertEqual(cache.get((1, 3)), 30)
+        self.assertIs(cache.get((1, 2)), membership._MISSING)
+
+        with mock.patch('kanban.membership.time.monotonic', return_value=10 ** 9):
+            self.assertIs(cache.get((1, 1)), membership._MISSING)
+
+
+class BulkIssueTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/projects/{self.project.id}/issues/bulk/'
+        self.outsider = User.objects.create_user(username='outsider')
+
+    def test_bulk_create_reports_each_item(self):
+        data = [
+            {'title': 'A', 'description': 'Description', 'assignee': self.user.id},
+            {'title': 'B', 'description': 'Description', 'assignee': self.outsider.id},
+            {'description': 'Sans titre'},
+        ]
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, [201, 400, 400])
+        self.assertIn('assignee', response.data['results'][1]['errors'])
+        created = response.data['results'][0]['data']
+        self.assertEqual(created['author'], self.user.id)
+        self.assertEqual(list(Issue.objects.values_list('id', flat=True)), [created['id']])
+
+    def test_bulk_create_uses_a_fixed_number_of_queries(self):
+        assignee = User.objects.create_user(username='assignee')
+        Contributor.objects.create(user=assignee, project=self.project)
+        data = [
+            {'title': f'Issue {i}', 'description': 'Description', 'assignee': (self.user, assignee)[i % 2].id}
+            for i in range(90)
+        ]
+        # Membership of the request user, of all the assignees, then one INSERT, one counter
+        # UPDATE, the four search index statements and the change log INSERT wrapped in a savepoint.
+        with self.assertNumQueries(11):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Issue.objects.filter(project=self.project, assignee=assignee).count(), 45)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_issue_count, 90)
+
+    def test_bulk_status_transitions(self):
+        issues = self.create_issues(3)
+        data = [{'id': issue.id, 'status': 'FINISHED'} for issue in issues[:2]]
+        data.append({'id': 0, 'status': 'FINISHED'})
+
+        # Membership, issue lookup, then the locked status read, the issue and counter UPDATEs
+        # and the change log INSERT wrapped in a savepoint.
+        with self.assertNumQueries(8):
+            response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 200, 404])
+        self.assertEqual(
+            list(Issue.objects.order_by('id').values_list('status', flat=True)),
+            ['FINISHED', 'FINISHED', 'TODO']
+        )
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_issue_count, self.project.finished_issue_count), (1, 2))
+
+    def test_bulk_update_checks_object_permissions(self):
+        self.outsider_contributor = Contributor.objects.create(user=self.outsider, project=self.project)
+        issue = self.create_issues(1)[0]
+        self.client.force_authenticate(self.outsider)
+
+        response = self.client.patch(self.url, [{'id': issue.id, 'status': 'FINISHED'}], format='json')
+
+        self.assertEqual(response.data['results'][0]['status'], 403)
+        issue.refresh_from_db()
+        self.assertEqual(issue.status, 'TODO')
+
+    def test_non_contributor_is_rejected(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post(self.url, [{'title': 'A', 'description': 'D'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Issue.objects.exists())
+
+
+class ProjectBoardTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/projects/{self.project.id}/board/'
+
+    def test_board_groups_issues_by_status_with_counts(self):
+        self.create_issues(3, status='TODO', priority='HIGH')
+        self.create_issues(2, status='IN_PROGRESS', tag='BUG')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['counts']['status'], {'TODO': 3, 'IN_PROGRESS': 2, 'FINISHED': 0})
+        self.assertEqual(response.data['counts']['priority'], {'LOW': 2, 'MEDIUM': 0, 'HIGH': 3})
+        self.assertEqual(response.data['counts']['tag'], {'BUG': 2, 'FEATURE': 0, 'TASK': 3})
+        columns = response.data['columns']
+        self.assertEqual(len(columns['TODO']['results']), 3)
+        self.assertTrue(all(issue['status'] == 'IN_PROGRESS' for issue in columns['IN_PROGRESS']['results']))
+        self.assertEqual(columns['FINISHED']['results'], [])
+
+    def test_columns_are_paginated_separately(self):
+        self.create_issues(3, status='TODO')
+        self.create_issues(1, status='FINISHED')
+
+        response = self.client.get(f'{self.url}?page_size=2')
+        columns = response.data['columns']
+        self.assertIn('todo_cursor=', columns['TODO']['next'])
+        self.assertIsNone(columns['FINISHED']['next'])
+
+        response = self.client.get(columns['TODO']['next'])
+        self.assertEqual(len(response.data['columns']['TODO']['results']), 1)
+        self.assertEqual(len(response.data['columns']['FINISHED']['results']), 1)
+
+    def test_query_count_does_not_depend_on_issue_count(self):
+        # Project lookup, aggregate counts, then one query per column.
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+        self.create_issues(20, status='IN_PROGRESS')
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+
+class SparseFieldsetTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1, assignee=self.user)[0]
+        self.comment = Comment.objects.create(description='Comment', issue=self.issue, author=self.contributor)
+        self.url = f'/api/projects/{self.project.id}/issues/'
+
+    def test_fields_trim_the_output_and_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.url}?fields=id,title,status,assignee')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.issue.id, 'title': self.issue.title, 'status': 'TODO', 'assignee': self.user.id}]
+        )
+        self.assertNotIn('"description"', queries[-1]['sql'])
+
+    def test_omit_on_detail_defers_the_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.url}{self.issue.id}/?omit=description,comment_count')
+        self.assertNotIn('description', response.data)
+        self.assertIn('title', response.data)
+        self.assertNotIn('"description"', queries[-1]['sql'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(f'{self.url}?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_values_path_renders_like_the_serializer(self):
+        for viewset, url in (
+            (IssueViewSet, self.url),
+            (CommentViewSet, f'{self.url}{self.issue.id}/comments/'),
+        ):
+            lean = self.client.get(url).content
+            cache.clear()
+            with mock.patch.object(viewset, 'values_list', False):
+                full = self.client.get(url).content
+            self.assertEqual(lean, full)
+
+    def test_board_accepts_fields(self):
+        response = self.client.get(f'/api/projects/{self.project.id}/board/?fields=id,title')
+        self.assertEqual(response.data['columns']['TODO']['results'], [{'id': self.issue.id, 'title': self.issue.title}])
+
+
+class ExportTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(5)
+        for issue in self.issues[:2]:
+            Comment.objects.create(description=f'Comment on {issue.title}', issue=issue, author=self.contributor)
+        self.url = f'/api/projects/{self.project.id}/export/'
+
+    def export(self, query=''):
+        response = self.client.get(f'{self.url}{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_with_comments_matches_the_api_rendering(self):
+        response, content = self.export('?comments=true')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([line['id'] for line in lines], [issue.id for issue in self.issues])
+        self.assertEqual(len(lines[0]['comments']), 1)
+        self.assertEqual(lines[4]['comments'], [])
+
+        detail = self.client.get(f'/api/projects/{self.project.id}/issues/{self.issues[0].id}/')
+        self.assertEqual({key: value for key, value in lines[0].items() if key != 'comments'}, detail.json())
+
+    def test_csv_lists_comments_after_their_issue(self):
+        response, content = self.export('?output=csv&comments=1')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['type'] for row in rows[:3]], ['issue', 'comment', 'issue'])
+        self.assertEqual(rows[1]['issue'], str(self.issues[0].id))
+        self.assertEqual(len(rows), 7)
+
+    def test_queries_grow_with_chunks_not_rows(self):
+        with mock.patch.object(ProjectViewSet, 'export_chunk_size', 2):
+            with self.assertNumQueries(5):
+                # The project, one issue iterator, then the comments of each of the 3 chunks.
+                self.export('?comments=true')
+
+    def test_unknown_output_and_invisible_project(self):
+        self.assertEqual(self.client.get(f'{self.url}?output=xml').status_code, 400)
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class JobTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(3)
+        for issue in self.issues[:2]:
+            Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        self.project_url = f'/api/projects/{self.project.id}/'
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        settings_override = override_settings(KANBAN_JOB_EXPORT_DIR=export_dir.name, KANBAN_JOB_BATCH_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def accepted(self, response):
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Location'], response.data['job']['url'])
+        return response.data['job']
+
+    def test_project_delete_runs_on_the_worker_in_batches(self):
+        job = self.accepted(self.client.delete(self.project_url))
+        self.assertEqual(self.accepted(self.client.delete(self.project_url))['id'], job['id'])
+        self.assertEqual(job['status'], Job.QUEUED)
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        for model in (Issue, Comment, Contributor, Change):
+            self.assertFalse(model.objects.exists())
+        job = self.client.get(job['url']).data
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(
+            {name: job['result'][name] for name in ('comments', 'issues', 'contributors', 'projects')},
+            {'comments': 2, 'issues': 3, 'contributors': 1, 'projects': 1}
+        )
+        self.assertEqual(job['progress'], job['result'])
+
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        self.assertEqual(self.client.get(job['url']).status_code, 404)
+
+    def test_project_is_hidden_once_its_deletion_is_queued(self):
+        issues_url = f'{self.project_url}issues/'
+        self.assertEqual(len(self.client.get(issues_url).data['results']), 3)
+        job = self.accepted(self.client.delete(self.project_url))
+
+        self.assertEqual(self.client.get(self.project_url).status_code, 404)
+        self.assertEqual(self.client.get('/api/projects/').data['results'], [])
+        self.assertEqual(self.client.get(f'{issues_url}{self.issues[0].id}/').status_code, 404)
+        self.assertEqual(self.client.get(issues_url).data['results'], [])
+        response = self.client.post(issues_url, {'title': 'Nouvelle', 'description': 'Description'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.accepted(self.client.delete(self.project_url))['id'], job['id'])
+
+        # A row written by a request that still saw the project is swept with it.
+        Issue.objects.create(title='Tardive', description='Description', project=self.project, author=self.user)
+        jobs.run_pending()
+        self.assertEqual(self.client.get(job['url']).data['status'], Job.SUCCEEDED)
+        self.assertFalse(Issue.objects.exists())
+
+    def test_export_job_matches_the_streamed_export(self):
+        streamed = b''.join(self.client.get(f'{self.project_url}export/?comments=true').streaming_content)
+        job = self.accepted(self.client.post(f'{self.project_url}export/?comments=true'))
+        self.assertIsNone(job['download'])
+        self.assertEqual(self.client.get(f"{job['url']}download/").status_code, 409)
+
+        jobs.run_pending()
+        job = self.client.get(job['url']).data
+        self.assertEqual(job['result']['issues'], 3)
+        response = self.client.get(job['download'])
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(b''.join(response.streaming_content), streamed)
+
+    def test_counter_rebuild_job(self):
+        Project.objects.filter(pk=self.project.pk).update(todo_issue_count=0, contributor_count=9)
+        Issue.objects.filter(pk=self.issues[0].pk).update(comment_count=5)
+        self.accepted(self.client.post(f'{self.project_url}rebuild-counters/'))
+        jobs.run_pending()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_issue_count, self.project.contributor_count), (3, 1))
+        self.assertEqual(Issue.objects.get(pk=self.issues[0].pk).comment_count, 1)
+
+        member = User.objects.create_user(username='member')
+        Contributor.objects.create(user=member, project=self.project)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.post(f'{self.project_url}rebuild-counters/').status_code, 403)
+
+    @override_settings(KANBAN_JOB_MAX_ATTEMPTS=2)
+    def test_failed_jobs_are_retried_then_marked_failed(self):
+        def fail(job, checkpoint):
+            raise ValueError("Boom")
+
+        job = jobs.enqueue(Job.REBUILD_COUNTERS)
+        with mock.patch.dict(jobs._handlers, {Job.REBUILD_COUNTERS: fail}), self.assertLogs('kanban.jobs'):
+            self.assertEqual(jobs.run_pending(), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.error), (Job.QUEUED, 1, 'ValueError: Boom'))
+            # Not retried before the delay.
+            self.assertEqual(jobs.run_pending(), 0)
+            Job.objects.filter(pk=job.pk).update(run_after=job.created_time)
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_expired_lease_is_taken_over(self):
+        jobs.enqueue(Job.REBUILD_COUNTERS)
+        job = jobs.claim('first')
+        self.assertIsNone(jobs.claim('second'))
+
+        Job.objects.filter(pk=job.pk).update(lease_expires=job.created_time)
+        taken = jobs.claim('second')
+        self.assertEqual((taken.pk, taken.attempts), (job.pk, 2))
+        with self.assertRaises(jobs.LeaseLost):
+            jobs.checkpoint(job, {})
+        jobs.run(taken.pk)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.SUCCEEDED)
+
+    def test_run_jobs_command(self):
+        jobs.enqueue(Job.DELETE_PROJECT, project_id=self.project.pk)
+        call_command('run_jobs', processes=0, once=True, stderr=io.StringIO())
+        self.assertFalse(Project.objects.exists())
+
+    def test_run_jobs_survives_a_dead_process(self):
+        pools = []
+
+        class Pool:
+            # The first pool loses its process, the next ones run the jobs in this process.
+            def __init__(self, *args, **kwargs):
+                self.broken = not pools
+                pools.append(self)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def submit(self, function, *args):
+                future = Future()
+                if self.broken:
+                    future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+                else:
+                    future.set_result(function(*args))
+                return future
+
+        job = jobs.enqueue(Job.DELETE_PROJECT, project_id=self.project.pk)
+        with mock.patch('kanban.management.commands.run_jobs.ProcessPoolExecutor', Pool), \
+                self.assertLogs('kanban.management.commands.run_jobs', 'ERROR'):
+            call_command('run_jobs', processes=2, once=True, stderr=io.StringIO())
+            self.assertEqual(len(pools), 2)
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.RUNNING)
+
+            # The job is resumed once its lease expires.
+            Job.objects.filter(pk=job.pk).update(lease_expires=job.created_time)
+            call_command('run_jobs', processes=2, once=True, stderr=io.StringIO())
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.SUCCEEDED)
+        self.assertFalse(Project.objects.exists())
+
+
+class DeletionTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue, self.other = self.create_issues(2)
+        for issue, count in ((self.issue, 5), (self.other, 1)):
+            for _ in range(count):
+                Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+
+    def comment_deletes(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('DELETE FROM "kanban_comment"')]
+
+    def test_issue_comments_are_deleted_in_batches_without_loading_them(self):
+        url = f'/api/projects/{self.project.id}/issues/{self.issue.id}/'
+        with mock.patch.object(IssueViewSet, 'delete_batch_size', 2), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(url)
+        self.assertEqual(response.data, {"message": f"L'issue {self.issue.id} a été correctement supprimée."})
+        self.assertEqual(len(self.comment_deletes(queries)), 3)
+        self.assertIn('LIMIT 2', self.comment_deletes(queries)[0])
+
+        self.assertEqual(list(Comment.objects.values_list('issue_id', flat=True)), [self.other.id])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_issue_count, 1)
+        self.assertTrue(Change.objects.filter(kind=Change.ISSUE, object_id=str(self.issue.id), deleted=True).exists())
+        results = search.get_backend().search(self.user.id, 'Comment', 10)
+        self.assertEqual({result['issue'] for result in results}, {self.other.id})
+
+    def test_failed_issue_delete_accounts_for_the_deleted_comments(self):
+        comment_ids = {str(pk) for pk in Comment.objects.filter(issue=self.issue).values_list('id', flat=True)}
+        with mock.patch.object(Issue, 'delete', side_effect=DatabaseError('locked')), \
+                self.assertRaises(DatabaseError):
+            deletion.delete_issue(self.issue, batch_size=2)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.comment_count, 0)
+        self.assertFalse(Comment.objects.filter(issue=self.issue).exists())
+        tombstones = Change.objects.filter(kind=Change.COMMENT, deleted=True).values_list('object_id', flat=True)
+        self.assertEqual(set(tombstones), comment_ids)
+        results = search.get_backend().search(self.user.id, 'Comment', 10)
+        self.assertEqual({result['issue'] for result in results}, {self.other.id})
+
+    def test_project_delete_reports_each_batch(self):
+        progress = []
+        with CaptureQueriesContext(connection) as queries:
+            deleted = deletion.delete_project(self.project.id, batch_size=4, on_batch=progress.append)
+        self.assertEqual(
+            deleted, {'comments': 6, 'issues': 2, 'contributors': 1, 'changes': deleted['changes'], 'projects': 1}
+        )
+        self.assertEqual([batch['comments'] for batch in progress[:2]], [4, 6])
+        # Two batches, then the sweep in the transaction deleting the project.
+        self.assertEqual(len(self.comment_deletes(queries)), 3)
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+
+class ImportTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dump = os.path.join(directory.name, 'dump.jsonl')
+        self.checkpoint = os.path.join(directory.name, 'checkpoint')
+        rows = [
+            {'model': 'users.user', 'pk': 1, 'fields': {'username': 'alice', 'password': 'pbkdf2_sha256$1$a$b'}},
+            {'model': 'users.user', 'pk': 2, 'fields': {'username': 'author'}},
+            {'model': 'users.user', 'pk': 3, 'fields': {'username': 'child', 'age': 12}},
+            {'model': 'kanban.project', 'pk': 10, 'fields': {
+                'title': 'Importé', 'description': 'Description', 'type': 'IOS', 'author': 1,
+                'created_time': '2020-01-02T03:04:05Z', 'todo_issue_count': 99,
+            }},
+            {'model': 'kanban.contributor', 'pk': 1, 'fields': {'user': 1, 'project': 10}},
+            {'model': 'kanban.contributor', 'pk': 2, 'fields': {'user': 2, 'project': 10}},
+            {'model': 'kanban.issue', 'pk': 20, 'fields': {
+                'title': 'Migration', 'description': 'Description', 'project': 10, 'author': 1, 'assignee': 2,
+            }},
+            {'model': 'kanban.issue', 'pk': 21, 'fields': {
+                'title': 'Orpheline', 'description': 'Description', 'project': 11, 'author': 1,
+            }},
+            {'model': 'kanban.comment', 'pk': 'x', 'fields': {'description': 'Ancien', 'issue': 20, 'author': 1}},
+        ]
+        with open(self.dump, 'w') as file:
+            file.writelines(json.dumps(row) + '\n' for row in rows)
+
+    def run_import(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            'import_softdesk', self.dump, batch_size=4, checkpoint=self.checkpoint, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_resolves_references_across_batches(self):
+        stdout, stderr = self.run_import()
+        self.assertIn('Imported 6 rows', stdout)
+        self.assertIn('rows/s', stdout)
+        self.assertIn('Line 3 skipped', stderr)
+        self.assertIn('Line 8 skipped: project refers to unknown kanban.project 11', stderr)
+
+        project = Project.objects.get(title='Importé')
+        alice = User.objects.get(username='alice')
+        self.assertEqual(project.author, alice)
+        self.assertEqual(project.created_time.year, 2020)
+        self.assertEqual((project.todo_issue_count, project.contributor_count), (1, 2))
+        issue = Issue.objects.get(project=project)
+        self.assertEqual((issue.assignee, issue.comment_count), (self.user, 1))
+        self.assertEqual(Comment.objects.get(issue=issue).author.user, alice)
+        self.assertFalse(User.objects.filter(username='child').exists())
+
+    def test_restart_resumes_after_the_checkpoint(self):
+        self.run_import()
+        stdout, _ = self.run_import()
+        self.assertIn('Imported 0 rows', stdout)
+        self.assertEqual(Project.objects.filter(title='Importé').count(), 1)
+
+    def test_uncommitted_batch_is_replayed(self):
+        self.run_import()
+        # Simulate a crash after the last checkpoint entry was written.
+        Comment.objects.filter(description='Ancien').delete()
+        stdout, _ = self.run_import()
+        self.assertIn('Imported 1 rows', stdout)
+        self.assertEqual(Comment.objects.filter(description='Ancien').count(), 1)
+
+
+    def test_duplicate_contributors_are_skipped(self):
+        with open(self.dump, 'a') as file:
+            file.writelines(json.dumps(row) + '\n' for row in [
+                {'model': 'kanban.contributor', 'pk': 3, 'fields': {'user': 1, 'project': 10}},
+                {'model': 'kanban.contributor', 'pk': 4, 'fields': {'user': 1, 'project': 10}},
+            ])
+        stdout, stderr = self.run_import()
+        self.assertIn('Imported 6 rows', stdout)
+        self.assertIn('Line 10 skipped: kanban.contributor with this user, project already exists', stderr)
+        self.assertIn('Line 11 skipped', stderr)
+        self.assertEqual(Contributor.objects.filter(project__title='Importé').count(), 2)
+
+class AsyncReadTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(3)
+        self.comment = Comment.objects.create(description='Comment', issue=self.issues[0], author=self.contributor)
+        self.async_client = AsyncClient()
+        self.token = str(AccessToken.for_user(self.user))
+        self.issues_path = f'projects/{self.project.id}/issues/'
+
+    async def test_list_pages_match_the_viewset_rendering(self):
+        response = await self.aget(f'/api/async/{self.issues_path}?page_size=2')
+        self.assertEqual(response.status_code, 200)
+        first = response.json()
+        self.assertEqual(list(first), list((await self.sync_get(f'/api/{self.issues_path}')).json()))
+        self.assertIsNone(first['previous'])
+        second = (await self.aget(first['next'])).json()
+        self.assertIsNone(second['next'])
+
+        expected = (await self.sync_get(f'/api/{self.issues_path}')).json()['results']
+        self.assertEqual(first['results'] + second['results'], expected)
+
+        # Going back from the second page gives the first page and its links again.
+        back = (await self.aget(second['previous'])).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+        self.assertEqual((await self.aget(back['next'])).json(), second)
+
+    async def test_detail_and_fieldsets(self):
+        comment_path = f'{self.issues_path}{self.issues[0].id}/comments/{self.comment.id}/'
+        response = await self.aget(f'/api/async/{comment_path}')
+        self.assertEqual(response.json(), (await self.sync_get(f'/api/{comment_path}')).json())
+
+        response = await self.aget(f'/api/async/{self.issues_path}{self.issues[1].id}/?fields=id,title')
+        self.assertEqual(response.json(), {'id': self.issues[1].id, 'title': self.issues[1].title})
+        response = await self.aget(f'/api/async/{self.issues_path}?fields=secret')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_authentication_and_project_visibility(self):
+        self.assertEqual((await AsyncClient().get('/api/async/projects/')).status_code, 401)
+        self.assertEqual((await self.aget('/api/async/projects/', token='invalid')).status_code, 401)
+
+        other = await User.objects.acreate(username='other')
+        hidden = await Project.objects.acreate(title='Caché', description='Description', type='IOS', author=other)
+        response = await self.aget('/api/async/projects/')
+        self.assertEqual([project['id'] for project in response.json()['results']], [self.project.id])
+        self.assertEqual((await self.aget(f'/api/async/projects/{hidden.id}/')).status_code, 404)
+
+    async def aget(self, path, token=None):
+        return await self.async_client.get(path, headers={'Authorization': f'Bearer {token or self.token}'})
+
+    async def sync_get(self, path):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return await sync_to_async(client.get)(path)
+
+
+class EventStreamTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.broker = events.InProcessBroker(replay_size=10)
+        patcher = mock.patch.object(events, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = f'/api/projects/{self.project.id}/events/'
+        self.token = str(AccessToken.for_user(self.user))
+
+    def published(self):
+        return list(self.broker._channel(self.project.id).events)
+
+    def test_writes_publish_events_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = self.create_issues(1)[0]
+            self.assertEqual(self.published(), [])
+            issue.title = 'Renamed'
+            issue.save()
+            issue.status = 'FINISHED'
+            issue.save()
+            Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        published = self.published()
+        self.assertEqual(
+            [event.type for event in published],
+            ['issue.created', 'issue.updated', 'issue.status_changed', 'comment.added']
+        )
+        self.assertEqual(published[1].data['title'], 'Renamed')
+        self.assertEqual((published[2].data['previous_status'], published[2].data['status']), ('TODO', 'FINISHED'))
+        self.assertEqual(published[3].data['issue'], issue.id)
+
+    def test_bulk_writes_publish_events(self):
+        issue = self.create_issues(1)[0]
+        self.broker._channels.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/projects/{self.project.id}/issues/bulk/', [
+                {'title': 'A', 'description': 'D', 'priority': 'LOW', 'tag': 'BUG', 'status': 'TODO'},
+            ], format='json')
+            self.client.patch(f'/api/projects/{self.project.id}/issues/bulk/', [
+                {'id': issue.id, 'status': 'IN_PROGRESS'},
+            ], format='json')
+        self.assertEqual([event.type for event in self.published()], ['issue.created', 'issue.status_changed'])
+
+    async def test_broker_replays_from_last_event_id_or_resets(self):
+        broker = events.InProcessBroker(replay_size=2)
+        published = [broker.publish(1, 'issue.updated', {'id': number}) for number in range(4)]
+
+        listener = broker.listen(1, published[1].id)
+        self.assertEqual([await anext(listener), await anext(listener)], published[2:])
+        # The events after the first one are no longer all buffered.
+        for last_event_id in (published[0].id, 'restarted-2'):
+            reset = await anext(broker.listen(1, last_event_id))
+            self.assertEqual((reset.type, reset.id), ('reset', published[3].id))
+
+    async def test_broker_wakes_listeners_and_sends_keepalives(self):
+        broker = events.InProcessBroker()
+        self.assertIsNone(await anext(broker.listen(1, keepalive=0.01)))
+
+        listeners = [broker.listen(1) for _ in range(3)]
+        waiting = [asyncio.ensure_future(anext(listener)) for listener in listeners]
+        await asyncio.sleep(0)
+        event = await asyncio.to_thread(broker.publish, 1, 'comment.added', {'id': 'uuid'})
+        self.assertEqual(await asyncio.wait_for(asyncio.gather(*waiting), 1), [event] * 3)
+        self.assertEqual(event.encode(), f'id: {event.id}\nevent: comment.added\ndata: {{"id": "uuid"}}\n\n')
+
+    async def test_stream_resumes_after_last_event_id(self):
+        seen = self.broker.publish(self.project.id, 'issue.created', {'id': 1})
+        missed = self.broker.publish(self.project.id, 'issue.updated', {'id': 1})
+        response = await AsyncClient().get(
+            f'{self.path}?access_token={self.token}', headers={'Last-Event-ID': seen.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+        try:
+            self.assertEqual(await anext(content), b'retry: 3000\n\n')
+            self.assertEqual(await anext(content), missed.encode().encode())
+        finally:
+            await content.aclose()
+
+    async def test_stream_requires_a_visible_project_and_asgi(self):
+        self.assertEqual((await AsyncClient().get(self.path)).status_code, 401)
+        other = await User.objects.acreate(username='other')
+        hidden = await Project.objects.acreate(title='Caché', description='Description', type='IOS', author=other)
+        response = await AsyncClient().get(
+            f'/api/projects/{hidden.id}/events/', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 404)
+        client = APIClient()
+        response = await sync_to_async(client.get)(self.path, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 501)
+
+
+    async def test_broker_drops_idle_channels_without_listeners(self):
+        broker = events.InProcessBroker(replay_seconds=60)
+        stale = broker.publish(1, 'issue.updated', {'id': 1})
+        listener = broker.listen(2, keepalive=0.01)
+        self.assertIsNone(await anext(listener))
+        with mock.patch.object(events.time, 'monotonic', return_value=time.monotonic() + 61):
+            broker.publish(3, 'issue.updated', {'id': 3})
+        self.assertEqual(sorted(broker._channels), [2, 3])
+        await listener.aclose()
+        self.assertEqual(broker._channels[2].listeners, 0)
+        # An id of the dropped channel is not mistaken for one of the new channel.
+        broker.publish(1, 'issue.updated', {'id': 1})
+        self.assertEqual((await anext(broker.listen(1, stale.id))).type, 'reset')
+
+    @override_settings(KANBAN_EVENT_KEEPALIVE_SECONDS=0.01)
+    async def test_stream_closes_when_access_is_lost(self):
+        member = await User.objects.acreate(username='member')
+        await Contributor.objects.acreate(user=member, project=self.project)
+        token = AccessToken.for_user(member)
+        response = await AsyncClient().get(f'{self.path}?access_token={token}')
+        content = response.streaming_content
+        self.assertEqual(await anext(content), b'retry: 3000\n\n')
+        self.assertEqual(await anext(content), b': keepalive\n\n')
+        await Contributor.objects.filter(user=member).adelete()
+        self.assertEqual(await anext(content), b'event: close\ndata: {"reason": "not_found"}\n\n')
+        with self.assertRaises(StopAsyncIteration):
+            await anext(content)
+
+        response = await AsyncClient().get(f'{self.path}?access_token={self.token}')
+        content = response.streaming_content
+        self.assertEqual(await anext(content), b'retry: 3000\n\n')
+        expires = AccessToken(self.token)['exp']
+        with mock.patch('kanban.async_views.time.time', return_value=expires):
+            self.assertEqual(await anext(content), b'event: close\ndata: {"reason": "token_expired"}\n\n')
+        await content.aclose()
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+
+    def test_defaults_to_the_local_sqlite_file(self):
+        databases = database_settings({}, '/app')
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(str(databases['default']['NAME']), '/app/db.sqlite3')
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+
+    def test_server_backend_with_pool_and_replicas(self):
+        databases = database_settings({
+            'DB_ENGINE': 'postgresql', 'DB_NAME': 'softdesk', 'DB_HOST': 'primary',
+            'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '20', 'DB_REPLICAS': 'replica-a, replica-b',
+        }, '/app')
+        self.assertEqual(databases['default']['OPTIONS'], {'pool': {'max_size': 20}})
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases['replica_2']['HOST'], 'replica-b')
+        self.assertEqual(replica_aliases(databases), ['replica_1', 'replica_2'])
+
+    def test_persistent_connections_without_pool(self):
+        databases = database_settings({'DB_ENGINE': 'mysql', 'DB_POOL': 'true', 'DB_CONN_MAX_AGE': 'none'}, '/app')
+        self.assertNotIn('OPTIONS', databases['default'])
+        self.assertIsNone(databases['default']['CONN_MAX_AGE'])
+        self.assertTrue(databases['default']['CONN_HEALTH_CHECKS'])
+
+    def test_sqlite_replicas_are_files_mirroring_the_primary_in_tests(self):
+        databases = database_settings({'DB_REPLICAS': '/data/replica.sqlite3'}, '/app')
+        self.assertEqual(databases['replica_1']['NAME'], '/data/replica.sqlite3')
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+
+    def test_tuned_sqlite_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = database_settings({'DB_SQLITE_TUNED': 'true', 'DB_SQLITE_TIMEOUT': '3'}, directory)['default']
+            self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+            self.assertEqual(config['CONN_MAX_AGE'], 60)
+            connection = SQLiteDatabaseWrapper(connections.configure_settings({'default': config})['default'], 'tuned')
+            try:
+                with connection.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        pragmas[pragma] = cursor.fetchone()[0]
+            finally:
+                connection.close()
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 3000, 'cache_size': -65536})
+
+    def test_sqlite_is_untuned_by_default(self):
+        self.assertNotIn('OPTIONS', database_settings({'DB_SQLITE_TUNED': 'false'}, '/app')['default'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = User(id=1, username='author')
+
+    def handle(self, method, view):
+        request = getattr(self.factory, method)('/api/projects/')
+        request.user = self.user
+        result = {}
+        ReplicaRoutingMiddleware(lambda request: result.update(view()) or 'response')(request)
+        return result
+
+    def test_safe_reads_use_one_replica_per_request(self):
+        result = self.handle('get', lambda: {
+            'issues': Issue.objects.all().db, 'comments': Comment.objects.all().db, 'users': User.objects.all().db,
+        })
+        self.assertIn(result['issues'], ['replica_1', 'replica_2'])
+        self.assertEqual(result['comments'], result['issues'])
+        self.assertEqual(result['users'], 'default')
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.assertEqual(self.handle('post', lambda: {'db': Issue.objects.all().db})['db'], 'default')
+
+        def write_then_read():
+            write = router.db_for_write(Issue)
+            return {'write': write, 'read': Issue.objects.all().db}
+
+        self.assertEqual(self.handle('get', write_then_read), {'write': 'default', 'read': 'default'})
+        self.assertEqual(self.handle('get', lambda: {'db': Issue.objects.all().db})['db'], 'default')
+
+        self.user = User(id=2, username='other')
+        self.assertNotEqual(self.handle('get', lambda: {'db': Issue.objects.all().db})['db'], 'default')
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(Issue.objects.all().db, 'default')
+
+    @override_settings(REPLICA_PIN_CACHE_ALIAS='pins', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'pins': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pins'},
+    })
+    def test_pins_are_kept_in_the_configured_cache(self):
+        self.handle('post', lambda: {'write': router.db_for_write(Issue)})
+        self.assertTrue(caches['pins'].get('kanban:replica-pin:1'))
+        self.assertIsNone(caches['default'].get('kanban:replica-pin:1'))
+        self.assertEqual([warning.id for warning in routers.check_pin_cache(None)], ['kanban.W002'])
+        with override_settings(REPLICA_PIN_CACHE_ALIAS='missing'):
+            self.assertEqual([error.id for error in routers.check_pin_cache(None)], ['kanban.E003'])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(routers.check_pin_cache(None), [])
+
+
+class MetricsTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.issue = self.create_issues(1)[0]
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+
+    def scrape(self, user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        response = APIClient().get('/api/metrics/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        if response.status_code != 200:
+            return response.status_code, None
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return response.status_code, samples
+
+    def test_requests_are_recorded_per_url_name(self):
+        url = f'/api/projects/{self.project.id}/issues/'
+        self.client.get(url)
+        self.client.get(f'{url}?page_size=1')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'{url}{self.issue.id}/')
+        detail_queries = len(queries)
+
+        status, samples = self.scrape(self.staff)
+        self.assertEqual(status, 200)
+        labels = '{endpoint="project-issues-list",method="GET"}'
+        self.assertEqual(samples[f'softdesk_request_duration_seconds_count{labels}'], 2)
+        self.assertEqual(
+            samples['softdesk_request_duration_seconds_bucket{endpoint="project-issues-list",method="GET",le="+Inf"}'], 2
+        )
+        self.assertGreater(samples[f'softdesk_db_queries_total{labels}'], 0)
+        self.assertGreater(samples[f'softdesk_serialization_seconds_total{labels}'], 0)
+        detail = '{endpoint="project-issues-detail",method="GET"}'
+        self.assertEqual(samples[f'softdesk_request_duration_seconds_count{detail}'], 1)
+        self.assertEqual(samples[f'softdesk_db_queries_total{detail}'], detail_queries)
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.scrape(self.user)[0], 403)
+        self.assertEqual(APIClient().get('/api/metrics/').status_code, 401)
+
+    @override_settings(KANBAN_SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('kanban.metrics', 'WARNING') as logs:
+            self.client.get(f'/api/projects/{self.project.id}/')
+            samples = self.scrape(self.staff)[1]
+        self.assertIn('(project-detail): 200', logs.output[0])
+        self.assertEqual(samples['softdesk_slow_requests_total{endpoint="project-detail",method="GET"}'], 1)
+
+    def test_shards_of_exited_threads_are_folded(self):
+        registry = metrics.MetricsRegistry()
+
+        def record():
+            registry.record('project-list', 'GET', 0.01, metrics.RequestMetrics())
+
+        for _ in range(20):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        record()
+        self.assertEqual(registry.collect()['project-list', 'GET'].count, 21)
+        # Only the shard of this thread is left.
+        self.assertEqual(len(registry._shards), 1)
+
+
+class BenchmarkTests(TestCase):
+
+    def test_synthetic_dataset_is_reproducible_and_consistent(self):
+        scale = {'users': 8, 'projects': 3, 'contributors': 4, 'issues': 6, 'comments': 2, 'seed': 7}
+        first = generate_dataset(prefix='first', **scale)
+        second = generate_dataset(prefix='second', **scale)
+        self.assertEqual(first.counts(), second.counts())
+        self.assertEqual(first.counts()['contributors'], 12)
+        self.assertEqual([issue.title for issue in first.issues], [issue.title for issue in second.issues])
+
+        for project in Project.objects.filter(pk__in=[project.pk for project in first.projects]):
+            self.assertEqual(project.contributor_count, 4)
+            self.assertEqual(project.todo_issue_count, project.issues.filter(status='TODO').count())
+        issue = first.issues[0]
+        issue.refresh_from_db()
+        self.assertEqual(issue.comment_count, issue.comments.count())
+        # The first user sees every project.
+        self.assertEqual(
+            Contributor.objects.filter(user=first.users[0], project__in=first.projects).count(), 3
+        )
+
+    def test_every_endpoint_is_benchmarked(self):
+        names = {
+            pattern.name for pattern in [*kanban_urls.urlpatterns, *users_urls.urlpatterns]
+        }
+        self.assertEqual({endpoint.name for endpoint in ENDPOINTS}, names - UNTIMED_ENDPOINTS)
+
+    def test_benchmark_reports_latency_queries_and_memory(self):
+        dataset = generate_dataset(users=5, projects=2, contributors=3, issues=5, comments=1)
+        benchmark = ApiBenchmark(dataset, requests=3, warmup=1, memory_requests=1)
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if endpoint.key in ('GET project-issues-list', 'DELETE project-issues-detail')
+        ]
+        results = benchmark.run(endpoints)
+        self.assertEqual(set(results), {'GET project-issues-list', 'DELETE project-issues-detail'})
+        for result in results.values():
+            self.assertEqual(set(result), {'p50_ms', 'p95_ms', 'queries', 'peak_memory_kib'})
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory_kib'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+
+class FeedTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_project = Project.objects.create(
+            title='Autre', description='Description', type='IOS', author=self.user
+        )
+        Contributor.objects.create(user=self.user, project=self.other_project)
+        outsider = User.objects.create_user(username='outsider')
+        self.foreign_project = Project.objects.create(
+            title='Étranger', description='Description', type='IOS', author=outsider
+        )
+        self.first, self.second = [
+            Issue.objects.create(
+                title=title, description='Description', project=project, author=self.user, assignee=self.user
+            )
+            for title, project in (('First', self.project), ('Second', self.other_project))
+        ]
+        self.unassigned = Issue.objects.create(
+            title='Unassigned', description='Description', project=self.project, author=self.user
+        )
+        self.foreign = Issue.objects.create(
+            title='Foreign', description='Description', project=self.foreign_project, author=outsider,
+            assignee=outsider,
+        )
+
+    def test_my_issues_across_projects_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/me/issues/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([issue['id'] for issue in results], [self.second.id, self.first.id])
+        self.assertEqual(results[0]['project'], {'id': self.other_project.id, 'title': 'Autre'})
+        self.assertEqual(results[0]['author'], {'id': self.user.id, 'username': 'author'})
+
+    def test_my_issues_pages(self):
+        response = self.client.get('/api/me/issues/?page_size=1')
+        self.assertEqual([issue['id'] for issue in response.data['results']], [self.second.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([issue['id'] for issue in response.data['results']], [self.first.id])
+        self.assertIsNone(response.data['next'])
+
+    def test_activity_of_my_projects_latest_change_first(self):
+        self.first.title = 'First, updated'
+        self.first.save()
+        # Project ids, merged keys of the page, then the page rows.
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/me/activity/')
+        ids = [issue['id'] for issue in response.data['results']]
+        self.assertEqual(ids, [self.first.id, self.unassigned.id, self.second.id])
+        self.assertNotIn(self.foreign.id, ids)
+
+
+    def test_activity_walk_leaves_out_the_issues_changed_after_it_started(self):
+        def ids(response):
+            return [issue['id'] for issue in response.data['results']]
+
+        response = self.client.get('/api/me/activity/?page_size=1')
+        self.assertEqual(ids(response), [self.unassigned.id])
+        for issue in (self.unassigned, self.first):
+            issue.title += ', modifié'
+            issue.save()
+        walked = []
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            walked += ids(response)
+        # Neither repeated once returned, nor returned when the walk had not reached it yet.
+        self.assertEqual(walked, [self.second.id])
+        self.assertEqual(ids(self.client.get('/api/me/activity/')), [self.first.id, self.unassigned.id, self.second.id])
+
+    def test_activity_pages_merge_the_projects_both_ways(self):
+        def ids(response):
+            return [issue['id'] for issue in response.data['results']]
+
+        expected = [self.unassigned.id, self.second.id, self.first.id]
+        for union_size in (100, 1):
+            with mock.patch.object(ActivityKeysetPagination, 'union_size', union_size):
+                pages = [self.client.get('/api/me/activity/?page_size=1')]
+                while pages[-1].data['next']:
+                    pages.append(self.client.get(pages[-1].data['next']))
+                self.assertEqual([ids(page) for page in pages], [[pk] for pk in expected])
+                back = self.client.get(pages[-1].data['previous'])
+                self.assertEqual(ids(back), [self.second.id])
+                self.assertEqual(ids(self.client.get(back.data['previous'])), [self.unassigned.id])
+
+class ChangesTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(3)
+        self.comment = Comment.objects.create(description='Comment', issue=self.issues[0], author=self.contributor)
+        self.url = f'/api/projects/{self.project.id}/changes/'
+
+    def sync(self, since=None, status_code=200):
+        response = self.client.get(self.url, {} if since is None else {'since': since})
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def test_first_sync_sends_the_whole_project(self):
+        data = self.sync()
+        self.assertEqual([issue['id'] for issue in data['issues']], [issue.id for issue in self.issues])
+        self.assertEqual([comment['id'] for comment in data['comments']], [str(self.comment.id)])
+        self.assertEqual([contributor['id'] for contributor in data['contributors']], [self.contributor.id])
+        self.assertEqual(data['issues'][0]['comment_count'], 1)
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.sync(data['token']), {
+            'token': data['token'], 'has_more': False, 'issues': [], 'comments': [], 'contributors': [],
+            'deleted': {'issues': [], 'comments': [], 'contributors': []},
+        })
+
+    def test_changes_and_tombstones_since_the_token(self):
+        token = self.sync()['token']
+        other = Contributor.objects.create(user=User.objects.create_user(username='other'), project=self.project)
+        self.issues[1].title = 'Renamed'
+        self.issues[1].save()
+        deleted = {'issues': [self.issues[2].id], 'comments': [str(self.comment.id)], 'contributors': []}
+        self.comment.delete()
+        self.issues[2].delete()
+
+        with self.assertNumQueries(4):
+            data = self.sync(token)
+        self.assertEqual([(issue['id'], issue['title']) for issue in data['issues']], [
+            (self.issues[0].id, self.issues[0].title), (self.issues[1].id, 'Renamed'),
+        ])
+        self.assertEqual(data['issues'][0]['comment_count'], 0)
+        self.assertEqual([contributor['id'] for contributor in data['contributors']], [other.id])
+        self.assertEqual(data['deleted'], deleted)
+
+    def test_changes_are_paged(self):
+        Issue.objects.filter(pk=self.issues[0].pk).update(title='Unlogged')
+        with mock.patch.object(ProjectViewSet, 'changes_max_items', 3):
+            first = self.sync()
+            self.assertTrue(first['has_more'])
+            self.assertEqual(len(first['contributors'] + first['issues']), 3)
+            second = self.sync(first['token'])
+        self.assertFalse(second['has_more'])
+        # The new comment logged its issue again, which is sent with its current state.
+        self.assertEqual([issue['id'] for issue in second['issues']], [self.issues[0].id, self.issues[2].id])
+        self.assertEqual(second['issues'][0]['title'], 'Unlogged')
+
+    def test_bulk_writes_are_logged(self):
+        token = self.sync()['token']
+        self.client.patch(f'/api/projects/{self.project.id}/issues/bulk/', [
+            {'id': self.issues[2].id, 'status': 'FINISHED'},
+        ], format='json')
+        self.assertEqual([issue['status'] for issue in self.sync(token)['issues']], ['FINISHED'])
+
+    def test_invalid_token_and_hidden_project(self):
+        self.sync('abc', status_code=400)
+        self.client.force_authenticate(User.objects.create_user(username='outsider'))
+        self.sync(status_code=404)
+
+    def test_deleting_a_project_author_logs_nothing_for_their_projects(self):
+        author = User.objects.create_user(username='owner')
+        owned = Project.objects.create(title='Autre', description='Description', type='IOS', author=author)
+        Contributor.objects.create(user=author, project=owned)
+        Contributor.objects.create(user=self.user, project=owned)
+        issue = Issue.objects.create(title='Issue', description='Description', project=owned, author=self.user)
+        Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        assigned = self.issues[0]
+        assigned.assignee = author
+        assigned.save()
+        token = self.sync()['token']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/users/{author.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Project.objects.filter(pk=owned.pk).exists())
+        self.assertFalse(Change.objects.filter(project_id=owned.pk).exists())
+        self.assertEqual([issue['id'] for issue in self.sync(token)['issues']], [assigned.id])
+
+
+class CounterTests(KanbanTestCase):
+
+    def assertProjectCounts(self, todo=0, in_progress=0, finished=0, contributors=1):
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.todo_issue_count, self.project.in_progress_issue_count,
+             self.project.finished_issue_count, self.project.contributor_count),
+            (todo, in_progress, finished, contributors)
+        )
+
+    def test_issue_counters_follow_create_status_change_and_delete(self):
+        issue, other = self.create_issues(2)
+        self.assertProjectCounts(todo=2)
+
+        response = self.client.patch(
+            f'/api/projects/{self.project.id}/issues/{issue.id}/', {'status': 'IN_PROGRESS'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertProjectCounts(todo=1, in_progress=1)
+
+        other.delete()
+        self.assertProjectCounts(in_progress=1)
+
+    def test_status_counts_follow_the_replaced_row(self):
+        issue = self.create_issues(1)[0]
+        first, second = Issue.objects.get(pk=issue.pk), Issue.objects.get(pk=issue.pk)
+        # Two requests apply the same transition from the same loaded row.
+        for instance in (first, second):
+            instance.status = 'IN_PROGRESS'
+            instance.save()
+        self.assertProjectCounts(in_progress=1)
+
+        # A full save of a stale instance moves the counters back with the row.
+        stale = Issue.objects.get(pk=issue.pk)
+        first.status = 'FINISHED'
+        first.save()
+        stale.title = 'Renommée'
+        stale.save()
+        self.assertEqual(Issue.objects.get(pk=issue.pk).status, 'IN_PROGRESS')
+        self.assertProjectCounts(in_progress=1)
+
+        deferred = Issue.objects.only('id', 'project_id').get(pk=issue.pk)
+        deferred.status = 'TODO'
+        deferred.save(update_fields=['status'])
+        self.assertProjectCounts(todo=1)
+
+    def test_comment_and_contributor_counters(self):
+        issue = self.create_issues(1)[0]
+        comment = Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        comment.delete()
+        issue.refresh_from_db()
+        self.assertEqual(issue.comment_count, 1)
+
+        contributor = Contributor.objects.create(user=User.objects.create_user(username='other'), project=self.project)
+        self.assertProjectCounts(todo=1, contributors=2)
+        contributor.delete()
+        self.assertProjectCounts(todo=1, contributors=1)
+
+    def test_serializers_expose_counters(self):
+        response = self.client.post(
+            '/api/projects/', {'title': 'Projet', 'description': 'Description', 'type': 'IOS'}
+        )
+        self.assertEqual(response.data['contributor_count'], 1)
+        self.assertEqual(response.data['todo_issue_count'], 0)
+        issue = self.create_issues(1)[0]
+        response = self.client.get(f'/api/projects/{self.project.id}/issues/{issue.id}/')
+        self.assertEqual(response.data['comment_count'], 0)
+
+    def test_rebuild_counters_command_fixes_drift(self):
+        issue = self.create_issues(3, status='FINISHED')[0]
+        Comment.objects.create(description='Comment', issue=issue, author=self.contributor)
+        Project.objects.update(finished_issue_count=42, contributor_count=0)
+        Issue.objects.update(comment_count=7)
+
+        call_command('rebuild_counters', batch_size=2, stdout=io.StringIO())
+
+        self.assertProjectCounts(finished=3)
+        self.assertEqual(
+            sorted(Issue.objects.values_list('comment_count', flat=True)), [0, 0, 1]
+        )
+
+
+class ConditionalGetTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1)[0]
+        self.list_url = f'/api/projects/{self.project.id}/issues/'
+        self.detail_url = f'{self.list_url}{self.issue.id}/'
+
+    def test_unchanged_list_returns_304_without_listing(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+
+        # Only the collection version aggregate runs.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_list_etag_changes_with_content_and_query(self):
+        etag = self.client.get(self.list_url)['ETag']
+
+        self.assertNotEqual(self.client.get(f'{self.list_url}?page_size=1')['ETag'], etag)
+
+        self.create_issues(1)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_etag_changes_on_delete(self):
+        other = self.create_issues(1)[0]
+        etag = self.client.get(self.list_url)['ETag']
+        other.delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_etag_follows_updates_and_counters(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Comment.objects.create(description='Comment', issue=self.issue, author=self.contributor)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['comment_count'], 1)
+
+
+class ResponseCacheTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1)[0]
+        self.url = f'/api/projects/{self.project.id}/issues/'
+        response_cache.stats.reset()
+
+    def test_list_is_served_from_cache_until_the_project_changes(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        # Only the list version is read.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self.client.post(self.url, {'title': 'Nouvelle', 'description': 'Description'})
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual((response_cache.stats.hits, response_cache.stats.misses), (1, 2))
+
+    def test_conditional_requests_are_answered_before_the_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url)['ETag'], etag)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((response_cache.stats.hits, response_cache.stats.misses), (1, 1))
+
+    def test_entries_are_per_user_and_query_string(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(f'{self.url}?page_size=1')['X-Cache'], 'MISS')
+
+        other = User.objects.create_user(username='other')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+    def test_comment_and_bulk_writes_invalidate(self):
+        comments_url = f'{self.url}{self.issue.id}/comments/'
+        self.client.get(comments_url)
+        Comment.objects.create(description='Comment', issue=self.issue, author=self.contributor)
+        self.assertEqual(len(self.client.get(comments_url).data['results']), 1)
+
+        self.client.get(self.url)
+        self.client.patch(f'{self.url}bulk/', [{'id': self.issue.id, 'status': 'FINISHED'}], format='json')
+        self.assertEqual(self.client.get(self.url).data['results'][0]['status'], 'FINISHED')
+
+    def test_writes_without_signals_change_the_key(self):
+        assignee = User.objects.create_user(username='assignee')
+        Issue.objects.filter(pk=self.issue.pk).update(assignee=assignee)
+        self.assertEqual(self.client.get(self.url).data['results'][0]['assignee'], assignee.id)
+
+        assignee.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIsNone(response.data['results'][0]['assignee'])
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_lists_read_from_a_replica_are_not_stored(self):
+        # The primary stands in for a replica.
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+    def test_checks_of_the_cache_alias(self):
+        self.assertEqual(response_cache.check_response_cache(None), [])
+        warnings = response_cache.check_shared_response_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['kanban.W001'])
+        with override_settings(KANBAN_RESPONSE_CACHE_ALIAS='missing'):
+            self.assertEqual([error.id for error in response_cache.check_response_cache(None)], ['kanban.E001'])
+        with override_settings(KANBAN_RESPONSE_CACHE_ALIAS=None):
+            self.assertIsNone(response_cache.get_cache())
+            self.assertIsNone(self.client.get(self.url).get('X-Cache'))
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 index")
+class SearchTests(KanbanTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/search/'
+
+    def search(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['id']) for result in response.data['results']]
+
+    def test_title_matches_rank_first_and_prefixes_match(self):
+        body, title = self.create_issues(2)
+        body.description = 'Le serveur renvoie une erreur'
+        body.save()
+        title.title = 'Erreur du serveur'
+        title.save()
+        self.assertEqual(self.search('serv'), [('issue', title.id), ('issue', body.id)])
+
+    def test_index_follows_issue_and_comment_writes(self):
+        issue = self.create_issues(1)[0]
+        comment = Comment.objects.create(description='Crash au démarrage', issue=issue, author=self.contributor)
+        self.assertEqual(self.search('demarrage'), [('comment', str(comment.id))])
+
+        comment.description = 'Lent au démarrage'
+        comment.save()
+        self.assertEqual(self.search('crash'), [])
+        issue.delete()
+        self.assertEqual(self.search('demarrage'), [])
+
+    def test_results_are_limited_to_visible_projects(self):
+        other = User.objects.create_user(username='other')
+        hidden = Project.objects.create(title='Caché', description='Description', type='IOS', author=other)
+        Issue.objects.create(title='Secret', description='Description', project=hidden, author=other)
+        self.assertEqual(self.search('secret'), [])
+
+        Contributor.objects.create(user=self.user, project=hidden)
+        self.assertEqual(len(self.search('secret')), 1)
+        hidden.delete()
+        self.assertEqual(self.search('secret'), [])
+
+    def test_bulk_writes_are_indexed(self):
+        url = f'/api/projects/{self.project.id}/issues/bulk/'
+        response = self.client.post(url, [{'title': 'Import CSV', 'description': 'Description'}], format='json')
+        issue_id = response.data['results'][0]['data']['id']
+        self.client.patch(url, [{'id': issue_id, 'title': 'Import JSON'}], format='json')
+        self.assertEqual(self.search('json'), [('issue', issue_id)])
+        self.assertEqual(self.search('csv'), [])
+
+    def test_rebuild_command(self):
+        issue = self.create_issues(1)[0]
+        Comment.objects.create(description='Commentaire', issue=issue, author=self.contributor)
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM kanban_search_fts")
+        call_command('rebuild_search_index', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(len(self.search('commentaire')), 1)
+        self.assertEqual(self.search(issue.title.split()[0]), [('issue', issue.id)])
+
+    def test_rebuild_replaces_entries_in_place_and_drops_orphans(self):
+        kept, removed = self.create_issues(2)
+        comment = Comment.objects.create(description='Commentaire', issue=kept, author=self.contributor)
+        Issue.objects.filter(pk=removed.pk)._raw_delete('default')
+
+        def entries():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT kind, object_id, id FROM kanban_search_entry")
+                return {(kind, object_id): entry_id for kind, object_id, entry_id in cursor.fetchall()}
+
+        before = entries()
+        self.assertEqual(search.get_backend().rebuild(batch_size=1), 2)
+        indexed = {('issue', str(kept.id)), ('comment', str(comment.id))}
+        self.assertEqual(entries(), {key: entry_id for key, entry_id in before.items() if key in indexed})
+        self.assertEqual(self.search('commentaire'), [('comment', str(comment.id))])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.search('"*'), [])
+
+    def test_fallback_backend(self):
+        issue = self.create_issues(1)[0]
+        backend = search.DatabaseSearchBackend()
+        self.assertEqual([result['id'] for result in backend.search(self.user.id, issue.title, 10)], [issue.id])
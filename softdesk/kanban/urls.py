@@ -1,12 +1,47 @@
+from django.urls import path
 from rest_framework_nested.routers import DefaultRouter, NestedDefaultRouter
-from .views import ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet
+from .views import (
+    ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet, SearchView, MyIssuesView, MyActivityView,
+    JobViewSet
+)
+from . import async_views
+from .metrics import MetricsView
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
+router.register(r'jobs', JobViewSet, basename='job')
 projects_router = NestedDefaultRouter(router, r'projects', lookup='project')
 projects_router.register(r'contributors', ContributorViewSet, basename='project-contributors')
 projects_router.register(r'issues', IssueViewSet, basename='project-issues')
 issues_router = NestedDefaultRouter(projects_router, r'issues', lookup='issue')
 issues_router.register(r'comments', CommentViewSet, basename='issue-comments')
 
-urlpatterns = router.urls + projects_router.urls + issues_router.urls
\ No newline at end of file
+urlpatterns = router.urls + projects_router.urls + issues_router.urls + [
+    path('search/', SearchView.as_view(), name='search'),
+    path('me/issues/', MyIssuesView.as_view(), name='me-issues'),
+    path('me/activity/', MyActivityView.as_view(), name='me-activity'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path(
+        'projects/<int:project_pk>/events/',
+        async_views.ProjectEventStreamView.as_view(), name='project-events'
+    ),
+    # Native async read endpoints, for deployments served through softdesk.asgi.
+    path('async/projects/', async_views.ProjectListView.as_view(), name='async-project-list'),
+    path('async/projects/<int:pk>/', async_views.ProjectDetailView.as_view(), name='async-project-detail'),
+    path(
+        'async/projects/<int:project_pk>/issues/',
+        async_views.IssueListView.as_view(), name='async-project-issues-list'
+    ),
+    path(
+        'async/projects/<int:project_pk>/issues/<int:pk>/',
+        async_views.IssueDetailView.as_view(), name='async-project-issues-detail'
+    ),
+    path(
+        'async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/',
+        async_views.CommentListView.as_view(), name='async-issue-comments-list'
+    ),
+    path(
+        'async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/<uuid:pk>/',
+        async_views.CommentDetailView.as_view(), name='async-issue-comments-detail'
+    ),
+]
@@ -1,14 +1,43 @@
+from collections import Counter
+
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView, get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
-from .models import Project, Contributor, Issue, Comment
-from .serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+from .models import Project, Contributor, Issue, Comment, Change, Job
+from .serializers import (
+    ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer, BulkIssueSerializer,
+    FeedIssueSerializer, JobSerializer
+)
 from .permissions import IsAuthorOrReadOnly
-from django.db import models
+from .pagination import ActivityKeysetPagination, CreatedTimeCursorPagination, FeedCursorPagination
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsetMixin, parse_fieldset, values_representation
+from .response_cache import CachedListMixin
+from . import changes, counters, deletion, events, export, jobs, search
+from .membership import get_contributor, is_contributor, membership_cache, prefetch_contributors
+from .metrics import timed_serialization
+from django.db import models, transaction
 from rest_framework import serializers, status
 
-class ProjectViewSet(ModelViewSet):
+
+def job_accepted(request, job, message):
+    """
+    Answer 202 with the status of a queued job, also linked by the Location header.
+    """
+    data = JobSerializer(job, context={'request': request}).data
+    return Response(
+        {"message": message, "job": data}, status=status.HTTP_202_ACCEPTED, headers={'Location': data['url']}
+    )
+
+
+class ProjectViewSet(ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     """
     ViewSet for managing projects.
     Allows authenticated users to create, retrieve, update, and delete projects.
@@ -16,35 +45,170 @@ class ProjectViewSet(ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CreatedTimeCursorPagination
+    export_chunk_size = 500
+    changes_max_items = 1000
+    export_formats = export.FORMATS
 
     def get_queryset(self):
         """
         Retrieve projects where the user is either the author or a contributor.
+        Membership is matched with a subquery rather than a join so the query
+        needs no DISTINCT and each side of the OR can use its own index.
         """
-        return Project.objects.filter(
-            models.Q(author=self.request.user) | models.Q(contributors__user=self.request.user)
-        ).distinct()
+        user_id = self.request.user.id
+        queryset = Project.objects.filter(
+            models.Q(author_id=user_id)
+            | models.Q(id__in=Contributor.objects.filter(user_id=user_id).values('project_id'))
+        )
+        if self.action != 'destroy':
+            # A project being deleted is gone for everything but a new delete,
+            # which queues the job again if the previous one failed.
+            queryset = queryset.filter(deleting=False)
+        return queryset
 
     def perform_create(self, serializer):
         """
         Create a new project and add the creator as a contributor.
         """
-        project = serializer.save(author=self.request.user)
-        Contributor.objects.create(user=self.request.user, project=project)
+        project = serializer.save(author_id=self.request.user.id)
+        Contributor.objects.create(user_id=self.request.user.id, project=project)
+        # The contributor signal incremented the counter in the database only.
+        project.contributor_count += 1
 
-    def destroy(self, request, *args, **kwargs):
+    @action(detail=True, methods=['get'])
+    def board(self, request, *args, **kwargs):
         """
-        Delete a project and return a success message.
+        Return the project's issues grouped into one column per status.
+        Counts per status, priority and tag come from a single aggregate query
+        and each column is paginated on its own `<status>_cursor` parameter,
+        so the number of queries does not depend on the number of issues.
+        Issues accept `?fields=` and `?omit=` and are rendered from `.values()` rows.
         """
         project = self.get_object()
-        project_id = project.id
-        self.perform_destroy(project)
-        return Response(
-            {"message": f"Le projet {project_id} a été correctement supprimé."},
-            status=status.HTTP_200_OK
+        issues = Issue.objects.filter(project_id=project.id)
+        render_row, issue_columns = values_representation(
+            IssueSerializer(context=self.get_serializer_context()), parse_fieldset(request, IssueSerializer)
+        )
+
+        groups = {'status': Issue.STATUS_CHOICES, 'priority': Issue.PRIORITY_CHOICES, 'tag': Issue.TAG_CHOICES}
+        totals = issues.aggregate(**{
+            f'{field}__{value}': models.Count('id', filter=models.Q(**{field: value}))
+            for field, choices in groups.items()
+            for value, _ in choices
+        })
+        counts = {
+            field: {value: totals[f'{field}__{value}'] for value, _ in choices}
+            for field, choices in groups.items()
+        }
+
+        columns = {}
+        for value, _ in Issue.STATUS_CHOICES:
+            paginator = CreatedTimeCursorPagination()
+            paginator.cursor_query_param = f'{value.lower()}_cursor'
+            page = paginator.paginate_queryset(
+                issues.filter(status=value).values('id', 'created_time', *issue_columns), request, view=self
+            )
+            with timed_serialization():
+                results = [render_row(row) for row in page]
+            columns[value] = {
+                'count': counts['status'][value],
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': results,
+            }
+
+        return Response({'project': project.id, 'counts': counts, 'columns': columns})
+
+    @action(detail=True, methods=['get', 'post'])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the project's issues as NDJSON (`?output=ndjson`, the default) or
+        CSV (`?output=csv`), with their comments if `?comments=true`.
+        Rows are read and rendered chunk by chunk while the response is sent.
+        A POST queues the export on the job worker instead and answers 202;
+        the file is then downloaded from the job.
+        """
+        # Exporting only reads the project, so contributors may POST too.
+        project = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.export_formats:
+            return Response(
+                {"error": f"output must be one of: {', '.join(self.export_formats)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with_comments = request.query_params.get('comments', '').lower() in ('1', 'true', 'yes')
+        if request.method == 'POST':
+            job = jobs.enqueue(
+                Job.EXPORT_PROJECT, {'output': output, 'comments': with_comments},
+                user_id=request.user.id, project_id=project.id
+            )
+            return job_accepted(request, job, f"L'export du projet {project.id} a été planifié.")
+
+        render_lines, content_type = self.export_formats[output]
+        issues = export.iter_issues(project.id, with_comments, chunk_size=self.export_chunk_size)
+        response = StreamingHttpResponse(render_lines(issues), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="project-{project.id}-issues.{output}"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, *args, **kwargs):
+        """
+        Return the issues, comments and contributors created or updated after
+        the `?since=` token, and the ids of those deleted. The client stores the
+        returned `token` for its next call and calls again at once while
+        `has_more` is true. Without a token, the whole project is sent.
+        Comments deleted with their issue have no tombstone of their own.
+        """
+        project = self.get_object()
+        since = changes.parse_token(request.query_params.get('since'))
+        if since is None:
+            return Response(
+                {"error": "since must be a token returned by this endpoint."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        result = changes.changes_since(project.id, since, self.changes_max_items)
+        # Not get_serializer_context(): its fieldset applies to projects.
+        context = {'request': request, 'view': self}
+        kinds = {
+            Change.ISSUE: ('issues', IssueSerializer),
+            Change.COMMENT: ('comments', CommentSerializer),
+            Change.CONTRIBUTOR: ('contributors', ContributorSerializer),
+        }
+        data = {'token': result['token'], 'has_more': result['has_more']}
+        for kind, (name, serializer_class) in kinds.items():
+            data[name] = serializer_class(result['objects'][kind], many=True, context=context).data
+        data['deleted'] = {name: result['deleted'][kind] for kind, (name, _) in kinds.items()}
+        return Response(data)
+
+    @action(detail=True, methods=['post'], url_path='rebuild-counters')
+    def rebuild_counters(self, request, *args, **kwargs):
+        """
+        Queue the recomputation of the project and issue counters (author only).
+        """
+        project = self.get_object()
+        job = jobs.pending(Job.REBUILD_COUNTERS, project.id) or jobs.enqueue(
+            Job.REBUILD_COUNTERS, {'project_ids': [project.id]}, user_id=request.user.id, project_id=project.id
         )
+        return job_accepted(request, job, f"Le recalcul des compteurs du projet {project.id} a été planifié.")
 
-class ContributorViewSet(ModelViewSet):
+    def destroy(self, request, *args, **kwargs):
+        """
+        Queue the deletion of a project with its contributors, issues and
+        comments, which the job worker runs in batches, and answer 202.
+        The project is hidden at once: its endpoints answer 404 and no
+        contributor can write to it. Deleting a project already being
+        deleted returns the same job.
+        """
+        project = self.get_object()
+        with transaction.atomic():
+            Project.objects.filter(pk=project.pk).update(deleting=True)
+            job = jobs.pending(Job.DELETE_PROJECT, project.id) or jobs.enqueue(
+                Job.DELETE_PROJECT, user_id=request.user.id, project_id=project.id
+            )
+        membership_cache.invalidate_project(project.id)
+        return job_accepted(request, job, f"La suppression du projet {project.id} a été planifiée.")
+
+class ContributorViewSet(CachedListMixin, ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     """
     ViewSet for managing contributors.
     Allows adding or removing contributors from a project.
@@ -52,13 +216,18 @@ class ContributorViewSet(ModelViewSet):
     queryset = Contributor.objects.all()
     serializer_class = ContributorSerializer
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CreatedTimeCursorPagination
 
     def get_queryset(self):
         """
         Retrieve contributors for a specific project.
         """
         project_id = self.kwargs['project_pk']
-        return Contributor.objects.filter(project_id=project_id)
+        queryset = Contributor.objects.filter(project_id=project_id, project__deleting=False)
+        if self.request.method not in SAFE_METHODS:
+            # IsAuthorOrReadOnly checks the project author.
+            queryset = queryset.select_related('project')
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -66,44 +235,190 @@ class ContributorViewSet(ModelViewSet):
         """
         project_id = self.kwargs['project_pk']
         try:
-            project = Project.objects.get(pk=project_id)
+            project = Project.objects.get(pk=project_id, deleting=False)
         except Project.DoesNotExist:
             raise serializers.ValidationError("Le projet spécifié n'existe pas.")
 
         serializer.save(project=project)
 
-class IssueViewSet(ModelViewSet):
+class IssueViewSet(CachedListMixin, ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     """
     ViewSet for managing issues.
     Allows contributors to create, retrieve, update, and delete issues for a project.
     """
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CreatedTimeCursorPagination
+    bulk_max_items = 1000
+    delete_batch_size = 1000
 
     def get_queryset(self):
         """
         Retrieve issues for a specific project.
         """
         project_id = self.kwargs['project_pk']
-        return Issue.objects.filter(project_id=project_id)
+        queryset = Issue.objects.filter(project_id=project_id, project__deleting=False)
+        if self.request.method not in SAFE_METHODS:
+            # IsAuthorOrReadOnly checks the project author.
+            queryset = queryset.select_related('project')
+        return queryset
 
     def perform_create(self, serializer):
         """
         Create a new issue for a specific project if the user is a contributor.
         """
         project_id = self.kwargs['project_pk']
-        if not Contributor.objects.filter(user=self.request.user, project_id=project_id).exists():
+        if not is_contributor(self.request, project_id):
             raise serializers.ValidationError("You must be a contributor of the project to create an issue.")
-        serializer.save(project_id=project_id, author=self.request.user)
+        serializer.save(project_id=project_id, author_id=self.request.user.id)
 
     def perform_update(self, serializer):
         """
         Update an issue for a specific project if the user is a contributor.
         """
         project_id = self.kwargs['project_pk']
-        if not Contributor.objects.filter(user=self.request.user, project_id=project_id).exists():
+        if not is_contributor(self.request, project_id):
             raise serializers.ValidationError("You must be a contributor of the project to update an issue.")
-        serializer.save(project_id=project_id, author=self.request.user)
+        serializer.save(project_id=project_id, author_id=self.request.user.id)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create (POST) or update (PATCH) a list of issues in one transaction.
+        PATCH items carry the issue `id` and the fields to change, such as a
+        status transition. Each item gets its own result and valid items are
+        written even when others are rejected.
+        """
+        items = request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return Response({"error": "A list of issues is expected."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {"error": f"At most {self.bulk_max_items} issues can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        project_id = self.kwargs['project_pk']
+        verb = 'create' if request.method == 'POST' else 'update'
+        if not is_contributor(request, project_id):
+            raise serializers.ValidationError(f"You must be a contributor of the project to {verb} an issue.")
+        assignee_ids = set()
+        for item in items:
+            try:
+                assignee_ids.add(int(item['assignee']))
+            except (KeyError, TypeError, ValueError):
+                pass
+        prefetch_contributors(request, project_id, assignee_ids)
+
+        if request.method == 'POST':
+            results = self._bulk_create(items)
+            success_status = status.HTTP_201_CREATED
+        else:
+            results = self._bulk_update(items)
+            success_status = status.HTTP_200_OK
+        all_succeeded = all(result['status'] == success_status for result in results)
+        return Response(
+            {"results": results},
+            status=success_status if all_succeeded else status.HTTP_207_MULTI_STATUS
+        )
+
+    def _bulk_create(self, items):
+        serializer = BulkIssueSerializer(context=self.get_serializer_context())
+        results, issues = [], []
+        for item in items:
+            try:
+                validated_data = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                results.append({"status": status.HTTP_400_BAD_REQUEST, "errors": exc.detail})
+                continue
+            issue = Issue(
+                project_id=self.kwargs['project_pk'], author_id=self.request.user.id, **validated_data
+            )
+            issues.append(issue)
+            results.append({"status": status.HTTP_201_CREATED, "issue": issue})
+
+        with transaction.atomic():
+            Issue.objects.bulk_create(issues)
+            # bulk_create sends no post_save signal, so counters, the search index,
+            # the change log and the event stream are updated here.
+            counters.adjust_issue_counts(self.kwargs['project_pk'], Counter(issue.status for issue in issues))
+            search.get_backend().index_issues(issues)
+            changes.record_changes(saved=[(issue.project_id, Change.ISSUE, issue.pk) for issue in issues])
+            for issue in issues:
+                events.publish_issue_saved(issue, created=True)
+        return self._render_results(results)
+
+    def _bulk_update(self, items):
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+        instances = self.get_queryset().in_bulk(ids)
+        # One serializer validates every item; building its fields per item
+        # would dominate the cost of large batches.
+        serializer = BulkIssueSerializer(partial=True, context=self.get_serializer_context())
+        results, updated, fields = [], {}, {'author_id', 'updated_time'}
+        now = timezone.now()
+        for item in items:
+            try:
+                issue = instances[int(item['id'])]
+            except (KeyError, TypeError, ValueError):
+                results.append({"status": status.HTTP_404_NOT_FOUND, "errors": {"id": ["Issue not found."]}})
+                continue
+            try:
+                self.check_object_permissions(self.request, issue)
+            except APIException as exc:
+                results.append({"status": exc.status_code, "errors": exc.detail})
+                continue
+            serializer.instance = issue
+            try:
+                validated_data = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                results.append({"status": status.HTTP_400_BAD_REQUEST, "errors": exc.detail})
+                continue
+            for attr, value in validated_data.items():
+                setattr(issue, attr, value)
+                fields.add(attr)
+            # Same as perform_update: the issue is saved on behalf of the request user.
+            issue.author_id = self.request.user.id
+            # bulk_update does not apply auto_now.
+            issue.updated_time = now
+            updated[issue.pk] = issue
+            results.append({"status": status.HTTP_200_OK, "issue": issue})
+
+        if updated:
+            with transaction.atomic():
+                if 'status' in fields:
+                    # The status deltas are taken from the rows being overwritten.
+                    replaced = dict(
+                        Issue.objects.select_for_update().filter(pk__in=updated).values_list('pk', 'status')
+                    )
+                    for pk, issue in updated.items():
+                        issue._replaced_status = replaced.get(pk)
+                Issue.objects.bulk_update(updated.values(), sorted(fields))
+                # bulk_update sends no post_save signal, so counters, the search index,
+                # the change log and the event stream are updated here.
+                counters.adjust_issue_counts(
+                    self.kwargs['project_pk'], counters.status_transition_deltas(updated.values())
+                )
+                if fields & {'title', 'description'}:
+                    search.get_backend().index_issues(updated.values())
+                changes.record_changes(
+                    saved=[(issue.project_id, Change.ISSUE, issue.pk) for issue in updated.values()]
+                )
+                for issue in updated.values():
+                    events.publish_issue_saved(issue)
+        return self._render_results(results)
+
+    def _render_results(self, results):
+        serializer = IssueSerializer(context=self.get_serializer_context())
+        for result in results:
+            issue = result.pop('issue', None)
+            if issue is not None:
+                result['data'] = serializer.to_representation(issue)
+        return results
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -117,7 +432,10 @@ class IssueViewSet(ModelViewSet):
             status=status.HTTP_200_OK
         )
 
-class CommentViewSet(ModelViewSet):
+    def perform_destroy(self, issue):
+        deletion.delete_issue(issue, self.delete_batch_size)
+
+class CommentViewSet(CachedListMixin, ConditionalGetMixin, SparseFieldsetMixin, ModelViewSet):
     """
     ViewSet for managing comments.
     Allows contributors to create, retrieve, update, and delete comments for an issue.
@@ -125,13 +443,18 @@ class CommentViewSet(ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CreatedTimeCursorPagination
 
     def get_queryset(self):
         """
         Retrieve comments for a specific issue.
         """
         issue_id = self.kwargs['issue_pk']
-        return Comment.objects.filter(issue_id=issue_id)
+        queryset = Comment.objects.filter(issue_id=issue_id, issue__project__deleting=False)
+        if self.request.method not in SAFE_METHODS:
+            # IsAuthorOrReadOnly checks the comment author and the project author.
+            queryset = queryset.select_related('author', 'issue__project')
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -140,9 +463,8 @@ class CommentViewSet(ModelViewSet):
         issue_id = self.kwargs['issue_pk']
         project_id = self.kwargs['project_pk']
 
-        try:
-            contributor = Contributor.objects.get(user=self.request.user, project_id=project_id)
-        except Contributor.DoesNotExist:
+        contributor = get_contributor(self.request, project_id)
+        if contributor is None:
             raise serializers.ValidationError("You must be a contributor of the project to manage issue.")
 
         serializer.save(issue_id=issue_id, author=contributor)
@@ -157,3 +479,108 @@ class CommentViewSet(ModelViewSet):
             {"message": "Le commentaire a été correctement supprimé."},
             status=status.HTTP_200_OK
         )
+
+class SearchView(APIView):
+    """
+    View for searching issues and comments.
+    Only the projects the user authored or contributes to are searched.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "The q parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        results = search.get_backend().search(request.user.id, query, limit)
+        return Response({"results": results})
+
+
+class FeedMixin:
+    """
+    Issues across all the projects of the user, read in one query per page:
+    the project and author are joined in and only the rendered columns are
+    loaded. Cursor pagination runs no COUNT query.
+    """
+    serializer_class = FeedIssueSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.get_issues().select_related('project', 'author').only(*FeedIssueSerializer.columns)
+
+
+class MyIssuesView(FeedMixin, ListAPIView):
+    """
+    Issues assigned to the user, newest first.
+    Served by issue_assignee_feed_idx.
+    """
+    pagination_class = FeedCursorPagination
+
+    def get_issues(self):
+        # User.assigned_issues, without loading the user.
+        return Issue.objects.filter(assignee_id=self.request.user.id, project__deleting=False)
+
+
+class MyActivityView(FeedMixin, ListAPIView):
+    """
+    Issues of the projects the user contributes to, latest change first.
+
+    Each project is read through issue_project_updated_idx, at most a page
+    per project, and the pages are merged in one compound query: the cost
+    grows with the number of projects of the user, not with the issues of
+    the other projects. The page is then loaded by primary key.
+    """
+    pagination_class = ActivityKeysetPagination
+
+    def get_project_ids(self):
+        # Projects of User.contributions.
+        return list(
+            Contributor.objects.filter(user_id=self.request.user.id, project__deleting=False)
+            .values_list('project_id', flat=True)
+        )
+
+    def get_issues(self):
+        return Issue.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        rows, next_link, previous_link = self.paginator.paginate_partitions(
+            [Issue.objects.filter(project_id=project_id) for project_id in self.get_project_ids()], request
+        )
+        issues = self.get_queryset().in_bulk([row['id'] for row in rows]) if rows else {}
+        # An issue deleted since the merge is left out of the page.
+        page = [issues[row['id']] for row in rows if row['id'] in issues]
+        return Response({
+            'next': next_link, 'previous': previous_link, 'results': self.get_serializer(page, many=True).data
+        })
+
+
+class JobViewSet(ReadOnlyModelViewSet):
+    """
+    Status of the background jobs started by the user: project deletions,
+    exports and counter rebuilds, most recent first.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        return Job.objects.filter(user_id=self.request.user.id)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, *args, **kwargs):
+        """
+        Send the file of a finished export.
+        """
+        job = self.get_object()
+        if job.kind != Job.EXPORT_PROJECT or job.status != Job.SUCCEEDED:
+            return Response({"error": "This job has no file to download."}, status=status.HTTP_409_CONFLICT)
+        return FileResponse(
+            open(jobs.export_path(job), 'rb'), as_attachment=True,
+            filename=job.result['filename'], content_type=job.result['content_type']
+        )
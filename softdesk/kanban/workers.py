@@ -0,0 +1,15 @@
+"""
+Set up of the `run_jobs` pool processes. This module is imported by the new
+processes before Django is set up, so it must not import models.
+"""
+import signal
+
+import django
+
+
+def setup_process():
+    # The parent process handles SIGINT and SIGTERM by waiting for the running
+    # jobs, so they are not interrupted in the middle of a batch.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    django.setup()
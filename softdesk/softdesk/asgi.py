@@ -3,6 +3,10 @@ ASGI config for softdesk project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The native async views and the project event streams (/api/projects/<id>/events/)
+are meant to be served through it: a connected event stream client then costs a
+suspended coroutine instead of a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
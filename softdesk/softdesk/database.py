@@ -0,0 +1,112 @@
+"""
+Environment-driven database configuration.
+
+Without any DB_* variable the project keeps its local SQLite file. Variables:
+
+    DB_ENGINE             sqlite3 (default), postgresql, mysql...
+    DB_NAME               database name, or file path for SQLite
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE       seconds a connection is kept open (default 0 for
+                          untuned SQLite, 60 otherwise; 'none' for unlimited)
+    DB_CONN_HEALTH_CHECKS check persistent connections before reuse (default on)
+    DB_POOL               use Django's connection pool (PostgreSQL only)
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+    DB_REPLICAS           comma-separated replica hosts, or database files for
+                          SQLite, exposed as the replica_1, replica_2... aliases
+
+SQLite performance mode, for small deployments with concurrent writers:
+
+    DB_SQLITE_TUNED       WAL journal, synchronous=NORMAL, memory-mapped I/O and
+                          a larger page cache on each connection, and write
+                          transactions started with BEGIN IMMEDIATE (default off)
+    DB_SQLITE_TIMEOUT     seconds a connection waits for a lock (busy timeout,
+                          default 20 when tuned)
+    DB_SQLITE_MMAP_SIZE   bytes of the file mapped in memory (default 256 MiB)
+    DB_SQLITE_CACHE_SIZE  page cache in KiB (default 64 MiB)
+"""
+from pathlib import Path
+
+POOL_ENGINES = {'django.db.backends.postgresql'}
+
+SQLITE_TIMEOUT = 20
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_CACHE_SIZE = 64 * 1024
+
+
+def _flag(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _engine(name):
+    return name if '.' in name else f'django.db.backends.{name}'
+
+
+def sqlite_options(environ):
+    """
+    Return the OPTIONS of the SQLite performance mode, or {} when it is off.
+
+    WAL lets readers run alongside the single writer, and synchronous=NORMAL
+    only syncs at checkpoints, which WAL keeps safe from corruption. BEGIN
+    IMMEDIATE takes the write lock when the transaction starts: a deferred
+    transaction that reads first and then writes cannot wait for the lock and
+    fails at once with "database is locked" when another writer holds it.
+    """
+    if not _flag(environ.get('DB_SQLITE_TUNED', '')):
+        return {}
+    mmap_size = int(environ.get('DB_SQLITE_MMAP_SIZE', SQLITE_MMAP_SIZE))
+    cache_size = int(environ.get('DB_SQLITE_CACHE_SIZE', SQLITE_CACHE_SIZE))
+    return {
+        'init_command': (
+            'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; '
+            f'PRAGMA mmap_size={mmap_size}; PRAGMA cache_size=-{cache_size}'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': float(environ.get('DB_SQLITE_TIMEOUT', SQLITE_TIMEOUT)),
+    }
+
+
+def database_settings(environ, base_dir):
+    """
+    Return the DATABASES setting described by `environ`: the `default`
+    (primary) alias and one alias per replica, mirroring the primary in tests.
+    """
+    engine = _engine(environ.get('DB_ENGINE', 'sqlite3'))
+    is_sqlite = engine == 'django.db.backends.sqlite3'
+
+    primary = {
+        'ENGINE': engine,
+        'NAME': environ.get('DB_NAME') or (Path(base_dir) / 'db.sqlite3' if is_sqlite else ''),
+    }
+    if not is_sqlite:
+        for key in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+            primary[key] = environ.get(f'DB_{key}', '')
+    elif options := sqlite_options(environ):
+        primary['OPTIONS'] = options
+
+    # The tuned SQLite mode keeps connections open so their page cache and
+    # memory map are reused across requests.
+    max_age = environ.get('DB_CONN_MAX_AGE', '0' if is_sqlite and 'OPTIONS' not in primary else '60')
+    if _flag(environ.get('DB_POOL', '')) and engine in POOL_ENGINES:
+        # Pooled connections are returned to the pool at the end of each
+        # request, which Django requires to be configured with CONN_MAX_AGE = 0.
+        pool = {}
+        for key in ('min_size', 'max_size'):
+            value = environ.get(f'DB_POOL_{key.upper()}')
+            if value:
+                pool[key] = int(value)
+        primary['OPTIONS'] = {'pool': pool or True}
+        primary['CONN_MAX_AGE'] = 0
+    else:
+        primary['CONN_MAX_AGE'] = None if max_age.lower() == 'none' else int(max_age)
+        primary['CONN_HEALTH_CHECKS'] = _flag(environ.get('DB_CONN_HEALTH_CHECKS', 'true'))
+
+    databases = {'default': primary}
+    replicas = [value.strip() for value in environ.get('DB_REPLICAS', '').split(',') if value.strip()]
+    for number, replica in enumerate(replicas, start=1):
+        location = {'NAME': replica} if is_sqlite else {'HOST': replica}
+        databases[f'replica_{number}'] = {**primary, **location, 'TEST': {'MIRROR': 'default'}}
+    return databases
+
+
+def replica_aliases(databases):
+    return [alias for alias, config in databases.items() if config.get('TEST', {}).get('MIRROR') == 'default']
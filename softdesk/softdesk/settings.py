@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from .database import database_settings, replica_aliases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'kanban.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'kanban.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'softdesk.urls'
@@ -76,13 +81,19 @@ WSGI_APPLICATION = 'softdesk.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Configured from DB_* environment variables, see softdesk/database.py;
+# the local SQLite file is used when none is set.
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+DATABASES = database_settings(os.environ, BASE_DIR)
+
+# Safe-method kanban reads go to the replicas; a user who wrote reads from
+# the primary for REPLICA_STICKY_SECONDS afterwards.
+DATABASE_REPLICAS = replica_aliases(DATABASES)
+DATABASE_ROUTERS = ['kanban.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+# Cache alias holding these pins; with several processes it must name a shared cache
+# (Redis, Memcached...) so a user's next request sees the pin whichever process serves it.
+REPLICA_PIN_CACHE_ALIAS = 'default'
 
 
 # Password validation
@@ -130,10 +141,61 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'],
+        'users.authentication.StatelessJWTAuthentication'],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',],}
 
 SIMPLE_JWT = {
         "ACCESS_TOKEN_LIFETIME": timedelta(minutes=20),
+        "TOKEN_OBTAIN_SERIALIZER": "users.serializer.ClaimsTokenObtainPairSerializer",
+}
+
+# Lifetime (seconds) of the cached User instances behind ClaimsUser.instance.
+USER_CACHE_TTL = 60
+
+# Threads hashing the passwords of new users (users.passwords); None for one per CPU.
+USER_PASSWORD_HASH_WORKERS = None
+
+# Process-level cache of project memberships (kanban.membership).
+# Entries are invalidated by Contributor signals and expire after the TTL (seconds).
+KANBAN_MEMBERSHIP_CACHE_SIZE = 10000
+KANBAN_MEMBERSHIP_CACHE_TTL = 30
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
 }
+
+# Cached list responses of the kanban endpoints (kanban.response_cache); None turns them off.
+# Entries are keyed on the version of each list, so they need no invalidation. With several
+# processes, a shared cache (Redis, Memcached...) avoids one copy per process.
+KANBAN_RESPONSE_CACHE_ALIAS = 'default'
+KANBAN_RESPONSE_CACHE_TIMEOUT = 300
+
+# Requests slower than this (seconds) are logged by kanban.metrics.MetricsMiddleware;
+# the per-endpoint metrics are served to staff users on /api/metrics/.
+KANBAN_SLOW_REQUEST_SECONDS = 1.0
+
+# Project event streams (kanban.events), served on /api/projects/<id>/events/ through softdesk.asgi.
+# The in-process broker only reaches clients of the same process; a broker shared between
+# processes implements kanban.events.EventBroker. Each project keeps its last
+# KANBAN_EVENT_REPLAY_SIZE events for the clients resuming with Last-Event-ID, and drops them
+# KANBAN_EVENT_REPLAY_SECONDS after the last one when no client listens.
+KANBAN_EVENT_BROKER = 'kanban.events.InProcessBroker'
+KANBAN_EVENT_REPLAY_SIZE = 500
+KANBAN_EVENT_REPLAY_SECONDS = 900
+KANBAN_EVENT_KEEPALIVE_SECONDS = 15
+
+# Background jobs (kanban.jobs) run by `manage.py run_jobs`: project deletions, exports and
+# counter rebuilds, in batches of KANBAN_JOB_BATCH_SIZE rows. A worker renews the lease of its
+# job after each batch; when the lease expires, another worker takes the job over. Failed jobs
+# are retried after KANBAN_JOB_RETRY_DELAY seconds, doubled at each attempt.
+KANBAN_JOB_BATCH_SIZE = 1000
+KANBAN_JOB_LEASE_SECONDS = 300
+KANBAN_JOB_MAX_ATTEMPTS = 3
+KANBAN_JOB_RETRY_DELAY = 30
+KANBAN_JOB_EXPORT_DIR = BASE_DIR / 'exports'
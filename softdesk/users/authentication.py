@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import User
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """
+    Return the User model instance for `user_id`, cached for USER_CACHE_TTL seconds.
+    The entry is dropped by the User save/delete signals.
+    """
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.get(pk=user_id)
+        cache.set(key, user, getattr(settings, 'USER_CACHE_TTL', 60))
+    return user
+
+
+class ClaimsUser(TokenUser):
+    """
+    Lightweight user built from the claims of a validated access token.
+    It carries the id, username and contact/data-sharing flags without any
+    database access; use `instance` when the full User model is needed.
+    """
+
+    @cached_property
+    def can_be_contacted(self):
+        return self.token.get('can_be_contacted', False)
+
+    @cached_property
+    def can_data_be_shared(self):
+        return self.token.get('can_data_be_shared', False)
+
+    @cached_property
+    def instance(self):
+        return get_cached_user(self.id)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token claims instead of loading the
+    User row on every request.
+
+    Tokens are short-lived (see SIMPLE_JWT), so a deactivated user keeps access
+    until their current access token expires.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return ClaimsUser(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for the native async views.
+        Validating the token and building the user from its claims does no
+        I/O, so it runs on the event loop without a thread.
+        """
+        return self.authenticate(request)
@@ -0,0 +1,60 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from kanban.models import Contributor, Project
+from kanban.views import ProjectViewSet
+from users.authentication import StatelessJWTAuthentication
+from users.models import User
+from users.serializer import ClaimsTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of JWTAuthentication and StatelessJWTAuthentication "
+        "on the project detail endpoint. Benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-auth')
+            project = Project.objects.create(
+                title='Benchmark', description='Benchmark', type='BACKEND', author=user
+            )
+            Contributor.objects.create(user=user, project=project)
+            token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            url = f'/api/projects/{project.id}/'
+
+            results = {}
+            for backend in (JWTAuthentication, StatelessJWTAuthentication):
+                with mock.patch.object(ProjectViewSet, 'authentication_classes', [backend]):
+                    results[backend.__name__] = self.measure(client, url, options['requests'])
+            transaction.set_rollback(True)
+
+        for name, rps in results.items():
+            self.stdout.write(f"{name}: {rps:.0f} req/s")
+        baseline, stateless = results.values()
+        self.stdout.write(f"Speed-up: {stateless / baseline:.2f}x")
+
+    def measure(self, client, url, requests):
+        # Warm up URL resolution and caches before timing.
+        for _ in range(50):
+            client.get(url)
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        return requests / elapsed
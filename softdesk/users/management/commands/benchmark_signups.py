@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.passwords import get_executor
+from users.provisioning import provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure signups per second: the previous registration (insert, then update with the "
+        "password), POST /api/register/, and bulk provisioning with passwords hashed on the "
+        "hashing pool or already hashed. Benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signups', type=int, default=20, help="Signups hashing a password, per mode.")
+        parser.add_argument('--users', type=int, default=2000, help="Users provisioned with a password hash.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        signups, users = options['signups'], options['users']
+        self.counter = 0
+        # Start the pool threads before timing.
+        get_executor().submit(int).result()
+        with transaction.atomic():
+            client = APIClient()
+            results = {
+                'create + set_password + save': self.measure(signups, self.previous_signup),
+                'POST /api/register/': self.measure(signups, lambda data: self.register(client, data)),
+                'provision_users (password)': self.measure_bulk(signups, 'password', 'benchmark-password'),
+                'provision_users (password_hash)': self.measure_bulk(
+                    users, 'password_hash', make_password('benchmark-password')
+                ),
+            }
+            transaction.set_rollback(True)
+
+        for name, rate in results.items():
+            self.stdout.write(f"{name}: {rate:.1f} signups/s")
+
+    def user_data(self):
+        self.counter += 1
+        username = f'benchmark-signup-{self.counter}'
+        return {'username': username, 'email': f'{username}@example.com', 'age': 30}
+
+    def previous_signup(self, data):
+        user = User.objects.create(**data)
+        user.set_password('benchmark-password')
+        user.save()
+
+    def register(self, client, data):
+        response = client.post('/api/register/', {**data, 'password': 'benchmark-password'}, format='json')
+        assert response.status_code == 201, response.status_code
+
+    def measure(self, signups, signup):
+        start = time.perf_counter()
+        for _ in range(signups):
+            signup(self.user_data())
+        return signups / (time.perf_counter() - start)
+
+    def measure_bulk(self, users, field, password):
+        items = [{**self.user_data(), field: password} for _ in range(users)]
+        start = time.perf_counter()
+        results = provision_users(items)
+        elapsed = time.perf_counter() - start
+        assert all('errors' not in result for result in results)
+        return users / elapsed
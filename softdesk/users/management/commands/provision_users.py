@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from users.provisioning import provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users in bulk from an NDJSON file, one user per line with the fields of "
+        "POST /api/users/ and a `password` or a `password_hash`. Each batch is inserted "
+        "with bulk_create in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file of users.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=20, help="Rejected lines to report in detail.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.max_errors = options['max_errors']
+        self.created = self.rejected = 0
+        self.start = time.perf_counter()
+        batch, lines = [], []
+        try:
+            with open(options['path'], encoding='utf-8') as file:
+                for number, line in enumerate(file, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError as exc:
+                        self.report_error(number, f"invalid JSON: {exc}")
+                        continue
+                    lines.append(number)
+                    if len(batch) == options['batch_size']:
+                        self.provision(batch, lines)
+                        batch, lines = [], []
+            self.provision(batch, lines)
+        except OSError as exc:
+            raise CommandError(exc)
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {self.created} users in {elapsed:.1f}s "
+            f"({self.created / elapsed if elapsed else 0:.0f} users/s), rejected {self.rejected}."
+        ))
+
+    def provision(self, batch, lines):
+        if not batch:
+            return
+        try:
+            results = provision_users(batch, batch_size=len(batch))
+        except IntegrityError as exc:
+            raise CommandError(f"Batch ending at line {lines[-1]} not created: {exc}")
+        for number, result in zip(lines, results):
+            if 'errors' in result:
+                self.report_error(number, json.dumps(result['errors'], ensure_ascii=False))
+            else:
+                self.created += 1
+        if self.verbosity >= 1:
+            elapsed = time.perf_counter() - self.start
+            self.stdout.write(
+                f"Line {lines[-1]}: {self.created} users created, "
+                f"{self.created / elapsed if elapsed else 0:.0f} users/s"
+            )
+
+    def report_error(self, line, message):
+        self.rejected += 1
+        if self.rejected <= self.max_errors:
+            self.stderr.write(f"Line {line} rejected: {message}")
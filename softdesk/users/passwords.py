@@ -0,0 +1,51 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process-wide pool of USER_PASSWORD_HASH_WORKERS threads
+    hashing passwords, one per CPU by default.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, 'USER_PASSWORD_HASH_WORKERS', None) or os.cpu_count() or 1
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+
+def hash_password(password):
+    """
+    Hash a password on the pool and wait for the result. The hashers of
+    Django release the GIL while hashing, so the pool bounds the number of
+    hashes computed at once to the number of CPUs: a burst of signups queues
+    there instead of taking the CPU from the other requests.
+    """
+    return get_executor().submit(make_password, password).result()
+
+
+def hash_passwords(passwords):
+    """
+    Hash a list of passwords in parallel on the pool, in order.
+    """
+    return list(get_executor().map(make_password, passwords))
+
+
+def is_password_hash(value):
+    """
+    Tell whether `value` is a password encoded by one of PASSWORD_HASHERS.
+    """
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
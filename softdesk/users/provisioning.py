@@ -0,0 +1,54 @@
+from django.db import transaction
+from rest_framework import serializers, status
+
+from users.models import User
+from users.passwords import hash_passwords
+from users.serializer import ProvisionUserSerializer
+
+
+def provision_users(items, batch_size=1000):
+    """
+    Create users in bulk from a list of dicts and return one result per item:
+    `{"status": 201, "user": user}` or `{"status": 400, "errors": ...}`.
+
+    Usernames are checked with one query for the whole list, the passwords
+    are hashed in parallel on the hashing pool (password hashes are stored
+    as they are) and the valid users are inserted with bulk_create in one
+    transaction. No post_save signal is sent, none is needed for a new user.
+    """
+    serializer = ProvisionUserSerializer()
+    results, valid = [], []
+    for item in items:
+        try:
+            valid.append((len(results), serializer.run_validation(item)))
+        except serializers.ValidationError as exc:
+            results.append({"status": status.HTTP_400_BAD_REQUEST, "errors": exc.detail})
+            continue
+        results.append(None)
+
+    taken = set(
+        User.objects.filter(username__in=[data['username'] for _, data in valid])
+        .values_list('username', flat=True)
+    )
+    unique_error = str(User._meta.get_field('username').error_messages['unique'])
+    users = []
+    for index, data in valid:
+        if data['username'] in taken:
+            results[index] = {"status": status.HTTP_400_BAD_REQUEST, "errors": {"username": [unique_error]}}
+            continue
+        taken.add(data['username'])
+        users.append((index, data))
+
+    raw_passwords = [data['password'] for _, data in users if 'password' in data]
+    hashed = iter(hash_passwords(raw_passwords))
+    instances = []
+    for index, data in users:
+        password = data.pop('password_hash') if 'password_hash' in data else next(hashed)
+        data.pop('password', None)
+        user = User(password=password, **data)
+        instances.append(user)
+        results[index] = {"status": status.HTTP_201_CREATED, "user": user}
+
+    with transaction.atomic():
+        User.objects.bulk_create(instances, batch_size=batch_size)
+    return results
@@ -1,5 +1,8 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from users.models import User
+from users.passwords import hash_password, is_password_hash
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -19,7 +22,44 @@ class UserSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         password = validated_data.pop('password')
-        user = User(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        return User.objects.create(password=hash_password(password), **validated_data)
+
+
+class ProvisionUserSerializer(UserSerializer):
+    """
+    Serializer for the users created in bulk, with either a password or a
+    password already hashed by one of PASSWORD_HASHERS.
+    Username uniqueness is checked once for the whole batch by provision_users.
+    """
+    password = serializers.CharField(write_only=True, required=False)
+    password_hash = serializers.CharField(write_only=True, required=False)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['password_hash']
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+    def validate_password_hash(self, value):
+        if not is_password_hash(value):
+            raise serializers.ValidationError("Ce hash de mot de passe n'est pas reconnu.")
+        return value
+
+    def validate(self, attrs):
+        if ('password' in attrs) == ('password_hash' in attrs):
+            raise serializers.ValidationError("Un mot de passe ou un hash de mot de passe est requis.")
+        return attrs
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token serializer embedding the user claims read by StatelessJWTAuthentication.
+    Access tokens obtained through a refresh inherit these claims.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        token['can_be_contacted'] = user.can_be_contacted
+        token['can_data_be_shared'] = user.can_data_be_shared
+        token['is_staff'] = user.is_staff
+        return token
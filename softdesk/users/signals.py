@@ -0,0 +1,15 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users.authentication import user_cache_key
+from users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached User instance used by ClaimsUser.instance.
+    """
+    cache.delete(user_cache_key(instance.pk))
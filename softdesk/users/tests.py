@@ -1,3 +1,125 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.authentication import ClaimsUser, StatelessJWTAuthentication
+from users.models import User
+from users.serializer import ClaimsTokenObtainPairSerializer
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', can_be_contacted=True, can_data_be_shared=False
+        )
+        self.token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_user_is_built_from_claims_without_queries(self):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(self.token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.username, 'testuser')
+        self.assertTrue(user.can_be_contacted)
+        self.assertFalse(user.can_data_be_shared)
+
+    def test_refreshed_access_token_keeps_claims(self):
+        refresh = ClaimsTokenObtainPairSerializer.get_token(self.user)
+        access = RefreshToken(str(refresh)).access_token
+        user, _ = self.authenticate(access)
+        self.assertEqual(user.username, 'testuser')
+        self.assertTrue(user.can_be_contacted)
+
+    def test_full_user_instance_is_cached_until_saved(self):
+        user, _ = self.authenticate(self.token)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.instance, self.user)
+        user, _ = self.authenticate(self.token)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.instance.username, 'testuser')
+
+        self.user.username = 'renamed'
+        self.user.save()
+        user, _ = self.authenticate(self.token)
+        self.assertEqual(user.instance.username, 'renamed')
+
+    def test_token_user_can_write_kanban_resources(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post(
+            '/api/projects/', {'title': 'Projet', 'description': 'Description', 'type': 'BACKEND'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['author'], self.user.id)
+        self.assertEqual(client.get('/api/projects/').data['results'][0]['id'], response.data['id'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SignupTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def user_data(self, username, **kwargs):
+        return {'username': username, 'email': f'{username}@example.com', 'age': 20, **kwargs}
+
+    def test_register_inserts_the_user_once(self):
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/register/', self.user_data('new', password='S3cret!'), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username='new').check_password('S3cret!'))
+
+    def test_bulk_provisioning(self):
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        User.objects.create_user(username='taken')
+        items = [
+            self.user_data('alice', password='S3cret!'),
+            self.user_data('bob', password_hash=make_password('Hashed!')),
+            self.user_data('taken', password='S3cret!'),
+            self.user_data('alice', password='Again!'),
+            self.user_data('young', password='S3cret!', age=12),
+            self.user_data('nopassword'),
+            self.user_data('badhash', password_hash='not-a-hash'),
+        ]
+        self.client.force_authenticate(User.objects.get(username='taken'))
+        self.assertEqual(self.client.post('/api/users/bulk/', items, format='json').status_code, 403)
+
+        self.client.force_authenticate(staff)
+        # The username check, then the INSERT in its transaction.
+        with self.assertNumQueries(4):
+            response = self.client.post('/api/users/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 201] + [400] * 5)
+        self.assertEqual(response.data['results'][0]['data']['username'], 'alice')
+        self.assertNotIn('password', response.data['results'][0]['data'])
+        self.assertTrue(User.objects.get(username='alice').check_password('S3cret!'))
+        self.assertTrue(User.objects.get(username='bob').check_password('Hashed!'))
+        self.assertFalse(User.objects.filter(username__in=['young', 'nopassword', 'badhash']).exists())
+
+    def test_provision_users_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as file:
+            for number in range(5):
+                file.write(json.dumps(self.user_data(f'user-{number}', password='S3cret!')) + '\n')
+            file.write('{not json\n')
+            file.write(json.dumps(self.user_data('user-0', password='S3cret!')) + '\n')
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('provision_users', file.name, batch_size=2, stdout=stdout, stderr=stderr)
+        self.assertEqual(User.objects.filter(username__startswith='user-').count(), 5)
+        self.assertIn('Created 5 users', stdout.getvalue())
+        self.assertIn('Line 6 rejected', stderr.getvalue())
+        self.assertIn('Line 7 rejected', stderr.getvalue())
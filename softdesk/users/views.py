@@ -1,12 +1,16 @@
 from django.shortcuts import render
 
+from django.db import IntegrityError
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from users.models import User
 from users.serializer import UserSerializer
+from users.passwords import hash_password
+from users.provisioning import provision_users
 from rest_framework.permissions import AllowAny
 
 
@@ -18,6 +22,41 @@ class UserViewSet(ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    bulk_max_items = 5000
+
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """
+        Create a list of users in one transaction (staff only). Each item has
+        a `password` or a `password_hash`, gets its own result, and valid
+        items are created even when others are rejected.
+        """
+        items = request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return Response({"error": "A list of users is expected."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {"error": f"At most {self.bulk_max_items} users can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            results = provision_users(items)
+        except IntegrityError:
+            # A username was taken by a concurrent request after the check.
+            return Response(
+                {"error": "A username was taken meanwhile, nothing was created."}, status=status.HTTP_409_CONFLICT
+            )
+
+        serializer = self.get_serializer()
+        for result in results:
+            user = result.pop('user', None)
+            if user is not None:
+                result['data'] = serializer.to_representation(user)
+        all_created = all(result['status'] == status.HTTP_201_CREATED for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if all_created else status.HTTP_207_MULTI_STATUS
+        )
 
 class RegisterUserView(APIView):
     """
@@ -27,20 +66,23 @@ class RegisterUserView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
+        """
+        Create the user with a single INSERT, the password being hashed
+        beforehand on the hashing pool.
+        """
         data = request.data
         password = data.get('password')
 
         if not password:
             return Response({"error": "Le mot de passe est requis."}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = User.objects.create(
+        User.objects.create(
             username=data.get('username'),
             email=data.get('email'),
             age=data.get('age'),
             can_be_contacted=data.get('can_be_contacted', False),
             can_data_be_shared=data.get('can_data_be_shared', False),
+            password=hash_password(password),
         )
-        user.set_password(password)
-        user.save()
 
         return Response({"message": "Utilisateur créé avec succès."}, status=status.HTTP_201_CREATED)